@@ -1,9 +1,23 @@
 # distutils: language = c++
 # cython: language_level=3
 
+from libc.stdint cimport uint8_t, int32_t
+from libc.string cimport memcpy
 from libcpp.vector cimport vector
 from libcpp.string cimport string
 
+import time
+
+import numpy as np
+
+cdef extern from "contraction-hierarchy.hpp":
+    cdef cppclass ContractionHierarchy:
+        vector[int] rank
+        vector[int] offsets
+        vector[int] targets
+        vector[double] weights
+        vector[int] middle
+
 cdef extern from "multi-objective-astar.hpp":
     cdef struct Path:
         string name
@@ -11,9 +25,133 @@ cdef extern from "multi-objective-astar.hpp":
         vector[int] path
         double time
         double dark
+        bint fallback
+        bint approximate
+
+    cdef cppclass TargetBounds:
+        int target
+        vector[double] time
+        vector[double] dark
+        double time_ms
+        double dark_ms
+
+    cdef struct SolverStats:
+        double build_ms
+        double bound_time_ms
+        double bound_dark_ms
+        double hierarchy_ms
+        double search_ms
+        double fallback_ms
+        long long iterations
+        long long labels_created
+        long long labels_dominated
+        long long labels_capped
+        long long peak_open
+        bint fallback
+        bint iteration_limit
+        bint deadline
+
+    cdef struct WorkspaceStats:
+        int max_idle
+        int idle
+        int in_use
+        int peak_in_use
+        long long acquired
+        long long created
+        long long discarded
+        long long idle_bytes
+
+    cdef cppclass CppRoutingGraph "RoutingGraph":
+        CppRoutingGraph(int N, const double* light, const uint8_t* crime,
+                        int M, const int* edge_u, const int* edge_v, const double* edge_len) except +
+        CppRoutingGraph(int N, const double* light, const uint8_t* crime,
+                        int M, const int* edge_u, const int* edge_v, const float* edge_len) except +
+        CppRoutingGraph(int N, int M, const double* light, const uint8_t* crime,
+                        const int* offsets, const int* targets,
+                        const double* edge_time, const double* edge_dark, double lmax) except +
+        int num_nodes()
+        int num_edges()
+        vector[Path] query(int s, int t, const uint8_t* corridor, SolverStats* stats,
+                           double budget_ms) except + nogil
+        TargetBounds target_bounds(int t, const uint8_t* corridor,
+                                   const int* sources, int num_sources) except + nogil
+        vector[Path] query(int s, int t, const uint8_t* corridor,
+                           const TargetBounds& bounds, SolverStats* stats,
+                           double budget_ms) except + nogil
+        void set_landmarks(int K, const double* time_table, const double* dark_table) except +
+        int num_landmarks()
+        vector[double] distances_from(int source, bint darkness) except + nogil
+        ContractionHierarchy build_hierarchy() except + nogil
+        void set_hierarchy(const int* rank, const int* ch_offsets, const int* ch_targets,
+                           const double* ch_weights, const int* ch_middle)
+        bint has_hierarchy()
+        bint fastest_path(int s, int t, Path& out) except + nogil
+        void set_max_workspaces(int max_idle)
+        WorkspaceStats workspace_stats()
 
     vector[Path] solve(int N, int M, const vector[double]& light, const vector[int]& crime,
-                       const vector[vector[int]]& input, int s, int t)
+                       const vector[vector[int]]& input, int s, int t,
+                       SolverStats* stats) except + nogil
+
+ctypedef const uint8_t* mask_ptr_t
+
+ctypedef fused edge_length_t:
+    float
+    double
+
+cdef _path_array(const vector[int]& path):
+    arr = np.empty(path.size(), dtype=np.int32)
+    cdef int32_t[::1] out = arr
+    if path.size() > 0:
+        memcpy(&out[0], path.data(), path.size() * sizeof(int32_t))
+    return arr
+
+cdef _double_array(const vector[double]& values):
+    arr = np.empty(values.size(), dtype=np.float64)
+    cdef double[::1] out = arr
+    if values.size() > 0:
+        memcpy(&out[0], values.data(), values.size() * sizeof(double))
+    return arr
+
+cdef dict _path_to_py(const Path& path, bint as_arrays=False):
+    return {
+        'name': path.name.decode('utf-8'),
+        'path': _path_array(path.path) if as_arrays else list(path.path),
+        'time': path.time,
+        'dark': path.dark,
+        'fallback': path.fallback,
+        'approximate': path.approximate
+    }
+
+cdef list _paths_to_py(vector[Path]& result_cpp, bint as_arrays=False):
+    py_results = []
+    for path in result_cpp:
+        py_results.append(_path_to_py(path, as_arrays))
+    return py_results
+
+cdef dict _stats_to_py(const SolverStats& stats):
+    return {
+        'build_ms': stats.build_ms,
+        'bound_time_ms': stats.bound_time_ms,
+        'bound_dark_ms': stats.bound_dark_ms,
+        'hierarchy_ms': stats.hierarchy_ms,
+        'search_ms': stats.search_ms,
+        'fallback_ms': stats.fallback_ms,
+        'iterations': stats.iterations,
+        'labels_created': stats.labels_created,
+        'labels_dominated': stats.labels_dominated,
+        'labels_capped': stats.labels_capped,
+        'peak_open': stats.peak_open,
+        'fallback': stats.fallback,
+        'iteration_limit': stats.iteration_limit,
+        'deadline': stats.deadline
+    }
+
+def _as_uint8(values):
+    arr = np.ascontiguousarray(values)
+    if arr.dtype == np.bool_:
+        return arr.view(np.uint8)
+    return arr.astype(np.uint8, copy=False)
 
 def run_astar_solver(int N, int M, list light_py, list crime_py, list input_py, int s, int t):
     """
@@ -35,15 +173,461 @@ def run_astar_solver(int N, int M, list light_py, list crime_py, list input_py,
     cdef vector[int] crime_cpp = crime_py
     cdef vector[vector[int]] input_cpp = input_py
 
-    cdef vector[Path] result_cpp = solve(N, M, light_cpp, crime_cpp, input_cpp, s, t)
+    cdef vector[Path] result_cpp
+    with nogil:
+        result_cpp = solve(N, M, light_cpp, crime_cpp, input_cpp, s, t, NULL)
 
-    py_results = []
-    for path in result_cpp:
-        py_results.append({
-            'name': path.name.decode('utf-8'),
-            'path': list(path.path),
-            'time': path.time,
-            'dark': path.dark
-        })
-
-    return py_results
\ No newline at end of file
+    return _paths_to_py(result_cpp)
+
+def run_astar_solver_arrays(const double[::1] light, const uint8_t[::1] crime,
+                            const int32_t[::1] edge_u, const int32_t[::1] edge_v,
+                            const edge_length_t[::1] edge_length, int s, int t,
+                            bint return_stats=False):
+    """
+    Zero-copy variant of run_astar_solver taking contiguous NumPy arrays.
+
+    The arrays are read in place through typed memoryviews, and edge lengths
+    keep their fractional part instead of being truncated to int.
+
+    Args:
+        light (np.ndarray[float64]): Light value for each node.
+        crime (np.ndarray[uint8]): Crime flag (0 or 1) for each node.
+        edge_u, edge_v (np.ndarray[int32]): Endpoints of each edge.
+        edge_length (np.ndarray[float32|float64]): Time cost of each edge.
+        s (int): Start node index.
+        t (int): Target node index.
+        return_stats (bool): Also return the solver's stats for this query.
+
+    Returns:
+        list[dict]: A list of dictionaries, each representing a found path,
+        with 'path' as an np.ndarray[int32] of node indices. With
+        return_stats, a (paths, stats) tuple.
+    """
+    cdef int N = light.shape[0]
+    cdef int M = edge_u.shape[0]
+    if crime.shape[0] != N:
+        raise ValueError("light and crime must have the same length")
+    if edge_v.shape[0] != M or edge_length.shape[0] != M:
+        raise ValueError("edge_u, edge_v and edge_length must have the same length")
+    if N == 0:
+        raise ValueError("graph must have at least one node")
+
+    cdef SolverStats stats
+    build_start = time.perf_counter()
+    cdef CppRoutingGraph* graph = new CppRoutingGraph(
+        N, &light[0], &crime[0], M,
+        <const int*>&edge_u[0] if M > 0 else NULL,
+        <const int*>&edge_v[0] if M > 0 else NULL,
+        &edge_length[0] if M > 0 else NULL
+    )
+    build_ms = (time.perf_counter() - build_start) * 1000
+    cdef vector[Path] result_cpp
+    try:
+        with nogil:
+            result_cpp = graph.query(s, t, NULL, &stats, 0)
+    finally:
+        del graph
+
+    paths = _paths_to_py(result_cpp, True)
+    if not return_stats:
+        return paths
+    stats.build_ms = build_ms
+    return paths, _stats_to_py(stats)
+
+cdef class DestinationBounds:
+    """
+    Exact per-node lower bounds on the remaining time and darkness to one
+    target within a corridor, from RoutingGraph.target_bounds(). They stay
+    valid for every query() towards that target whose corridor lies inside
+    the one they were computed over, so a caller can keep and reuse them.
+    """
+    cdef TargetBounds bounds
+
+    @property
+    def target(self):
+        return self.bounds.target
+
+    @property
+    def num_nodes(self):
+        return self.bounds.time.size()
+
+    @property
+    def compute_ms(self):
+        """Wall-clock time the two reverse searches took."""
+        return self.bounds.time_ms + self.bounds.dark_ms
+
+    @property
+    def nbytes(self):
+        return (self.bounds.time.size() + self.bounds.dark.size()) * sizeof(double)
+
+
+cdef class RoutingGraph:
+    """
+    The full city graph loaded once into C++ memory.
+
+    Adjacency is CSR with per-edge time and darkness precomputed, so a query only
+    pays for the nodes its search touches instead of rebuilding the graph.
+
+    Args:
+        light (array-like[float]): Light (NTL) value for each node.
+        crime (array-like[bool|int]): Crime flag for each node.
+        edge_u, edge_v (array-like[int]): Endpoints of each undirected edge.
+        edge_length (array-like[float]): Time cost (length in meters) of each edge.
+    """
+    cdef CppRoutingGraph* graph
+    # Arrays borrowed by a graph built with from_csr(), kept alive here.
+    cdef object _buffers
+    # Landmark tables borrowed by set_landmarks().
+    cdef object _landmark_tables
+    # Contraction hierarchy arrays borrowed by set_hierarchy().
+    cdef object _hierarchy
+
+    def __init__(self, light, crime, edge_u, edge_v, edge_length):
+        cdef const double[::1] light_mv = np.ascontiguousarray(light, dtype=np.float64)
+        cdef const uint8_t[::1] crime_mv = _as_uint8(crime)
+        cdef const int[::1] u_mv = np.ascontiguousarray(edge_u, dtype=np.intc)
+        cdef const int[::1] v_mv = np.ascontiguousarray(edge_v, dtype=np.intc)
+        cdef const double[::1] len_mv = np.ascontiguousarray(edge_length, dtype=np.float64)
+        cdef int N = light_mv.shape[0]
+        cdef int M = u_mv.shape[0]
+        if crime_mv.shape[0] != N:
+            raise ValueError("light and crime must have the same length")
+        if v_mv.shape[0] != M or len_mv.shape[0] != M:
+            raise ValueError("edge_u, edge_v and edge_length must have the same length")
+        if N == 0:
+            raise ValueError("graph must have at least one node")
+        self.graph = new CppRoutingGraph(
+            N, &light_mv[0], &crime_mv[0], M,
+            &u_mv[0] if M > 0 else NULL,
+            &v_mv[0] if M > 0 else NULL,
+            &len_mv[0] if M > 0 else NULL
+        )
+
+    @staticmethod
+    def from_csr(light, crime, offsets, targets, edge_time, edge_dark, lmax=0.0):
+        """
+        Wrap prebuilt CSR arrays without copying them.
+
+        The arrays must already be contiguous with the exact dtypes below (as
+        stored in a compiled graph artifact); they are referenced, not copied,
+        so memory-mapped arrays stay shared between processes.
+
+        Args:
+            light (np.ndarray[float64]): Light value for each node.
+            crime (np.ndarray[uint8]): Crime flag for each node.
+            offsets (np.ndarray[int32]): N + 1 CSR row offsets.
+            targets (np.ndarray[int32]): 2M neighbor indices (both directions).
+            edge_time, edge_dark (np.ndarray[float64]): Per-directed-edge costs.
+            lmax (float): Light maximum edge_dark was computed with; 0 computes
+                it from light. Required for a graph cut from a larger one.
+        """
+        cdef const double[::1] light_mv = light
+        cdef const uint8_t[::1] crime_mv = crime
+        cdef const int32_t[::1] offsets_mv = offsets
+        cdef const int32_t[::1] targets_mv = targets
+        cdef const double[::1] time_mv = edge_time
+        cdef const double[::1] dark_mv = edge_dark
+        cdef int N = light_mv.shape[0]
+        cdef int M = targets_mv.shape[0] // 2
+        if N == 0 or crime_mv.shape[0] != N or offsets_mv.shape[0] != N + 1:
+            raise ValueError("light, crime and offsets must describe the same nodes")
+        if time_mv.shape[0] != 2 * M or dark_mv.shape[0] != 2 * M or targets_mv.shape[0] != 2 * M:
+            raise ValueError("targets, edge_time and edge_dark must have 2M entries")
+
+        cdef RoutingGraph self = RoutingGraph.__new__(RoutingGraph)
+        self.graph = new CppRoutingGraph(
+            N, M, &light_mv[0], &crime_mv[0],
+            <const int*>&offsets_mv[0],
+            <const int*>&targets_mv[0] if M > 0 else NULL,
+            &time_mv[0] if M > 0 else NULL,
+            &dark_mv[0] if M > 0 else NULL,
+            lmax
+        )
+        self._buffers = (light, crime, offsets, targets, edge_time, edge_dark)
+        return self
+
+    def __dealloc__(self):
+        del self.graph
+
+    @property
+    def num_nodes(self):
+        return self.graph.num_nodes()
+
+    @property
+    def num_edges(self):
+        return self.graph.num_edges()
+
+    @property
+    def num_landmarks(self):
+        return self.graph.num_landmarks()
+
+    def set_landmarks(self, time_table, dark_table):
+        """
+        Use ALT landmark distance tables to steer each query's bound searches.
+
+        The bounds stay exact; the tables only let them be computed on demand.
+
+        Must be called before the graph is shared between threads. The tables
+        are referenced, not copied.
+
+        Args:
+            time_table, dark_table (np.ndarray[float64]): (N, K) distances
+                between each node and each of the K landmarks, C-contiguous.
+                Pass None for both to go back to per-query bounds.
+        """
+        if time_table is None and dark_table is None:
+            self.graph.set_landmarks(0, NULL, NULL)
+            self._landmark_tables = None
+            return
+        time_arr = np.asarray(time_table)
+        dark_arr = np.asarray(dark_table)
+        if time_arr.ndim != 2 or time_arr.shape != dark_arr.shape or time_arr.shape[0] != self.graph.num_nodes():
+            raise ValueError("landmark tables must both be (num_nodes, K)")
+        cdef int K = time_arr.shape[1]
+        cdef const double[:, ::1] time_mv = time_arr
+        cdef const double[:, ::1] dark_mv = dark_arr
+        if K == 0:
+            self.graph.set_landmarks(0, NULL, NULL)
+            self._landmark_tables = None
+            return
+        self.graph.set_landmarks(K, &time_mv[0, 0], &dark_mv[0, 0])
+        self._landmark_tables = (time_table, dark_table)
+
+    def set_max_workspaces(self, int max_idle):
+        """
+        Keep at most max_idle search workspaces between queries, one per
+        thread that queries concurrently. Extra ones are freed on return.
+        """
+        self.graph.set_max_workspaces(max_idle)
+
+    def workspace_stats(self):
+        """Counters of the pooled search workspaces, including the bytes held idle."""
+        return self.graph.workspace_stats()
+
+    def distances_from(self, int source, bint darkness=False):
+        """
+        Shortest time (or darkness) from source to every node, over the whole
+        graph and ignoring crime flags. Unreachable nodes are inf.
+        """
+        cdef vector[double] dist
+        with nogil:
+            dist = self.graph.distances_from(source, darkness)
+        return _double_array(dist)
+
+    def build_hierarchy(self):
+        """
+        Contract the graph over edge time, leaving crime-flagged nodes out.
+
+        Returns:
+            dict[str, np.ndarray]: rank, offsets, targets (int32), weights
+            (float64) and middle (int32) of the upward shortcut graph, ready
+            for set_hierarchy() or a compiled graph artifact.
+        """
+        cdef ContractionHierarchy ch
+        with nogil:
+            ch = self.graph.build_hierarchy()
+        return {
+            'rank': _path_array(ch.rank),
+            'offsets': _path_array(ch.offsets),
+            'targets': _path_array(ch.targets),
+            'weights': _double_array(ch.weights),
+            'middle': _path_array(ch.middle),
+        }
+
+    def set_hierarchy(self, rank, offsets, targets, weights, middle):
+        """
+        Answer fastest routes from a contraction hierarchy built by
+        build_hierarchy(). Must be called before the graph is shared between
+        threads. The arrays are referenced, not copied; pass None for all of
+        them to drop the hierarchy.
+        """
+        if offsets is None:
+            self.graph.set_hierarchy(NULL, NULL, NULL, NULL, NULL)
+            self._hierarchy = None
+            return
+        cdef const int32_t[::1] rank_mv = rank
+        cdef const int32_t[::1] offsets_mv = offsets
+        cdef const int32_t[::1] targets_mv = targets
+        cdef const double[::1] weights_mv = weights
+        cdef const int32_t[::1] middle_mv = middle
+        cdef int N = self.graph.num_nodes()
+        cdef Py_ssize_t E = targets_mv.shape[0]
+        if rank_mv.shape[0] != N or offsets_mv.shape[0] != N + 1:
+            raise ValueError("rank and offsets must describe the graph's nodes")
+        if weights_mv.shape[0] != E or middle_mv.shape[0] != E or offsets_mv[N] != E:
+            raise ValueError("targets, weights and middle must have one entry per shortcut")
+        # Keep valid pointers for empty shortcut arrays.
+        self._hierarchy = (rank, offsets, targets, weights, middle)
+        self.graph.set_hierarchy(
+            <const int*>&rank_mv[0], <const int*>&offsets_mv[0],
+            <const int*>&targets_mv[0] if E > 0 else <const int*>&offsets_mv[0],
+            &weights_mv[0] if E > 0 else NULL,
+            <const int*>&middle_mv[0] if E > 0 else <const int*>&offsets_mv[0]
+        )
+
+    @property
+    def has_hierarchy(self):
+        return self.graph.has_hierarchy()
+
+    def fastest(self, int s, int t):
+        """
+        Fastest route from s to t avoiding crime-flagged nodes, from the
+        contraction hierarchy.
+
+        Returns:
+            dict | None: The 'fastest' path, or None if t is unreachable or
+            no hierarchy is set.
+        """
+        cdef Path path
+        cdef bint found
+        with nogil:
+            found = self.graph.fastest_path(s, t, path)
+        return _path_to_py(path) if found else None
+
+    def target_bounds(self, int t, corridor=None, sources=None):
+        """
+        Lower bounds towards t from reverse searches over corridor, for reuse
+        by later queries (see query()'s bounds).
+
+        Args:
+            t (int): Target node index.
+            corridor (array-like[bool], optional): Per-node mask; queries using
+                the bounds must stay inside it.
+            sources (array-like[int], optional): Start nodes exempt from the
+                crime flags, as each query's own start node is.
+
+        Returns:
+            DestinationBounds
+        """
+        cdef const uint8_t[::1] corridor_mv
+        cdef const uint8_t* corridor_ptr = NULL
+        if corridor is not None:
+            corridor_mv = _as_uint8(corridor)
+            if corridor_mv.shape[0] != self.graph.num_nodes():
+                raise ValueError("corridor mask must have one entry per node")
+            corridor_ptr = &corridor_mv[0]
+        cdef const int[::1] sources_mv = np.ascontiguousarray([] if sources is None else sources, dtype=np.intc)
+        cdef int count = sources_mv.shape[0]
+        cdef const int* sources_ptr = &sources_mv[0] if count > 0 else NULL
+
+        cdef DestinationBounds out = DestinationBounds.__new__(DestinationBounds)
+        with nogil:
+            out.bounds = self.graph.target_bounds(t, corridor_ptr, sources_ptr, count)
+        return out
+
+    def query(self, int s, int t, corridor=None, bint return_stats=False, double budget_ms=0,
+              DestinationBounds bounds=None):
+        """
+        Find the fastest, best-lit and balanced paths from s to t.
+
+        Args:
+            s (int): Start node index.
+            t (int): Target node index.
+            corridor (array-like[bool], optional): Per-node mask restricting the search.
+            return_stats (bool): Also return the solver's stats for this query.
+            budget_ms (float): Wall-clock budget; when it runs out the best
+                paths found so far are returned with 'approximate' set. 0 means
+                no budget.
+            bounds (DestinationBounds, optional): Precomputed bounds towards t,
+                used instead of landmarks or per-query reverse searches. The
+                corridor must lie inside the one they were computed over.
+
+        Returns:
+            list[dict]: A list of dictionaries, each representing a found path.
+            With return_stats, a (paths, stats) tuple.
+        """
+        cdef const uint8_t[::1] corridor_mv
+        cdef const uint8_t* corridor_ptr = NULL
+        if corridor is not None:
+            corridor_mv = _as_uint8(corridor)
+            if corridor_mv.shape[0] != self.graph.num_nodes():
+                raise ValueError("corridor mask must have one entry per node")
+            corridor_ptr = &corridor_mv[0]
+
+        # The search only reads the graph and a workspace leased to it alone,
+        # so other Python threads (and other queries) run while it is in C++.
+        cdef vector[Path] result_cpp
+        cdef SolverStats stats
+        if bounds is not None and bounds.bounds.target != t:
+            raise ValueError("bounds were computed for a different target")
+        with nogil:
+            if bounds is not None:
+                result_cpp = self.graph.query(s, t, corridor_ptr, bounds.bounds, &stats, budget_ms)
+            else:
+                result_cpp = self.graph.query(s, t, corridor_ptr, &stats, budget_ms)
+
+        if return_stats:
+            return _paths_to_py(result_cpp), _stats_to_py(stats)
+        return _paths_to_py(result_cpp)
+
+    def query_many(self, sources, int t, corridors=None, bint return_stats=False, double budget_ms=0):
+        """
+        Find paths from several start nodes to one target.
+
+        Without landmarks, the target's lower-bound searches run once, over
+        the union of the corridors, and are shared by every start node; each
+        search is still restricted to its own corridor.
+
+        Args:
+            sources (array-like[int]): Start node indices.
+            t (int): Target node index.
+            corridors (list[array-like[bool]], optional): One per-node mask per start node.
+            return_stats (bool): Also return each query's solver stats. Shared
+                lower-bound timings are reported in full by every query.
+            budget_ms (float): Wall-clock budget for each start node's search,
+                as in query().
+
+        Returns:
+            list[list[dict]]: The query() result for each start node, in order.
+            With return_stats, a (results, stats) tuple of two such lists.
+        """
+        cdef const int[::1] sources_mv = np.ascontiguousarray(sources, dtype=np.intc)
+        cdef int count = sources_mv.shape[0]
+        cdef int N = self.graph.num_nodes()
+        if count == 0:
+            return ([], []) if return_stats else []
+
+        masks = None
+        union_mask = None
+        if corridors is not None:
+            if len(corridors) != count:
+                raise ValueError("corridors must have one mask per start node")
+            masks = [_as_uint8(mask) for mask in corridors]
+            for mask in masks:
+                if mask.shape[0] != N:
+                    raise ValueError("corridor mask must have one entry per node")
+            union_mask = np.bitwise_or.reduce(masks) if count > 1 else masks[0]
+
+        cdef vector[mask_ptr_t] corridor_ptrs
+        corridor_ptrs.resize(count, NULL)
+        cdef const uint8_t[::1] mask_mv
+        cdef const uint8_t* union_ptr = NULL
+        cdef int i
+        if masks is not None:
+            for i in range(count):
+                mask_mv = masks[i]
+                corridor_ptrs[i] = &mask_mv[0]
+            mask_mv = union_mask
+            union_ptr = &mask_mv[0]
+
+        cdef TargetBounds bounds
+        cdef vector[vector[Path]] results_cpp
+        cdef vector[SolverStats] stats
+        cdef bint use_landmarks = self.graph.num_landmarks() > 0
+        results_cpp.resize(count)
+        stats.resize(count)
+        with nogil:
+            if use_landmarks:
+                # Landmark bounds are already shared by every query.
+                for i in range(count):
+                    results_cpp[i] = self.graph.query(sources_mv[i], t, corridor_ptrs[i], &stats[i], budget_ms)
+            else:
+                bounds = self.graph.target_bounds(t, union_ptr, &sources_mv[0], count)
+                for i in range(count):
+                    results_cpp[i] = self.graph.query(sources_mv[i], t, corridor_ptrs[i], bounds, &stats[i],
+                                                      budget_ms)
+
+        results = [_paths_to_py(results_cpp[i]) for i in range(count)]
+        if return_stats:
+            return results, [_stats_to_py(stats[i]) for i in range(count)]
+        return results
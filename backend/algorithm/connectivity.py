@@ -0,0 +1,164 @@
+"""
+Connected components of the crime-filtered graph, for rejecting unreachable
+trips before any search starts.
+
+A route may start and end on flagged nodes but never pass through one, so a
+trip is possible exactly when the components touching its two endpoints
+overlap. Labels are computed once from the static crime flags and then kept
+in a union-find that follows the live crime overlay:
+
+- a node the overlay clears is unioned with its open neighbors right away;
+- a node the overlay flags can only split a component, which the union-find
+  cannot undo. The labels are left coarser than the truth, which may let an
+  unreachable trip through to the search but never rejects a reachable one,
+  and rebuild() recomputes them exactly off the request path.
+"""
+import logging
+import threading
+import time
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def component_labels(offsets, targets, allowed):
+    """
+    Per-node component label (the smallest node id in the component) of the
+    undirected CSR graph restricted to allowed nodes. Excluded nodes keep
+    their own id. Vectorized hooking and pointer jumping, O((N + M) log N).
+    """
+    n = len(offsets) - 1
+    sources = np.repeat(np.arange(n, dtype=np.int64), np.diff(offsets))
+    keep = allowed[sources] & allowed[targets]
+    u, v = sources[keep], np.asarray(targets, dtype=np.int64)[keep]
+    labels = np.arange(n, dtype=np.int64)
+    while True:
+        lu, lv = labels[u], labels[v]
+        open_edges = lu != lv
+        if not open_edges.any():
+            return labels
+        # Edges inside one component stay that way; drop them.
+        u, v, lu, lv = u[open_edges], v[open_edges], lu[open_edges], lv[open_edges]
+        np.minimum.at(labels, np.maximum(lu, lv), np.minimum(lu, lv))
+        while True:
+            jumped = labels[labels]
+            if np.array_equal(jumped, labels):
+                break
+            labels = jumped
+
+
+class Connectivity:
+    def __init__(self, graph):
+        self.offsets = graph.offsets
+        self.targets = graph.targets
+        self.static_allowed = graph.crime == 0
+        self._lock = threading.Lock()
+        self._flagged = frozenset()
+        self._overlay_version = None
+        self._stale = False
+        self._queries = 0
+        self._rejected = 0
+        self._unions = 0
+        self._rebuilds = 0
+        self._rebuild_ms = 0.0
+        self._install(self.static_allowed.copy(), self._flagged, None)
+
+    def _install(self, allowed, flagged, overlay_version):
+        start = time.perf_counter()
+        parent = component_labels(self.offsets, self.targets, allowed)
+        with self._lock:
+            self.allowed = allowed
+            self.parent = parent
+            self._flagged = flagged
+            self._overlay_version = overlay_version
+            self._stale = False
+            self._rebuilds += 1
+            self._rebuild_ms = (time.perf_counter() - start) * 1000
+        logger.info(f"Computed connected components over {len(parent)} nodes in {self._rebuild_ms:.0f}ms")
+
+    def _find(self, v):
+        parent = self.parent
+        root = v
+        while parent[root] != root:
+            root = parent[root]
+        while parent[v] != root:
+            parent[v], v = root, parent[v]
+        return int(root)
+
+    def _union(self, a, b):
+        ra, rb = self._find(a), self._find(b)
+        if ra != rb:
+            self.parent[max(ra, rb)] = min(ra, rb)
+            self._unions += 1
+
+    def _neighbors(self, v):
+        return self.targets[self.offsets[v]:self.offsets[v + 1]]
+
+    def sync(self, overlay):
+        """Catch up with the overlay's flagged nodes, if its version moved."""
+        if overlay is None or overlay.version == self._overlay_version:
+            return
+        version = overlay.version
+        flagged = frozenset(overlay.flagged_nodes().tolist())
+        with self._lock:
+            if version == self._overlay_version:
+                return
+            for v in flagged - self._flagged:
+                self.allowed[v] = False
+                self._stale = True
+            for v in self._flagged - flagged:
+                if not self.static_allowed[v]:
+                    continue
+                self.allowed[v] = True
+                for w in self._neighbors(v).tolist():
+                    if self.allowed[w]:
+                        self._union(v, w)
+            self._flagged = flagged
+            self._overlay_version = version
+
+    def rebuild(self, overlay=None, force=False):
+        """
+        Recompute exact labels if overlay flags may have split a component.
+        Runs outside the lock; changes that land meanwhile are replayed.
+        """
+        self.sync(overlay)
+        with self._lock:
+            if not (self._stale or force):
+                return False
+            flagged, version = self._flagged, self._overlay_version
+        allowed = self.static_allowed.copy()
+        if flagged:
+            allowed[np.fromiter(flagged, dtype=np.int64, count=len(flagged))] = False
+        self._install(allowed, flagged, version)
+        self.sync(overlay)
+        return True
+
+    def _touching(self, v):
+        """Components a route may continue into from endpoint v."""
+        if self.allowed[v]:
+            return {self._find(v)}
+        return {self._find(w) for w in self._neighbors(v).tolist() if self.allowed[w]}
+
+    def reachable(self, s, t):
+        """Whether any route from s to t avoids every flagged node in between."""
+        with self._lock:
+            self._queries += 1
+            if s == t or t in self._neighbors(s):
+                return True
+            if self._touching(s) & self._touching(t):
+                return True
+            self._rejected += 1
+            return False
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                'queries': self._queries,
+                'rejected': self._rejected,
+                'overlay_version': self._overlay_version,
+                'stale': self._stale,
+                'incremental_unions': self._unions,
+                'rebuilds': self._rebuilds,
+                'last_rebuild_ms': round(self._rebuild_ms, 1)
+            }
@@ -0,0 +1,278 @@
+#include "contraction-hierarchy.hpp"
+#include <algorithm>
+#include <limits>
+#include <queue>
+#include <stdexcept>
+#include <tuple>
+
+using namespace std;
+
+namespace {
+
+const double INF = numeric_limits<double>::infinity();
+// Witness searches give up after settling this many nodes. A missed witness
+// only adds an unnecessary shortcut, never a wrong distance. Priority
+// estimates, which are recomputed far more often, use a tighter limit.
+const int WITNESS_SETTLE_LIMIT = 500;
+const int ESTIMATE_SETTLE_LIMIT = 50;
+
+struct Arc {
+    int to;
+    double w;
+    int middle;
+};
+
+class Contractor {
+public:
+    Contractor(int N, const int* offsets, const int* targets, const double* weight, const uint8_t* excluded)
+        : N(N), adj(N), up(N), contracted(N, 0), deleted_neighbors(N, 0), dist(N, INF) {
+        for (int u = 0; u < N; ++u) {
+            if (excluded != nullptr && excluded[u]) {
+                contracted[u] = 1;
+                continue;
+            }
+            for (int e = offsets[u]; e < offsets[u + 1]; ++e) {
+                int v = targets[e];
+                if (v == u || (excluded != nullptr && excluded[v])) continue;
+                add_arc(u, v, weight[e], -1);
+            }
+        }
+    }
+
+    ContractionHierarchy run() {
+        ContractionHierarchy ch;
+        ch.rank.assign(N, -1);
+
+        using Item = pair<int, int>;
+        priority_queue<Item, vector<Item>, greater<Item>> order;
+        for (int v = 0; v < N; ++v) {
+            if (!contracted[v]) order.push({priority(v), v});
+        }
+        int next_rank = 0;
+        while (!order.empty()) {
+            int v = order.top().second;
+            order.pop();
+            if (contracted[v]) continue;
+            // Lazy update: priorities drift as neighbors are contracted.
+            int p = priority(v);
+            if (!order.empty() && p > order.top().first) {
+                order.push({p, v});
+                continue;
+            }
+            contract(v);
+            ch.rank[v] = next_rank++;
+        }
+
+        ch.offsets.assign(N + 1, 0);
+        for (int v = 0; v < N; ++v) ch.offsets[v + 1] = ch.offsets[v] + (int)up[v].size();
+        for (int v = 0; v < N; ++v) {
+            for (const Arc& a : up[v]) {
+                ch.targets.push_back(a.to);
+                ch.weights.push_back(a.w);
+                ch.middle.push_back(a.middle);
+            }
+        }
+        return ch;
+    }
+
+private:
+    void add_arc(int u, int v, double w, int middle) {
+        for (Arc& a : adj[u]) {
+            if (a.to == v) {
+                if (w < a.w) {
+                    a.w = w;
+                    a.middle = middle;
+                }
+                return;
+            }
+        }
+        adj[u].push_back(Arc{v, w, middle});
+    }
+
+    // Bounded Dijkstra from source over uncontracted nodes, skipping `avoid`.
+    void witness_search(int source, int avoid, double limit, int settle_limit) {
+        using P = pair<double, int>;
+        priority_queue<P, vector<P>, greater<P>> pq;
+        dist[source] = 0.0;
+        touched.push_back(source);
+        pq.push({0.0, source});
+        int settled = 0;
+        while (!pq.empty() && settled < settle_limit) {
+            auto [d, u] = pq.top();
+            pq.pop();
+            if (d > dist[u]) continue;
+            if (d > limit) break;
+            ++settled;
+            for (const Arc& a : adj[u]) {
+                if (a.to == avoid) continue;
+                double nd = d + a.w;
+                if (nd < dist[a.to]) {
+                    if (dist[a.to] == INF) touched.push_back(a.to);
+                    dist[a.to] = nd;
+                    pq.push({nd, a.to});
+                }
+            }
+        }
+    }
+
+    void reset_search() {
+        for (int v : touched) dist[v] = INF;
+        touched.clear();
+    }
+
+    // Shortcuts (u, w, cost) needed to keep distances exact without v.
+    void find_shortcuts(int v, vector<tuple<int, int, double>>& out, int settle_limit) {
+        out.clear();
+        const vector<Arc>& nbrs = adj[v];
+        for (size_t i = 0; i + 1 < nbrs.size(); ++i) {
+            double limit = 0.0;
+            for (size_t j = i + 1; j < nbrs.size(); ++j) limit = max(limit, nbrs[i].w + nbrs[j].w);
+            witness_search(nbrs[i].to, v, limit, settle_limit);
+            for (size_t j = i + 1; j < nbrs.size(); ++j) {
+                double via = nbrs[i].w + nbrs[j].w;
+                if (dist[nbrs[j].to] > via) out.emplace_back(nbrs[i].to, nbrs[j].to, via);
+            }
+            reset_search();
+        }
+    }
+
+    // Edge difference (shortcuts weighted double) plus contracted neighbors,
+    // which spreads contraction evenly over the graph.
+    int priority(int v) {
+        find_shortcuts(v, shortcuts, ESTIMATE_SETTLE_LIMIT);
+        return 2 * (int)shortcuts.size() - (int)adj[v].size() + deleted_neighbors[v];
+    }
+
+    void contract(int v) {
+        find_shortcuts(v, shortcuts, WITNESS_SETTLE_LIMIT);
+        // Every remaining neighbor is contracted later, so these are v's upward edges.
+        up[v] = adj[v];
+        for (const Arc& a : adj[v]) {
+            vector<Arc>& back = adj[a.to];
+            back.erase(remove_if(back.begin(), back.end(), [v](const Arc& b) { return b.to == v; }), back.end());
+            deleted_neighbors[a.to]++;
+        }
+        for (const auto& [u, w, cost] : shortcuts) {
+            add_arc(u, w, cost, v);
+            add_arc(w, u, cost, v);
+        }
+        adj[v].clear();
+        adj[v].shrink_to_fit();
+        contracted[v] = 1;
+    }
+
+    int N;
+    vector<vector<Arc>> adj;
+    vector<vector<Arc>> up;
+    vector<uint8_t> contracted;
+    vector<int> deleted_neighbors;
+    vector<double> dist;
+    vector<int> touched;
+    vector<tuple<int, int, double>> shortcuts;
+};
+
+int find_up_edge(const HierarchyView& ch, int from, int to) {
+    for (int e = ch.offsets[from]; e < ch.offsets[from + 1]; ++e) {
+        if (ch.targets[e] == to) return e;
+    }
+    throw logic_error("contraction hierarchy is missing a shortcut half");
+}
+
+// Appends the road nodes after `from` along upward edge e, ending at its target.
+void unpack_edge(const HierarchyView& ch, int from, int e, vector<int>& out) {
+    int to = ch.targets[e];
+    int m = ch.middle[e];
+    if (m < 0) {
+        out.push_back(to);
+        return;
+    }
+    // m was contracted before both ends, so both halves are upward edges of m.
+    vector<int> back;
+    unpack_edge(ch, m, find_up_edge(ch, m, from), back);
+    for (int i = (int)back.size() - 2; i >= 0; --i) out.push_back(back[i]);
+    out.push_back(m);
+    unpack_edge(ch, m, find_up_edge(ch, m, to), out);
+}
+
+}  // namespace
+
+ContractionHierarchy build_contraction_hierarchy(int N, const int* offsets, const int* targets,
+                                                 const double* weight, const uint8_t* excluded) {
+    return Contractor(N, offsets, targets, weight, excluded).run();
+}
+
+double hierarchy_shortest_path(const HierarchyView& ch,
+                               const vector<pair<int, double>>& sources,
+                               const vector<pair<int, double>>& sinks,
+                               vector<int>& path, HierarchySearchSpace& space) {
+    using Entry = HierarchySearchSpace::Entry;
+    path.clear();
+    space.begin(ch.N);
+
+    auto push = [&](int k, int v, const Entry& entry) {
+        space.set(k, v, entry);
+        auto& q = space.heap[k];
+        q.push_back({entry.dist, v});
+        push_heap(q.begin(), q.end(), greater<>());
+    };
+    auto seed = [&](int k, const vector<pair<int, double>>& seeds) {
+        for (const auto& [v, cost] : seeds) {
+            if (v < 0 || v >= ch.N || ch.rank[v] < 0) continue;
+            if (cost < space.dist(k, v)) push(k, v, Entry{cost, -1, -1});
+        }
+    };
+    seed(0, sources);
+    seed(1, sinks);
+
+    double best = INF;
+    int meet = -1;
+    // Both searches only climb to higher-ranked nodes; the shortest path
+    // peaks at a node both of them settle.
+    auto step = [&](int k) {
+        auto& q = space.heap[k];
+        pop_heap(q.begin(), q.end(), greater<>());
+        auto [d, u] = q.back();
+        q.pop_back();
+        if (d > space.dist(k, u)) return;
+        double other = space.dist(1 - k, u);
+        if (d + other < best) {
+            best = d + other;
+            meet = u;
+        }
+        // Stall-on-demand: a higher neighbor already reached more cheaply
+        // proves d is not u's true distance, so u's edges need not be relaxed.
+        for (int e = ch.offsets[u]; e < ch.offsets[u + 1]; ++e) {
+            if (space.dist(k, ch.targets[e]) + ch.weights[e] < d) return;
+        }
+        for (int e = ch.offsets[u]; e < ch.offsets[u + 1]; ++e) {
+            int v = ch.targets[e];
+            double nd = d + ch.weights[e];
+            if (nd < space.dist(k, v)) push(k, v, Entry{nd, u, e});
+        }
+    };
+    const auto& qf = space.heap[0];
+    const auto& qb = space.heap[1];
+    while (true) {
+        bool fwd_open = !qf.empty() && qf.front().first < best;
+        bool bwd_open = !qb.empty() && qb.front().first < best;
+        if (!fwd_open && !bwd_open) break;
+        step(fwd_open && (!bwd_open || qf.front().first <= qb.front().first) ? 0 : 1);
+    }
+    if (meet < 0) return INF;
+
+    vector<pair<int, int>> chain;
+    for (int x = meet; space.entry(0, x).parent != -1; x = space.entry(0, x).parent) {
+        chain.push_back({space.entry(0, x).parent, space.entry(0, x).edge});
+    }
+    path.push_back(chain.empty() ? meet : chain.back().first);
+    for (auto it = chain.rbegin(); it != chain.rend(); ++it) unpack_edge(ch, it->first, it->second, path);
+
+    for (int x = meet; space.entry(1, x).parent != -1; x = space.entry(1, x).parent) {
+        int p = space.entry(1, x).parent;
+        vector<int> segment;
+        unpack_edge(ch, p, space.entry(1, x).edge, segment);
+        for (int i = (int)segment.size() - 2; i >= 0; --i) path.push_back(segment[i]);
+        path.push_back(p);
+    }
+    return best;
+}
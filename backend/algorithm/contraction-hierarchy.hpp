@@ -0,0 +1,93 @@
+#ifndef CONTRACTION_HIERARCHY_HPP
+#define CONTRACTION_HIERARCHY_HPP
+
+#include <algorithm>
+#include <cstdint>
+#include <limits>
+#include <utility>
+#include <vector>
+
+// Contraction hierarchy over one edge weight of an undirected CSR graph.
+// Only upward edges are kept (from each node to neighbors contracted after
+// it), which is all a bidirectional query needs on an undirected graph.
+// middle is the contracted node a shortcut bypasses, or -1 for a road edge.
+struct ContractionHierarchy {
+    std::vector<int> rank;      // contraction order, -1 for excluded nodes
+    std::vector<int> offsets;   // N + 1 entries
+    std::vector<int> targets;
+    std::vector<double> weights;
+    std::vector<int> middle;
+};
+
+// Excluded nodes (e.g. crime-flagged) are left out of the hierarchy entirely,
+// so every path it returns avoids them.
+ContractionHierarchy build_contraction_hierarchy(int N, const int* offsets, const int* targets,
+                                                 const double* weight, const uint8_t* excluded);
+
+// Borrowed view of a hierarchy, e.g. from a memory-mapped graph artifact.
+struct HierarchyView {
+    int N = 0;
+    const int* rank = nullptr;
+    const int* offsets = nullptr;
+    const int* targets = nullptr;
+    const double* weights = nullptr;
+    const int* middle = nullptr;
+};
+
+// Scratch arrays of hierarchy_shortest_path(), side 0 forward and 1
+// backward, kept between queries. An entry counts as unset unless its stamp
+// is the current generation, so begin() starts a query in O(1) and a query
+// only ever writes the nodes it reaches. Sized on first use.
+struct HierarchySearchSpace {
+    struct Entry {
+        double dist;
+        int parent;  // -1 at a seed
+        int edge;
+    };
+
+    void begin(int N) {
+        if ((int)entries[0].size() != N) {
+            for (int k = 0; k < 2; ++k) {
+                stamp[k].assign(N, 0);
+                entries[k].resize(N);
+            }
+            generation = 0;
+        }
+        if (++generation == 0) {
+            // After 2^32 queries, clear the stamps once so none matches by accident.
+            for (auto& st : stamp) std::fill(st.begin(), st.end(), 0);
+            generation = 1;
+        }
+        for (auto& h : heap) h.clear();
+    }
+
+    double dist(int k, int v) const {
+        return stamp[k][v] == generation ? entries[k][v].dist : std::numeric_limits<double>::infinity();
+    }
+    const Entry& entry(int k, int v) const { return entries[k][v]; }
+    void set(int k, int v, const Entry& e) {
+        stamp[k][v] = generation;
+        entries[k][v] = e;
+    }
+
+    size_t nbytes() const {
+        return (stamp[0].capacity() + stamp[1].capacity()) * sizeof(uint32_t) +
+               (entries[0].capacity() + entries[1].capacity()) * sizeof(Entry) +
+               (heap[0].capacity() + heap[1].capacity()) * sizeof(std::pair<double, int>);
+    }
+
+    uint32_t generation = 0;
+    std::vector<uint32_t> stamp[2];
+    std::vector<Entry> entries[2];
+    std::vector<std::pair<double, int>> heap[2];  // binary heaps, smallest first
+};
+
+// Shortest path from any (node, initial cost) in sources to any in sinks.
+// Returns the cost (infinity if unreachable) and fills path with the
+// unpacked road nodes from the chosen source to the chosen sink.
+double hierarchy_shortest_path(const HierarchyView& ch,
+                               const std::vector<std::pair<int, double>>& sources,
+                               const std::vector<std::pair<int, double>>& sinks,
+                               std::vector<int>& path, HierarchySearchSpace& space);
+
+#endif
@@ -0,0 +1,33 @@
+import numpy as np
+
+from backend.algorithm.spatial_index import haversine_array
+
+
+def ellipse_reach(start, end, detour_factor, slack_m=0.0):
+    """Longest start -> node -> end distance, in meters, that `ellipse_mask` accepts."""
+    direct = haversine_array(start[0], start[1], np.array([end[0]]), np.array([end[1]]))[0]
+    return max(direct, 1.0) * detour_factor + slack_m
+
+
+def ellipse_mask(lat, lon, start, end, detour_factor, slack_m=0.0):
+    """
+    Boolean mask of nodes inside the ellipse with foci at `start` and `end`.
+
+    A node is inside when going start -> node -> end is at most `detour_factor`
+    times the direct distance, plus `slack_m` meters, i.e. the set of
+    plausible detours. The slack keeps very short trips from getting a
+    corridor too thin to hold a street.
+    """
+    via = haversine_array(start[0], start[1], lat, lon) + haversine_array(end[0], end[1], lat, lon)
+    return via <= ellipse_reach(start, end, detour_factor, slack_m)
+
+
+def build_csr(n, u, v, w):
+    """Undirected CSR adjacency: every edge is stored once in each direction."""
+    src = np.concatenate([u, v])
+    dst = np.concatenate([v, u])
+    wts = np.concatenate([w, w])
+    order = np.argsort(src, kind='stable')
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=n), out=offsets[1:])
+    return offsets, dst[order], wts[order]
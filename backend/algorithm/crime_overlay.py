@@ -0,0 +1,154 @@
+"""
+Live crime overlay on top of the compiled graph's static crime flags.
+
+Each incident is mapped once, through the node spatial index, to the nodes
+within the overlay radius, and a per-node counter is updated for just those
+nodes. A node is flagged while at least one live incident covers it. Incidents
+expire when they age out of the time window, so both adding and expiring cost
+work proportional to the incidents involved, never to the size of the graph.
+
+The solver never sees a rebuilt graph: flagged nodes are cleared from the
+per-request corridor mask, which the solver already treats like a crime flag.
+
+Routes avoid flagged nodes, so flags alone say nothing about how close a
+returned route passes to crime. Each incident therefore also adds a weight,
+falling linearly from 1 at the incident to 0 at the exposure radius, to a
+per-node exposure score kept the same incremental way; scoring a route is a
+lookup of its nodes.
+"""
+import heapq
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class CrimeOverlay:
+    def __init__(self, node_index, radius_m=None, window_hours=None, exposure_radius_m=None):
+        self.node_index = node_index
+        self.radius_m = float(radius_m if radius_m is not None else os.getenv('CRIME_OVERLAY_RADIUS_M', 100))
+        self.exposure_radius_m = float(exposure_radius_m if exposure_radius_m is not None
+                                       else os.getenv('CRIME_EXPOSURE_RADIUS_M', 400))
+        window_hours = window_hours if window_hours is not None else os.getenv('CRIME_OVERLAY_WINDOW_HOURS', 24)
+        self.window_seconds = float(window_hours) * 3600
+        self.counts = np.zeros(len(node_index), dtype=np.int32)
+        self.exposure = np.zeros(len(node_index), dtype=np.float64)
+        self._flagged = set()
+        # incident id -> (timestamp, covered nodes, exposed nodes, their
+        # weights); the heap orders expiry.
+        self._incidents = {}
+        self._expiry = []
+        self._version = 0
+        self._lock = threading.Lock()
+        self._added = 0
+        self._expired = 0
+        self._duplicates = 0
+        self._stale = 0
+
+    @property
+    def version(self):
+        """Bumped whenever the set of flagged nodes changes."""
+        return self._version
+
+    def add(self, incident_id, lat, lon, timestamp, now=None):
+        """
+        Record one incident (timestamp in epoch seconds). Returns False for
+        incidents already recorded or already outside the window.
+        """
+        now = time.time() if now is None else now
+        if timestamp < now - self.window_seconds:
+            with self._lock:
+                self._stale += 1
+            return False
+        # One lookup serves both radii; within() returns nodes nearest first.
+        nodes, dist = self.node_index.within(lat, lon, max(self.radius_m, self.exposure_radius_m))
+        covered = nodes[:np.searchsorted(dist, self.radius_m, side='right')]
+        exposed = dist < self.exposure_radius_m
+        nodes, weights = nodes[exposed], 1 - dist[exposed] / self.exposure_radius_m
+        with self._lock:
+            if incident_id in self._incidents:
+                self._duplicates += 1
+                return False
+            self._incidents[incident_id] = (timestamp, covered, nodes, weights)
+            heapq.heappush(self._expiry, (timestamp, incident_id))
+            self._added += 1
+            self._update(covered, 1)
+            self.exposure[nodes] += weights
+        return True
+
+    def expire(self, now=None):
+        """Drop incidents older than the window. Returns how many were dropped."""
+        cutoff = (time.time() if now is None else now) - self.window_seconds
+        dropped = 0
+        with self._lock:
+            while self._expiry and self._expiry[0][0] < cutoff:
+                _, incident_id = heapq.heappop(self._expiry)
+                _, covered, nodes, weights = self._incidents.pop(incident_id)
+                self._update(covered, -1)
+                self.exposure[nodes] -= weights
+                dropped += 1
+            self._expired += dropped
+        return dropped
+
+    def _update(self, nodes, delta):
+        if len(nodes) == 0:
+            return
+        before = self.counts[nodes] > 0
+        self.counts[nodes] += delta
+        after = self.counts[nodes] > 0
+        changed = before != after
+        if not changed.any():
+            return
+        for node, flagged in zip(nodes[changed].tolist(), after[changed].tolist()):
+            if flagged:
+                self._flagged.add(node)
+            else:
+                self._flagged.discard(node)
+        self._version += 1
+
+    def apply(self, mask, node_ids=None):
+        """
+        Clear the currently flagged nodes from a per-node corridor mask, in
+        place. node_ids, sorted, gives the node behind each mask entry when the
+        mask covers only part of the graph (a tile region).
+        """
+        with self._lock:
+            if not self._flagged:
+                return mask
+            flagged = np.fromiter(self._flagged, dtype=np.int64, count=len(self._flagged))
+        if node_ids is None:
+            mask[flagged] = False
+            return mask
+        pos = np.minimum(np.searchsorted(node_ids, flagged), len(node_ids) - 1)
+        mask[pos[node_ids[pos] == flagged]] = False
+        return mask
+
+    def exposure_at(self, nodes):
+        """Exposure score of each of the given nodes (ids as in node_index)."""
+        nodes = np.asarray(nodes, dtype=np.int64)
+        with self._lock:
+            # Adding and later subtracting the same weights can leave rounding residue.
+            return np.maximum(self.exposure[nodes], 0.0)
+
+    def flagged_nodes(self):
+        with self._lock:
+            return np.sort(np.fromiter(self._flagged, dtype=np.int64, count=len(self._flagged)))
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                'version': self._version,
+                'live_incidents': len(self._incidents),
+                'flagged_nodes': len(self._flagged),
+                'radius_m': self.radius_m,
+                'exposure_radius_m': self.exposure_radius_m,
+                'window_hours': self.window_seconds / 3600,
+                'added': self._added,
+                'expired': self._expired,
+                'duplicates': self._duplicates,
+                'stale': self._stale
+            }
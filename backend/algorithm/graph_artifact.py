@@ -0,0 +1,213 @@
+import hashlib
+import json
+import logging
+import os
+
+import numpy as np
+
+from backend.algorithm.astar_solver import RoutingGraph
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_MAGIC = b'AEGISGR\x00'
+ARTIFACT_VERSION = 1
+# magic (8 bytes) + format version (uint32) + JSON header length (uint32)
+PREAMBLE_SIZE = 16
+SECTION_ALIGN = 64
+
+# Section name -> dtype, in file order. Edge arrays are per directed CSR edge.
+SECTIONS = {
+    'lat': np.float32,
+    'lon': np.float32,
+    'light': np.float64,
+    'crime': np.uint8,
+    'offsets': np.int32,
+    'targets': np.int32,
+    'edge_time': np.float64,
+    'edge_dark': np.float64,
+}
+
+# Optional precomputed search aids; artifacts without them still load.
+# - ALT landmark ids and their (num_nodes, K) node-major distance tables,
+#   stored flat. Without them the solver falls back to per-query bounds.
+# - The contraction hierarchy over edge time (crime-flagged nodes excluded)
+#   that answers the fastest route.
+OPTIONAL_SECTIONS = {
+    'landmarks': np.int32,
+    'landmark_time': np.float64,
+    'landmark_dark': np.float64,
+    'ch_rank': np.int32,
+    'ch_offsets': np.int32,
+    'ch_targets': np.int32,
+    'ch_weights': np.float64,
+    'ch_middle': np.int32,
+}
+HIERARCHY_SECTIONS = ('ch_rank', 'ch_offsets', 'ch_targets', 'ch_weights', 'ch_middle')
+
+
+class CompiledGraph:
+    """
+    Struct-of-arrays routing graph: node coordinates, light and crime flags plus
+    the undirected CSR adjacency with precomputed edge time and darkness.
+
+    Arrays are either in-memory (compiled from CSV on the fly) or read-only
+    views into one memory-mapped artifact shared by every worker process.
+    """
+
+    def __init__(self, arrays, lmax, source=None, checksum=None):
+        for name, dtype in SECTIONS.items():
+            arr = arrays[name]
+            if arr.dtype != dtype:
+                raise ValueError(f"Section '{name}' must be {np.dtype(dtype)}, got {arr.dtype}")
+            setattr(self, name, arr)
+        for name, dtype in OPTIONAL_SECTIONS.items():
+            arr = arrays.get(name)
+            if arr is not None and arr.dtype != dtype:
+                raise ValueError(f"Section '{name}' must be {np.dtype(dtype)}, got {arr.dtype}")
+            setattr(self, name, arr)
+        self.lmax = float(lmax)
+        self.source = source
+        self.checksum = checksum
+        if len(self.offsets) != self.num_nodes + 1:
+            raise ValueError("CSR offsets must have num_nodes + 1 entries")
+        if self.landmarks is not None:
+            table_shape = (self.num_nodes, len(self.landmarks))
+            self.landmark_time = self.landmark_time.reshape(table_shape)
+            self.landmark_dark = self.landmark_dark.reshape(table_shape)
+
+    @property
+    def num_nodes(self):
+        return len(self.lat)
+
+    @property
+    def num_edges(self):
+        return len(self.targets) // 2
+
+    @property
+    def num_landmarks(self):
+        return 0 if self.landmarks is None else len(self.landmarks)
+
+    @property
+    def has_hierarchy(self):
+        return self.ch_offsets is not None
+
+    def hierarchy(self):
+        """The contraction hierarchy arrays, keyed as RoutingGraph.set_hierarchy() expects."""
+        return {name[len('ch_'):]: getattr(self, name) for name in HIERARCHY_SECTIONS}
+
+    def arrays(self):
+        arrays = {name: getattr(self, name) for name in SECTIONS}
+        arrays.update({name: getattr(self, name) for name in OPTIONAL_SECTIONS
+                       if getattr(self, name) is not None})
+        return arrays
+
+
+def _aligned(offset):
+    return (offset + SECTION_ALIGN - 1) // SECTION_ALIGN * SECTION_ALIGN
+
+
+def _payload_checksum(sections_bytes):
+    digest = hashlib.sha256()
+    for chunk in sections_bytes:
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def save_graph(graph, path):
+    """Write a CompiledGraph as a versioned, checksummed binary artifact."""
+    arrays = {name: np.ascontiguousarray(arr) for name, arr in graph.arrays().items()}
+    checksum = _payload_checksum(memoryview(arr).cast('B') for arr in arrays.values())
+
+    # Section offsets are relative to the end of the header, so they can be
+    # computed before the header length is known.
+    layout = {}
+    cursor = 0
+    for name, arr in arrays.items():
+        cursor = _aligned(cursor)
+        layout[name] = {'offset': cursor, 'count': int(arr.size), 'dtype': np.dtype(arr.dtype).str}
+        cursor += arr.nbytes
+
+    header = {
+        'version': ARTIFACT_VERSION,
+        'num_nodes': graph.num_nodes,
+        'num_edges': graph.num_edges,
+        'num_landmarks': graph.num_landmarks,
+        'num_shortcuts': len(graph.ch_targets) if graph.has_hierarchy else 0,
+        'lmax': graph.lmax,
+        'sha256': checksum,
+        'sections': layout,
+    }
+    header_bytes = json.dumps(header, sort_keys=True).encode('utf-8')
+    data_start = _aligned(PREAMBLE_SIZE + len(header_bytes))
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(ARTIFACT_MAGIC)
+        f.write(np.array([ARTIFACT_VERSION, len(header_bytes)], dtype='<u4').tobytes())
+        f.write(header_bytes)
+        for name, arr in arrays.items():
+            f.seek(data_start + layout[name]['offset'])
+            f.write(memoryview(arr).cast('B'))
+    os.replace(tmp_path, path)
+    return header
+
+
+def read_header(path):
+    with open(path, 'rb') as f:
+        preamble = f.read(PREAMBLE_SIZE)
+        if len(preamble) < PREAMBLE_SIZE or preamble[:8] != ARTIFACT_MAGIC:
+            raise ValueError(f"{path} is not a compiled graph artifact")
+        version, header_len = np.frombuffer(preamble[8:], dtype='<u4')
+        if version != ARTIFACT_VERSION:
+            raise ValueError(f"{path} has artifact version {version}, expected {ARTIFACT_VERSION}; recompile it")
+        header = json.loads(f.read(int(header_len)).decode('utf-8'))
+    header['data_start'] = _aligned(PREAMBLE_SIZE + int(header_len))
+    return header
+
+
+def load_graph(path, verify=False):
+    """
+    Memory-map a graph artifact. Pages are loaded lazily and shared through the
+    OS page cache, so startup does not depend on graph size. With verify=True
+    the whole payload is read once to check the SHA-256 in the header.
+    """
+    header = read_header(path)
+    mapped = np.memmap(path, dtype=np.uint8, mode='r')
+    arrays = {}
+    for name, dtype in {**SECTIONS, **OPTIONAL_SECTIONS}.items():
+        section = header['sections'].get(name)
+        if section is None and name in OPTIONAL_SECTIONS:
+            continue
+        if section is None:
+            raise ValueError(f"Section '{name}' is missing from {path}")
+        if np.dtype(section['dtype']) != np.dtype(dtype):
+            raise ValueError(f"Section '{name}' in {path} has dtype {section['dtype']}")
+        start = header['data_start'] + section['offset']
+        arrays[name] = mapped[start:start + section['count'] * np.dtype(dtype).itemsize].view(dtype)
+
+    if verify:
+        actual = _payload_checksum(memoryview(arr).cast('B') for arr in arrays.values())
+        if actual != header['sha256']:
+            raise ValueError(f"Checksum mismatch for {path}: artifact is corrupt")
+
+    graph = CompiledGraph(arrays, header['lmax'], source=path, checksum=header['sha256'])
+    logger.info(f"Mapped graph artifact {path}: {graph.num_nodes} nodes, {graph.num_edges} edges, "
+                f"{graph.num_landmarks} landmarks")
+    return graph
+
+
+def build_routing_graph(graph):
+    """The solver over a CompiledGraph, with its landmarks and hierarchy when it has them."""
+    solver = RoutingGraph.from_csr(
+        graph.light, graph.crime, graph.offsets, graph.targets,
+        graph.edge_time, graph.edge_dark
+    )
+    if graph.landmarks is not None:
+        solver.set_landmarks(graph.landmark_time, graph.landmark_dark)
+    else:
+        logger.warning("Graph has no ALT landmarks, lower bounds fall back to per-query Dijkstra")
+    if graph.has_hierarchy:
+        solver.set_hierarchy(**graph.hierarchy())
+    else:
+        logger.warning("Graph has no contraction hierarchy, fastest routes come from the label search")
+    return solver
@@ -0,0 +1,101 @@
+"""
+Compile the OSM node and edge CSVs into a memory-mapped graph artifact.
+
+    python -m backend.algorithm.graph_compiler \\
+        --nodes data/OSM-NTL-CRIME_combined.csv --edges data/edges.csv \\
+        --out data/graph.aegis
+"""
+import argparse
+import logging
+import time
+
+import numpy as np
+import pandas as pd
+
+from backend.algorithm.astar_solver import RoutingGraph
+from backend.algorithm.corridor import build_csr
+from backend.algorithm.graph_artifact import CompiledGraph, save_graph, load_graph
+from backend.algorithm.landmarks import DEFAULT_NUM_LANDMARKS, compute_landmarks
+
+logger = logging.getLogger(__name__)
+
+
+def compute_lmax(light):
+    # Same rule as the solver: darkness is measured against the brightest node.
+    lmax = float(np.max(light)) if len(light) else 0.0
+    return lmax if lmax > 0.0 else 1.0
+
+
+def compile_graph(nodes_df, edges_df, num_landmarks=DEFAULT_NUM_LANDMARKS, hierarchy=True):
+    """
+    Build a CompiledGraph from the OSM-NTL-CRIME node table and edge list,
+    with num_landmarks ALT landmark tables (0 to skip them) and, unless
+    hierarchy is False, a contraction hierarchy for the fastest route.
+    """
+    n = len(nodes_df)
+    light = nodes_df['NTL'].to_numpy(dtype=np.float64)
+    crime = nodes_df['near_crime_100m'].fillna(False).astype(bool).to_numpy().view(np.uint8)
+
+    u = edges_df['u_idx'].to_numpy(dtype=np.int64)
+    v = edges_df['v_idx'].to_numpy(dtype=np.int64)
+    length = edges_df['length_m'].to_numpy(dtype=np.float64)
+    if len(u) and (min(u.min(), v.min()) < 0 or max(u.max(), v.max()) >= n):
+        raise ValueError("Edge endpoints reference nodes outside the node table")
+    if 2 * len(u) > np.iinfo(np.int32).max:
+        raise ValueError("Too many edges for int32 CSR offsets")
+
+    offsets, targets, edge_time = build_csr(n, u, v, length)
+    sources = np.repeat(np.arange(n), np.diff(offsets))
+    lmax = compute_lmax(light)
+    edge_dark = np.maximum(0.0, lmax - 0.5 * (light[sources] + light[targets]))
+
+    arrays = {
+        'lat': nodes_df['lat'].to_numpy(dtype=np.float32),
+        'lon': nodes_df['lon'].to_numpy(dtype=np.float32),
+        'light': light,
+        'crime': np.ascontiguousarray(crime),
+        'offsets': offsets.astype(np.int32),
+        'targets': targets.astype(np.int32),
+        'edge_time': edge_time,
+        'edge_dark': edge_dark,
+    }
+    if num_landmarks > 0 or hierarchy:
+        routing_graph = RoutingGraph.from_csr(
+            light, arrays['crime'], arrays['offsets'], arrays['targets'], edge_time, edge_dark
+        )
+    if num_landmarks > 0:
+        arrays['landmarks'], arrays['landmark_time'], arrays['landmark_dark'] = \
+            compute_landmarks(routing_graph, num_landmarks)
+    if hierarchy:
+        start = time.perf_counter()
+        ch = routing_graph.build_hierarchy()
+        arrays.update({f'ch_{name}': arr for name, arr in ch.items()})
+        logger.info(f"Built contraction hierarchy with {len(ch['targets'])} upward edges "
+                    f"in {time.perf_counter() - start:.1f}s")
+    return CompiledGraph(arrays, lmax)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--nodes', required=True, help='OSM-NTL-CRIME_combined.csv')
+    parser.add_argument('--edges', required=True, help='edges.csv')
+    parser.add_argument('--out', required=True, help='artifact path to write')
+    parser.add_argument('--landmarks', type=int, default=DEFAULT_NUM_LANDMARKS,
+                        help='number of ALT landmarks to precompute (0 to skip)')
+    parser.add_argument('--skip-hierarchy', action='store_true',
+                        help='do not build the contraction hierarchy for fastest routes')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+    start = time.perf_counter()
+    graph = compile_graph(pd.read_csv(args.nodes), pd.read_csv(args.edges),
+                          args.landmarks, hierarchy=not args.skip_hierarchy)
+    header = save_graph(graph, args.out)
+    load_graph(args.out, verify=True)
+    logger.info(f"Wrote {args.out} (v{header['version']}, {header['num_nodes']} nodes, "
+                f"{header['num_edges']} edges, {header['num_landmarks']} landmarks, sha256 {header['sha256'][:12]}) "
+                f"in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,365 @@
+"""
+Tiled graph storage: the compiled graph cut into fixed geographic tiles that
+are loaded on demand, so one process can serve a metro region or several
+cities without holding the whole network resident.
+
+    python -m backend.algorithm.graph_tiles --graph data/graph.aegis --out data/tiles --tile-m 5000
+
+Tiles are square cells of a fixed lat/lon grid. Nodes are renumbered so each
+tile owns one contiguous range of global ids, in tile order, and each tile is
+an ordinary graph artifact holding its nodes' CSR rows. Edge targets stay
+global ids, so an edge that crosses a tile boundary is stored by both of its
+tiles and is stitched back together whenever both are loaded. manifest.json
+lists the tiles and their id ranges.
+
+TileStore keeps loaded tiles in an LRU under a byte cap and stitches the
+tiles a request's corridor touches into a TileRegion: a self-contained
+CompiledGraph with its own routing graph and spatial index, numbered locally
+in global-id order. Landmarks and the contraction hierarchy are precomputed
+over the whole graph, so tiles carry neither; regions use per-query bounds.
+"""
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from backend.algorithm.astar_solver import RoutingGraph
+from backend.algorithm.graph_artifact import SECTIONS, CompiledGraph, load_graph, save_graph
+from backend.algorithm.node_table import NodeTable
+from backend.algorithm.spatial_index import EARTH_RADIUS_M, NodeSpatialIndex
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = 'manifest.json'
+MANIFEST_VERSION = 1
+DEFAULT_TILE_M = 5000
+METERS_PER_DEGREE = np.radians(1) * EARTH_RADIUS_M
+
+
+def _row_edges(offsets, rows):
+    """Indices of the CSR entries of the given rows, row by row."""
+    starts = offsets[rows].astype(np.int64)
+    counts = offsets[rows + 1].astype(np.int64) - starts
+    shift = np.repeat(starts - np.concatenate(([0], np.cumsum(counts)[:-1])), counts)
+    return shift + np.arange(int(counts.sum()), dtype=np.int64), counts
+
+
+def write_tiles(graph, directory, tile_m=DEFAULT_TILE_M):
+    """Cut a CompiledGraph into tiles of about tile_m meters under directory. Returns the manifest."""
+    lat = graph.lat.astype(np.float64)
+    lon = graph.lon.astype(np.float64)
+    origin = (float(lat.min()), float(lon.min()))
+    dlat = tile_m / METERS_PER_DEGREE
+    dlon = tile_m / (METERS_PER_DEGREE * np.cos(np.radians(float(lat.mean()))))
+    row = np.floor((lat - origin[0]) / dlat).astype(np.int64)
+    col = np.floor((lon - origin[1]) / dlon).astype(np.int64)
+
+    # Tile order, then original order inside a tile, defines the new ids.
+    order = np.lexsort((np.arange(graph.num_nodes), col, row))
+    new_id = np.empty(graph.num_nodes, dtype=np.int64)
+    new_id[order] = np.arange(graph.num_nodes)
+    tile_of = row[order] * (int(col.max()) + 1) + col[order]
+    bounds = np.flatnonzero(np.diff(tile_of)) + 1
+    starts = np.concatenate(([0], bounds))
+    ends = np.concatenate((bounds, [graph.num_nodes]))
+
+    os.makedirs(directory, exist_ok=True)
+    tiles = []
+    for start, end in zip(starts.tolist(), ends.tolist()):
+        nodes = order[start:end]
+        edges, degree = _row_edges(graph.offsets, nodes)
+        offsets = np.zeros(len(nodes) + 1, dtype=np.int32)
+        np.cumsum(degree, out=offsets[1:])
+        arrays = {
+            'lat': graph.lat[nodes],
+            'lon': graph.lon[nodes],
+            'light': graph.light[nodes],
+            'crime': graph.crime[nodes],
+            'offsets': offsets,
+            'targets': new_id[graph.targets[edges]].astype(np.int32),
+            'edge_time': graph.edge_time[edges],
+            'edge_dark': graph.edge_dark[edges],
+        }
+        key = (int(row[nodes[0]]), int(col[nodes[0]]))
+        name = f'tile_{key[0]}_{key[1]}.aegis'
+        header = save_graph(CompiledGraph(arrays, graph.lmax), os.path.join(directory, name))
+        tiles.append({'row': key[0], 'col': key[1], 'file': name, 'first_id': start,
+                      'num_nodes': end - start, 'sha256': header['sha256']})
+
+    manifest = {
+        'version': MANIFEST_VERSION,
+        'tile_m': tile_m,
+        'origin': origin,
+        'dlat': dlat,
+        'dlon': dlon,
+        'num_nodes': graph.num_nodes,
+        'num_edges': graph.num_edges,
+        'lmax': graph.lmax,
+        'source_sha256': graph.checksum,
+        'tiles': tiles,
+    }
+    tmp_path = os.path.join(directory, f'{MANIFEST_NAME}.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(tmp_path, os.path.join(directory, MANIFEST_NAME))
+    return manifest
+
+
+class Tile:
+    def __init__(self, graph, first_id):
+        self.graph = graph
+        self.first_id = first_id
+        self.nbytes = sum(arr.nbytes for arr in graph.arrays().values())
+        self._index = None
+
+    @property
+    def index(self):
+        if self._index is None:
+            self._index = NodeSpatialIndex(self.graph.lat, self.graph.lon)
+        return self._index
+
+
+class TileRegion:
+    """
+    Loaded tiles stitched into one graph. node_ids maps local node i to its
+    global id; edges to nodes outside the region are dropped.
+    """
+
+    def __init__(self, tiles, lmax):
+        tiles = sorted(tiles, key=lambda tile: tile.first_id)
+        counts = np.array([tile.graph.num_nodes for tile in tiles], dtype=np.int64)
+        self._firsts = np.array([tile.first_id for tile in tiles], dtype=np.int64)
+        self._counts = counts
+        self._local_starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        self.node_ids = np.concatenate([np.arange(tile.first_id, tile.first_id + tile.graph.num_nodes)
+                                        for tile in tiles])
+        n = len(self.node_ids)
+
+        targets, keep = self._locate(np.concatenate([tile.graph.targets for tile in tiles]))
+        degree = np.concatenate([np.diff(tile.graph.offsets) for tile in tiles])
+        rows = np.repeat(np.arange(n), degree)
+        offsets = np.zeros(n + 1, dtype=np.int32)
+        np.cumsum(np.bincount(rows[keep], minlength=n), out=offsets[1:])
+        arrays = {name: np.concatenate([getattr(tile.graph, name) for tile in tiles])
+                  for name in ('lat', 'lon', 'light', 'crime')}
+        arrays.update({
+            'offsets': offsets,
+            'targets': targets[keep].astype(np.int32),
+            'edge_time': np.concatenate([tile.graph.edge_time for tile in tiles])[keep],
+            'edge_dark': np.concatenate([tile.graph.edge_dark for tile in tiles])[keep],
+        })
+        self.graph = CompiledGraph(arrays, lmax)
+        self.routing_graph = RoutingGraph.from_csr(
+            self.graph.light, self.graph.crime, self.graph.offsets, self.graph.targets,
+            self.graph.edge_time, self.graph.edge_dark, lmax
+        )
+        self.node_index = NodeSpatialIndex(self.graph.lat, self.graph.lon)
+        self.node_table = NodeTable.from_graph(self.graph, self.node_ids)
+        self.nbytes = (sum(arr.nbytes for arr in self.graph.arrays().values()) + self.node_ids.nbytes
+                       + self.node_table.nbytes)
+
+    def _locate(self, global_ids):
+        """(local ids, present mask) for an array of global ids."""
+        global_ids = np.asarray(global_ids, dtype=np.int64)
+        tile = np.searchsorted(self._firsts, global_ids, side='right') - 1
+        tile_ok = tile >= 0
+        tile = np.maximum(tile, 0)
+        offset = global_ids - self._firsts[tile]
+        present = tile_ok & (offset < self._counts[tile])
+        return self._local_starts[tile] + offset, present
+
+    def local(self, node):
+        """Local id of a global node id; KeyError if it is outside the region."""
+        local, present = self._locate([node])
+        if not present[0]:
+            raise KeyError(f"node {node} is outside the loaded region")
+        return int(local[0])
+
+
+class TileStore:
+    """
+    Lazily loaded tiles and the most recently stitched regions (at most
+    TILE_REGION_CACHE_SIZE of them) in LRUs that together stay under max_mb
+    (TILE_CACHE_MAX_MB); regions are evicted before tiles. Also serves as
+    the node index of the crime overlay: len() and within() answer in
+    global ids.
+    """
+
+    def __init__(self, directory, max_mb=None, max_regions=None):
+        self.directory = directory
+        with open(os.path.join(directory, MANIFEST_NAME)) as f:
+            manifest = json.load(f)
+        if manifest.get('version') != MANIFEST_VERSION:
+            raise ValueError(f"{directory} has tile manifest version {manifest.get('version')}, "
+                             f"expected {MANIFEST_VERSION}; re-tile the graph")
+        self.manifest = manifest
+        self.origin = tuple(manifest['origin'])
+        self.dlat = float(manifest['dlat'])
+        self.dlon = float(manifest['dlon'])
+        self.tile_m = float(manifest['tile_m'])
+        self.lmax = float(manifest['lmax'])
+        self.num_nodes = int(manifest['num_nodes'])
+        self.num_edges = int(manifest['num_edges'])
+        self.tiles = {(t['row'], t['col']): t for t in manifest['tiles']}
+        by_id = sorted(self.tiles, key=lambda key: self.tiles[key]['first_id'])
+        self._keys_by_id = by_id
+        self._firsts = np.array([self.tiles[key]['first_id'] for key in by_id], dtype=np.int64)
+
+        self.max_bytes = int(float(max_mb if max_mb is not None else os.getenv('TILE_CACHE_MAX_MB', 512)) * 1024 * 1024)
+        self.max_regions = int(max_regions if max_regions is not None else os.getenv('TILE_REGION_CACHE_SIZE', 8))
+        self._loaded = OrderedDict()
+        self._loaded_bytes = 0
+        self._regions = OrderedDict()
+        self._lock = threading.RLock()
+        self._loads = 0
+        self._evictions = 0
+        self._load_ms = 0.0
+        self._region_hits = 0
+        self._region_misses = 0
+
+    def __len__(self):
+        return self.num_nodes
+
+    def tile_key(self, lat, lon):
+        return (int(np.floor((lat - self.origin[0]) / self.dlat)),
+                int(np.floor((lon - self.origin[1]) / self.dlon)))
+
+    def keys_within(self, lat, lon, radius_m):
+        """Existing tiles that intersect the box around a circle of radius_m meters."""
+        half_lat = radius_m / METERS_PER_DEGREE
+        half_lon = radius_m / (METERS_PER_DEGREE * max(np.cos(np.radians(lat)), 1e-6))
+        row0, col0 = self.tile_key(lat - half_lat, lon - half_lon)
+        row1, col1 = self.tile_key(lat + half_lat, lon + half_lon)
+        return [(row, col) for row in range(row0, row1 + 1) for col in range(col0, col1 + 1)
+                if (row, col) in self.tiles]
+
+    def _evict(self):
+        """Drop least recently used regions, then tiles, until the cache fits max_bytes. Call with _lock held."""
+        while self._loaded_bytes > self.max_bytes and self._regions:
+            _, evicted = self._regions.popitem(last=False)
+            self._loaded_bytes -= evicted.nbytes
+            self._evictions += 1
+        while self._loaded_bytes > self.max_bytes and len(self._loaded) > 1:
+            _, evicted = self._loaded.popitem(last=False)
+            self._loaded_bytes -= evicted.nbytes
+            self._evictions += 1
+
+    def tile(self, key):
+        with self._lock:
+            tile = self._loaded.get(key)
+            if tile is not None:
+                self._loaded.move_to_end(key)
+                return tile
+        # Loaded outside the lock, so one slow read does not stall every other lookup.
+        meta = self.tiles[key]
+        start = time.perf_counter()
+        mapped = load_graph(os.path.join(self.directory, meta['file']))
+        # Read into memory, so the cap bounds what the tile really costs.
+        graph = CompiledGraph({name: np.array(getattr(mapped, name)) for name in SECTIONS}, mapped.lmax)
+        tile = Tile(graph, meta['first_id'])
+        load_ms = (time.perf_counter() - start) * 1000
+        with self._lock:
+            self._load_ms += load_ms
+            self._loads += 1
+            if key in self._loaded:
+                # Another thread loaded it meanwhile; keep a single copy.
+                self._loaded.move_to_end(key)
+                return self._loaded[key]
+            self._loaded[key] = tile
+            self._loaded_bytes += tile.nbytes
+            self._evict()
+            return tile
+
+    def region(self, keys):
+        """The stitched TileRegion over the given tiles."""
+        region_key = tuple(sorted(set(keys)))
+        with self._lock:
+            region = self._regions.get(region_key)
+            if region is not None:
+                self._regions.move_to_end(region_key)
+                self._region_hits += 1
+                return region
+            self._region_misses += 1
+        region = TileRegion([self.tile(key) for key in region_key], self.lmax)
+        with self._lock:
+            if region_key in self._regions:
+                self._regions.move_to_end(region_key)
+                return self._regions[region_key]
+            self._regions[region_key] = region
+            self._loaded_bytes += region.nbytes
+            while len(self._regions) > self.max_regions:
+                _, evicted = self._regions.popitem(last=False)
+                self._loaded_bytes -= evicted.nbytes
+            self._evict()
+            return region
+
+    def nearest(self, lat, lon):
+        """(global id, distance_m) of the closest node in the point's tile and the eight around it."""
+        row, col = self.tile_key(lat, lon)
+        best = (None, np.inf)
+        for key in ((row + dr, col + dc) for dr in (-1, 0, 1) for dc in (-1, 0, 1)):
+            if key not in self.tiles:
+                continue
+            tile = self.tile(key)
+            idx, dist = tile.index.nearest(lat, lon)
+            if dist < best[1]:
+                best = (tile.first_id + idx, dist)
+        if best[0] is None:
+            raise LookupError(f"No road network tiles near ({lat}, {lon})")
+        return best
+
+    def within(self, lat, lon, radius_m):
+        """Return (global ids, distances_m) of every node within radius_m, nearest first."""
+        found = [(tile.first_id + idx, dist) for tile in map(self.tile, self.keys_within(lat, lon, radius_m))
+                 for idx, dist in [tile.index.within(lat, lon, radius_m)]]
+        if not found:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+        nodes = np.concatenate([nodes for nodes, _ in found])
+        dist = np.concatenate([dist for _, dist in found])
+        ranked = np.lexsort((nodes, dist))
+        return nodes[ranked], dist[ranked]
+
+    def coordinates(self, node):
+        key = self._keys_by_id[int(np.searchsorted(self._firsts, node, side='right')) - 1]
+        tile = self.tile(key)
+        return float(tile.graph.lat[node - tile.first_id]), float(tile.graph.lon[node - tile.first_id])
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                'tiles': len(self.tiles),
+                'tile_m': self.tile_m,
+                'loaded_tiles': len(self._loaded),
+                'loaded_bytes': self._loaded_bytes,
+                'max_bytes': self.max_bytes,
+                'loads': self._loads,
+                'evictions': self._evictions,
+                'load_ms': round(self._load_ms, 1),
+                'regions': len(self._regions),
+                'region_bytes': sum(region.nbytes for region in self._regions.values()),
+                'region_hits': self._region_hits,
+                'region_misses': self._region_misses
+            }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--graph', required=True, help='compiled graph artifact to cut')
+    parser.add_argument('--out', required=True, help='directory to write the tiles and manifest to')
+    parser.add_argument('--tile-m', type=float, default=DEFAULT_TILE_M, help='tile edge length in meters')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+    start = time.perf_counter()
+    manifest = write_tiles(load_graph(args.graph), args.out, args.tile_m)
+    logger.info(f"Wrote {len(manifest['tiles'])} tiles of {args.tile_m:g}m for {manifest['num_nodes']} nodes "
+                f"to {args.out} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
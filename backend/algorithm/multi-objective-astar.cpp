@@ -1,33 +1,28 @@
 #include "multi-objective-astar.hpp"
-#include <iostream>
 #include <vector>
 #include <queue>
 #include <cmath>
 #include <limits>
 #include <algorithm>
-#include <iomanip>
-#include <set>
+#include <chrono>
+#include <stdexcept>
+#include <thread>
 
 using namespace std;
 
-struct Edge {
-    int to;
-    double time_cost;
-};
-
 struct Label {
     double time = 0.0;
     double dark = 0.0;
     int node = -1;
-    int prev_node = -1;
-    int prev_label_idx = -1;
+    int prev = -1;       // pool index of the predecessor label, -1 at the source
+    bool alive = true;   // false once dominated or dropped by the cardinality cap
 };
 
 struct PQItem {
     double f_time;
     double f_dark;
     int node;
-    int label_idx;
+    int label_id;
     bool operator<(const PQItem& o) const {
         if (f_time != o.f_time) return f_time > o.f_time;
         return f_dark > o.f_dark;
@@ -35,20 +30,194 @@ struct PQItem {
 };
 
 
-static inline bool dominates(const Label& a, const Label& b) {
-    const double EPS = 1e-12;
-    return (a.time <= b.time + EPS) && (a.dark <= b.dark + EPS) &&
-           ((a.time + EPS < b.time) || (a.dark + EPS < b.dark));
+// Cardinality cap on every Pareto front but the target's. A capped node's
+// front never exceeds SLOTS ids, so they live in fixed slots of one array.
+const int FRONT_CAP = 3;
+const int SLOTS = FRONT_CAP + 1;
+const double INF = numeric_limits<double>::infinity();
+
+using DistHeap = vector<pair<double, int>>;
+
+// Open entry of a reverse A*: key is dist plus the node's potential.
+struct KeyedItem {
+    double key;
+    double dist;
+    int node;
+    bool operator>(const KeyedItem& o) const { return key > o.key; }
+};
+using KeyedHeap = vector<KeyedItem>;
+
+// Label-search state of one node; reset on the first touch in each query.
+struct NodeState {
+    double fastest;       // fastest label time that reached the node
+    LowerBound bound;     // memoized landmark bound, time < 0 until computed
+    uint8_t front_size;
+    bool closed;
+};
+
+// Both frontiers of the fallback's bidirectional Dijkstra at one node.
+struct MeetState {
+    double dist[2];
+    int parent[2];
+};
+
+// Scratch memory for one query at a time. Every per-node entry has a stamp
+// and counts as unset unless the stamp equals the current generation, so
+// begin() starts a new query in O(1) instead of clearing O(N) arrays, and
+// only the nodes a query touches are ever reset. The reverse-search and
+// fallback arrays are allocated the first time a query needs them.
+struct SearchWorkspace {
+    explicit SearchWorkspace(int N) : N(N), stamp(N, 0), nodes(N), front_ids((size_t)N * SLOTS) {
+        pool.reserve(label_capacity());
+    }
+
+    void begin() {
+        if (++generation == 0) {
+            // After 2^32 queries, clear the stamps once so none matches by accident.
+            fill(stamp.begin(), stamp.end(), 0);
+            for (auto& st : bound_stamp) fill(st.begin(), st.end(), 0);
+            fill(meet_stamp.begin(), meet_stamp.end(), 0);
+            generation = 1;
+        }
+        pool.clear();
+        goals.clear();
+        open.clear();
+    }
+
+    NodeState& node(int v) {
+        if (stamp[v] != generation) {
+            stamp[v] = generation;
+            nodes[v] = NodeState{1e9, LowerBound{-1.0, -1.0}, 0, false};
+        }
+        return nodes[v];
+    }
+
+    // Reverse-search distance k (0 time, 1 darkness) to the target, INF if unset.
+    double bound(int k, int v) const { return bound_stamp[k][v] == generation ? bound_dist[k][v] : INF; }
+    void set_bound(int k, int v, double d) {
+        bound_stamp[k][v] = generation;
+        bound_dist[k][v] = d;
+    }
+    void reserve_bounds() {
+        for (int k = 0; k < 2; ++k) {
+            if (bound_stamp[k].empty()) {
+                bound_stamp[k].assign(N, 0);
+                bound_dist[k].resize(N);
+            }
+        }
+    }
+
+    MeetState& meet(int v) {
+        if (meet_stamp.empty()) {
+            meet_stamp.assign(N, 0);
+            meet_nodes.resize(N);
+        }
+        if (meet_stamp[v] != generation) {
+            meet_stamp[v] = generation;
+            meet_nodes[v] = MeetState{{INF, INF}, {-1, -1}};
+        }
+        return meet_nodes[v];
+    }
+
+    size_t label_capacity() const { return max(1024, N); }
+
+    // A query that grew the label arena far past its usual size gives the
+    // memory back instead of pinning it in the pool.
+    void trim() {
+        if (pool.capacity() > 4 * label_capacity()) {
+            vector<Label>().swap(pool);
+            pool.reserve(label_capacity());
+        }
+        if (open.capacity() > 4 * label_capacity()) vector<PQItem>().swap(open);
+    }
+
+    size_t nbytes() const {
+        return stamp.capacity() * sizeof(uint32_t) + nodes.capacity() * sizeof(NodeState) +
+               front_ids.capacity() * sizeof(int) + pool.capacity() * sizeof(Label) +
+               goals.capacity() * sizeof(int) + open.capacity() * sizeof(PQItem) +
+               (bound_stamp[0].capacity() + bound_stamp[1].capacity() + meet_stamp.capacity()) * sizeof(uint32_t) +
+               (bound_dist[0].capacity() + bound_dist[1].capacity()) * sizeof(double) +
+               (heap[0].capacity() + heap[1].capacity()) * sizeof(DistHeap::value_type) +
+               (keyed_heap[0].capacity() + keyed_heap[1].capacity()) * sizeof(KeyedItem) +
+               meet_nodes.capacity() * sizeof(MeetState) + hierarchy.nbytes();
+    }
+
+    int N;
+    uint32_t generation = 0;
+    long long pooled_bytes = 0;  // nbytes() when it was last returned to the pool
+    vector<uint32_t> stamp;
+    vector<NodeState> nodes;
+    vector<int> front_ids;
+    vector<Label> pool;
+    vector<int> goals;
+    vector<PQItem> open;         // binary heap, as priority_queue keeps it
+    vector<uint32_t> bound_stamp[2];
+    vector<double> bound_dist[2];
+    DistHeap heap[2];
+    KeyedHeap keyed_heap[2];
+    vector<uint32_t> meet_stamp;
+    vector<MeetState> meet_nodes;
+    HierarchySearchSpace hierarchy;
+};
+
+// Holds a pooled workspace for the duration of one query.
+class WorkspaceLease {
+public:
+    explicit WorkspaceLease(const RoutingGraph& graph) : graph(graph), ws(graph.acquire_workspace()) {
+        ws->begin();
+    }
+    ~WorkspaceLease() { graph.release_workspace(std::move(ws)); }
+    WorkspaceLease(const WorkspaceLease&) = delete;
+    WorkspaceLease& operator=(const WorkspaceLease&) = delete;
+    SearchWorkspace& operator*() { return *ws; }
+
+private:
+    const RoutingGraph& graph;
+    unique_ptr<SearchWorkspace> ws;
+};
+
+static inline double elapsed_ms(chrono::steady_clock::time_point since) {
+    return chrono::duration<double, milli>(chrono::steady_clock::now() - since).count();
+}
+
+const double DOMINANCE_EPS = 1e-12;
+
+// Inserts cand (to be stored at pool index cand_id) into a Pareto front of n
+// label ids sorted by time, so darkness strictly falls along it. ids must
+// have room for n + 1 entries. With two objectives the only label that can
+// dominate cand is the last one no slower than it, and the labels cand
+// dominates are a contiguous run from the first one no faster than it; both
+// are found by binary search. Returns the new size, or -1 if cand is weakly
+// dominated (an equal label adds nothing to the front). Evicted labels are
+// marked dead and counted in evicted.
+static int insert_into_front(vector<Label>& pool, int* ids, int n, const Label& cand, int cand_id,
+                             long long& evicted) {
+    int hi = (int)(upper_bound(ids, ids + n, cand.time + DOMINANCE_EPS,
+                               [&pool](double x, int id) { return x < pool[id].time; }) - ids);
+    if (hi > 0 && pool[ids[hi - 1]].dark <= cand.dark + DOMINANCE_EPS) return -1;
+    int lo = (int)(lower_bound(ids, ids + n, cand.time - DOMINANCE_EPS,
+                               [&pool](int id, double x) { return pool[id].time < x; }) - ids);
+    int end = lo;
+    while (end < n && pool[ids[end]].dark >= cand.dark - DOMINANCE_EPS) {
+        pool[ids[end]].alive = false;
+        ++end;
+    }
+    evicted += end - lo;
+    if (end == lo) {
+        move_backward(ids + lo, ids + n, ids + n + 1);
+    } else {
+        move(ids + end, ids + n, ids + lo + 1);
+    }
+    ids[lo] = cand_id;
+    return n - (end - lo) + 1;
 }
 
-vector<int> reconstruct_path(int t, int label_idx, const vector<vector<Label>>& labels) {
+// Labels are appended to a pool and never move, so predecessor links stay valid
+// after a node's Pareto front is pruned.
+vector<int> reconstruct_path(int label_id, const vector<Label>& pool) {
     vector<int> path;
-    int node = t, idx = label_idx;
-    while (node != -1 && idx != -1) {
-        path.push_back(node);
-        const Label& L = labels[node][idx];
-        node = L.prev_node;
-        idx = L.prev_label_idx;
+    for (int id = label_id; id != -1; id = pool[id].prev) {
+        path.push_back(pool[id].node);
     }
     reverse(path.begin(), path.end());
     return path;
@@ -56,308 +225,709 @@ vector<int> reconstruct_path(int t, int label_idx, const vector<vector<Label>>&
 
 // Single-criterion reverse Dijkstra from target t to produce admissible, consistent lower bounds.
 // We traverse the undirected graph "in reverse" by using the same edges.
-template <class WeightFn>
-vector<double> reverse_dijkstra_lb(const vector<vector<Edge>>& g, int t, WeightFn weight) {
-    const double INF = numeric_limits<double>::infinity();
-    int n = (int)g.size();
-    vector<double> dist(n, INF);
-    using P = pair<double,int>;
-    priority_queue<P, vector<P>, greater<P>> pq;
-    dist[t] = 0.0;
-    pq.push({0.0, t});
+// dist(v) reads a distance (INF when unset) and set(v, d) writes one, so the
+// distances can live in a dense array or in a workspace's stamped one.
+template <class BlockedFn, class GetFn, class SetFn>
+void reverse_dijkstra(const int* offsets, const int* targets, const double* weight, int t,
+                      BlockedFn blocked, GetFn dist, SetFn set, DistHeap& pq) {
+    pq.clear();
+    set(t, 0.0);
+    pq.push_back({0.0, t});
 
     while (!pq.empty()) {
-        auto [d, u] = pq.top(); pq.pop();
-        if (d > dist[u] + 1e-12) continue;
-        for (const auto& e : g[u]) {
-            int v = e.to;
-            double w = weight(u, v, e);
-            if (dist[v] > dist[u] + w + 1e-12) {
-                dist[v] = dist[u] + w;
-                pq.push({dist[v], v});
+        pop_heap(pq.begin(), pq.end(), greater<>());
+        auto [d, u] = pq.back(); pq.pop_back();
+        const double du = dist(u);
+        if (d > du + 1e-12) continue;
+        for (int e = offsets[u]; e < offsets[u + 1]; ++e) {
+            int v = targets[e];
+            if (blocked(v)) continue;
+            double w = weight[e];
+            if (dist(v) > du + w + 1e-12) {
+                set(v, du + w);
+                pq.push_back({du + w, v});
+                push_heap(pq.begin(), pq.end(), greater<>());
             }
         }
     }
+}
+
+template <class BlockedFn>
+vector<double> reverse_dijkstra_lb(int n, const int* offsets, const int* targets,
+                                   const double* weight, int t, BlockedFn blocked) {
+    vector<double> dist(n, INF);
+    DistHeap pq;
+    reverse_dijkstra(offsets, targets, weight, t, blocked,
+                     [&dist](int v) { return dist[v]; }, [&dist](int v, double d) { dist[v] = d; }, pq);
     return dist;
 }
 
-// Simple Dijkstra fallback for when A* fails
-vector<int> dijkstra_check(const vector<vector<Edge>>& g, int s, int t, int N) {
-    vector<double> dist(N, 1e9);
-    vector<int> parent(N, -1);
-    vector<bool> visited(N, false);
-    
-    dist[s] = 0.0;
-    
-    for (int iter = 0; iter < N; iter++) {
-        int u = -1;
-        for (int v = 0; v < N; v++) {
-            if (!visited[v] && (u == -1 || dist[v] < dist[u])) {
-                u = v;
+// Fallback for when the label search finds nothing: bidirectional Dijkstra on
+// edge time with binary heaps, stopping once the two frontiers cannot improve
+// on the best meeting point. Returns the fastest allowed s-t path, or an
+// empty path if t is unreachable.
+// Side 0 searches forward from s, side 1 backward from t; both keep their
+// distances and parents in the workspace.
+template <class BlockedFn>
+vector<int> bidirectional_dijkstra(const int* offsets, const int* targets,
+                                   const double* edge_time, int s, int t, BlockedFn blocked, SearchWorkspace& ws) {
+    if (s == t) return {s};
+    DistHeap* heap = ws.heap;
+    heap[0].clear();
+    heap[1].clear();
+    ws.meet(s).dist[0] = 0.0;
+    ws.meet(t).dist[1] = 0.0;
+    heap[0].push_back({0.0, s});
+    heap[1].push_back({0.0, t});
+
+    double best = INF;
+    int meet = -1;
+    auto step = [&](int side) {
+        pop_heap(heap[side].begin(), heap[side].end(), greater<>());
+        auto [d, u] = heap[side].back(); heap[side].pop_back();
+        if (d > ws.meet(u).dist[side]) return;
+        for (int e = offsets[u]; e < offsets[u + 1]; ++e) {
+            int v = targets[e];
+            if (blocked(v)) continue;
+            MeetState& m = ws.meet(v);
+            double nd = d + edge_time[e];
+            if (nd < m.dist[side]) {
+                m.dist[side] = nd;
+                m.parent[side] = u;
+                heap[side].push_back({nd, v});
+                push_heap(heap[side].begin(), heap[side].end(), greater<>());
             }
-        }
-        
-        if (u == -1 || dist[u] == 1e9) break;
-        visited[u] = true;
-        
-        if (u == t) break;
-        
-        for (const auto& e : g[u]) {
-            int v = e.to;
-            double new_dist = dist[u] + e.time_cost;
-            if (new_dist < dist[v]) {
-                dist[v] = new_dist;
-                parent[v] = u;
+            if (m.dist[0] + m.dist[1] < best) {
+                best = m.dist[0] + m.dist[1];
+                meet = v;
             }
         }
+    };
+    while (!heap[0].empty() && !heap[1].empty()) {
+        if (heap[0].front().first + heap[1].front().first >= best) break;
+        step(heap[0].size() <= heap[1].size() ? 0 : 1);
     }
-    
-    // Reconstruct path
+
     vector<int> path;
-    if (dist[t] < 1e9) {
-        int current = t;
-        while (current != -1) {
-            path.push_back(current);
-            current = parent[current];
-        }
-        reverse(path.begin(), path.end());
-    }
-    
+    if (meet < 0) return path;
+    for (int v = meet; v != -1; v = ws.meet(v).parent[0]) path.push_back(v);
+    reverse(path.begin(), path.end());
+    for (int v = ws.meet(meet).parent[1]; v != -1; v = ws.meet(v).parent[1]) path.push_back(v);
     return path;
 }
 
-vector<Path> solve(int N, int M, const vector<double>& light, const vector<int>& crime,
-           const vector<vector<int>>& input, int s, int t) {
-    set<int> bad_nodes;
-    for(int i = 0; i < N; i++) {
-        if(crime[i] == 1) bad_nodes.insert(i);
-    }
-    vector<vector<Edge>> g(N);
-    g.reserve(N);
-    for (const auto& e : input) {
-        int u = e[0], v = e[1];
-        double tcost = e[2];
-        if(bad_nodes.find(u) != bad_nodes.end() || bad_nodes.find(v) != bad_nodes.end()) continue;
-        g[u].push_back({v, tcost});
-        g[v].push_back({u, tcost});
+static int default_max_workspaces() {
+    return max(1, (int)thread::hardware_concurrency());
+}
+
+template <class LengthT>
+RoutingGraph::RoutingGraph(int N, const double* light_in, const uint8_t* crime_in,
+                           int M, const int* edge_u, const int* edge_v, const LengthT* edge_len)
+    : N(N), M(M), owned_light(light_in, light_in + N), owned_crime(crime_in, crime_in + N),
+      owned_offsets(N + 1, 0), owned_targets(2 * (size_t)M),
+      owned_edge_time(2 * (size_t)M), owned_edge_dark(2 * (size_t)M) {
+    Lmax = compute_lmax(light_in, N);
+
+    for (int i = 0; i < M; ++i) {
+        if (edge_u[i] < 0 || edge_u[i] >= N || edge_v[i] < 0 || edge_v[i] >= N) {
+            throw out_of_range("edge endpoint out of range");
+        }
+        owned_offsets[edge_u[i] + 1]++;
+        owned_offsets[edge_v[i] + 1]++;
     }
-    auto is_forbidden = [&](int node) {
-        if (node == s || node == t) return false;
-        return crime[node] == 1;
+    for (int i = 0; i < N; ++i) owned_offsets[i + 1] += owned_offsets[i];
+
+    vector<int> fill(owned_offsets.begin(), owned_offsets.end() - 1);
+    auto add = [&](int u, int v, double tcost) {
+        int e = fill[u]++;
+        owned_targets[e] = v;
+        owned_edge_time[e] = tcost;
+        double avg_light = 0.5 * (light_in[u] + light_in[v]);
+        owned_edge_dark[e] = max(0.0, Lmax - avg_light);
     };
-    cout << "Start LB" << endl;
-    // TODO: consider changing darkness definition
+    for (int i = 0; i < M; ++i) {
+        add(edge_u[i], edge_v[i], edge_len[i]);
+        add(edge_v[i], edge_u[i], edge_len[i]);
+    }
+
+    light = owned_light.data();
+    crime = owned_crime.data();
+    offsets = owned_offsets.data();
+    targets = owned_targets.data();
+    edge_time = owned_edge_time.data();
+    edge_dark = owned_edge_dark.data();
+    workspace_counts.max_idle = default_max_workspaces();
+}
+
+template RoutingGraph::RoutingGraph(int, const double*, const uint8_t*, int, const int*, const int*, const double*);
+template RoutingGraph::RoutingGraph(int, const double*, const uint8_t*, int, const int*, const int*, const float*);
+
+RoutingGraph::RoutingGraph(int N, int M, const double* light, const uint8_t* crime,
+                           const int* offsets, const int* targets,
+                           const double* edge_time, const double* edge_dark, double lmax)
+    : N(N), M(M), light(light), crime(crime), offsets(offsets), targets(targets),
+      edge_time(edge_time), edge_dark(edge_dark) {
+    if (offsets[0] != 0 || offsets[N] != 2 * M) {
+        throw invalid_argument("CSR offsets do not match the edge count");
+    }
+    Lmax = lmax > 0.0 ? lmax : compute_lmax(light, N);
+    workspace_counts.max_idle = default_max_workspaces();
+}
+
+RoutingGraph::~RoutingGraph() = default;
+
+unique_ptr<SearchWorkspace> RoutingGraph::acquire_workspace() const {
+    {
+        lock_guard<mutex> lock(workspace_mutex);
+        WorkspaceStats& counts = workspace_counts;
+        counts.acquired++;
+        counts.in_use++;
+        counts.peak_in_use = max(counts.peak_in_use, counts.in_use);
+        if (!idle_workspaces.empty()) {
+            unique_ptr<SearchWorkspace> ws = std::move(idle_workspaces.back());
+            idle_workspaces.pop_back();
+            counts.idle_bytes -= ws->pooled_bytes;
+            return ws;
+        }
+        counts.created++;
+    }
+    return make_unique<SearchWorkspace>(N);
+}
+
+void RoutingGraph::release_workspace(unique_ptr<SearchWorkspace> ws) const {
+    ws->trim();
+    ws->pooled_bytes = (long long)ws->nbytes();
+    lock_guard<mutex> lock(workspace_mutex);
+    workspace_counts.in_use--;
+    if ((int)idle_workspaces.size() < workspace_counts.max_idle) {
+        workspace_counts.idle_bytes += ws->pooled_bytes;
+        idle_workspaces.push_back(std::move(ws));
+    } else {
+        workspace_counts.discarded++;
+    }
+}
+
+void RoutingGraph::set_max_workspaces(int max_idle) {
+    lock_guard<mutex> lock(workspace_mutex);
+    workspace_counts.max_idle = max(0, max_idle);
+    while ((int)idle_workspaces.size() > workspace_counts.max_idle) {
+        workspace_counts.idle_bytes -= idle_workspaces.back()->pooled_bytes;
+        idle_workspaces.pop_back();
+    }
+}
+
+WorkspaceStats RoutingGraph::workspace_stats() const {
+    lock_guard<mutex> lock(workspace_mutex);
+    WorkspaceStats out = workspace_counts;
+    out.idle = (int)idle_workspaces.size();
+    return out;
+}
+
+double RoutingGraph::compute_lmax(const double* light, int N) {
     double Lmax = 0.0;
-    for (double L : light) Lmax = max(Lmax, L);
+    for (int i = 0; i < N; ++i) Lmax = max(Lmax, light[i]);
     if (Lmax <= 0.0) Lmax = 1.0;
+    return Lmax;
+}
 
-    auto lb_time = reverse_dijkstra_lb(g, t,
-        [&](int u, int v, const Edge& e) {
-            (void)u; (void)v;
-            return e.time_cost;
-        });
-
-    auto lb_dark = reverse_dijkstra_lb(g, t,
-        [&](int u, int v, const Edge& e) {
-            double avg_light = 0.5 * (light[u] + light[v]);
-            double edge_dark = max(0.0, Lmax - avg_light);
-            return edge_dark;
-        });
+TargetBounds RoutingGraph::target_bounds(int t, const uint8_t* corridor,
+                                        const int* sources, int num_sources) const {
+    if (t < 0 || t >= N) {
+        throw out_of_range("target node out of range");
+    }
+    // Same blocking rule as the search, with every source exempt. Searching a
+    // superset of each query's graph keeps the bounds admissible for all of them.
+    vector<uint8_t> passable(N);
     for (int i = 0; i < N; ++i) {
-        if (!isfinite(lb_time[i])) lb_time[i] = 0.0;
-        if (!isfinite(lb_dark[i])) lb_dark[i] = 0.0;
-    }
-    cout << "LB done" << endl;
-    vector<vector<Label>> labels(N);
-    priority_queue<PQItem> open;
-    labels[s].push_back(Label{0.0, max(0.0, Lmax - light[s]), s, -1, -1});
-    int seed_idx = (int)labels[s].size() - 1;
-    open.push(PQItem{
-        labels[s][seed_idx].time + lb_time[s],
-        labels[s][seed_idx].dark + lb_dark[s],
-        s, seed_idx
-    });
+        passable[i] = crime[i] == 0 && (corridor == nullptr || corridor[i] != 0);
+    }
+    passable[t] = 1;
+    for (int k = 0; k < num_sources; ++k) {
+        if (sources[k] < 0 || sources[k] >= N) {
+            throw out_of_range("start node out of range");
+        }
+        passable[sources[k]] = 1;
+    }
+    auto is_blocked = [&](int node) { return passable[node] == 0; };
+
+    TargetBounds bounds;
+    bounds.target = t;
+    auto start = chrono::steady_clock::now();
+    bounds.time = reverse_dijkstra_lb(N, offsets, targets, edge_time, t, is_blocked);
+    bounds.time_ms = elapsed_ms(start);
+    start = chrono::steady_clock::now();
+    bounds.dark = reverse_dijkstra_lb(N, offsets, targets, edge_dark, t, is_blocked);
+    bounds.dark_ms = elapsed_ms(start);
+    for (int i = 0; i < N; ++i) {
+        if (!isfinite(bounds.time[i])) bounds.time[i] = 0.0;
+        if (!isfinite(bounds.dark[i])) bounds.dark[i] = 0.0;
+    }
+    return bounds;
+}
+
+void RoutingGraph::set_landmarks(int num_landmarks, const double* time_table, const double* dark_table) {
+    if (num_landmarks < 0 || (num_landmarks > 0 && (time_table == nullptr || dark_table == nullptr))) {
+        throw invalid_argument("landmark tables are missing");
+    }
+    K = num_landmarks;
+    landmark_time = time_table;
+    landmark_dark = dark_table;
+}
+
+vector<double> RoutingGraph::distances_from(int source, bool darkness) const {
+    if (source < 0 || source >= N) {
+        throw out_of_range("source node out of range");
+    }
+    return reverse_dijkstra_lb(N, offsets, targets, darkness ? edge_dark : edge_time, source,
+                               [](int) { return false; });
+}
+
+// Triangle inequality over the landmarks: |d(L, t) - d(L, v)| <= d(v, t) for
+// every landmark L on the undirected graph. Distances ignore crime flags and
+// corridors, and blocking nodes only lengthens paths, so the bound stays
+// admissible (and consistent) for restricted searches.
+static inline double landmark_bound(const double* table, int K, int v, int t) {
+    const double* dv = table + (size_t)v * K;
+    const double* dt = table + (size_t)t * K;
+    double h = 0.0;
+    for (int k = 0; k < K; ++k) {
+        // Nodes in another component than the landmark carry no information.
+        if (isfinite(dv[k]) && isfinite(dt[k])) h = max(h, fabs(dt[k] - dv[k]));
+    }
+    return h;
+}
+
+// Exact distance to t in one metric, settled on demand: a reverse A* from t
+// over the query's graph, guided towards s by the landmark bound to s, that
+// runs only until the asked-for node is final. The potential is consistent,
+// so a node whose key is no larger than the smallest open key has its exact
+// distance. Settling s first covers the nodes near the s-t shortest path,
+// where the label search spends its time; the rest of the corridor is
+// searched only if the label search gets there. Distances live in the
+// workspace's reverse-search arrays (k 0 time, 1 darkness) and heap k.
+template <class BlockedFn>
+class LazyReverseSearch {
+public:
+    LazyReverseSearch(const int* offsets, const int* targets, const double* weight, const double* table,
+                      int K, int s, int t, int k, BlockedFn blocked, SearchWorkspace& ws)
+        : offsets(offsets), targets(targets), weight(weight), table(table), K(K), s(s), k(k),
+          blocked(blocked), ws(ws) {
+        ws.keyed_heap[k].clear();
+        ws.set_bound(k, t, 0.0);
+        ws.keyed_heap[k].push_back({potential(t), 0.0, t});
+    }
+
+    // v's distance to t, 0 if t is unreachable from it (like target_bounds()).
+    double distance(int v) {
+        KeyedHeap& pq = ws.keyed_heap[k];
+        double dv = ws.bound(k, v);
+        const double pv = potential(v);
+        while (!pq.empty() && !(dv + pv <= pq.front().key)) {
+            pop_heap(pq.begin(), pq.end(), greater<>());
+            const KeyedItem top = pq.back(); pq.pop_back();
+            const int u = top.node;
+            const double du = top.dist;
+            if (du > ws.bound(k, u) + 1e-12) continue;
+            for (int e = offsets[u]; e < offsets[u + 1]; ++e) {
+                int w = targets[e];
+                if (blocked(w)) continue;
+                double dw = du + weight[e];
+                if (ws.bound(k, w) > dw + 1e-12) {
+                    ws.set_bound(k, w, dw);
+                    pq.push_back({dw + potential(w), dw, w});
+                    push_heap(pq.begin(), pq.end(), greater<>());
+                }
+            }
+            dv = ws.bound(k, v);
+        }
+        return isfinite(dv) ? dv : 0.0;
+    }
+
+private:
+    double potential(int v) const { return landmark_bound(table, K, v, s); }
+
+    const int* offsets;
+    const int* targets;
+    const double* weight;
+    const double* table;
+    int K, s, k;
+    BlockedFn blocked;
+    SearchWorkspace& ws;
+};
+
+ContractionHierarchy RoutingGraph::build_hierarchy() const {
+    return build_contraction_hierarchy(N, offsets, targets, edge_time, crime);
+}
+
+void RoutingGraph::set_hierarchy(const int* rank, const int* ch_offsets, const int* ch_targets,
+                                 const double* ch_weights, const int* ch_middle) {
+    if (ch_offsets == nullptr) {
+        hierarchy = HierarchyView();
+        return;
+    }
+    hierarchy = HierarchyView{N, rank, ch_offsets, ch_targets, ch_weights, ch_middle};
+}
+
+// Sums time and darkness along a node path, taking the quickest edge between
+// consecutive nodes. Darkness starts at the first node's own, like a label's.
+void RoutingGraph::path_cost(const vector<int>& path, double& time, double& dark) const {
+    time = 0.0;
+    dark = path.empty() ? 0.0 : max(0.0, Lmax - light[path[0]]);
+    for (size_t i = 0; i + 1 < path.size(); i++) {
+        int u = path[i], v = path[i + 1];
+        int best = -1;
+        for (int e = offsets[u]; e < offsets[u + 1]; ++e) {
+            if (targets[e] == v && (best < 0 || edge_time[e] < edge_time[best])) best = e;
+        }
+        if (best >= 0) {
+            time += edge_time[best];
+            dark += edge_dark[best];
+        }
+    }
+}
 
-    /* Termination check (not used)
+bool RoutingGraph::fastest_path(int s, int t, Path& out) const {
+    if (!has_hierarchy()) return false;
+    WorkspaceLease lease(*this);
+    return fastest_path(s, t, out, *lease);
+}
 
-    auto can_terminate = [&](const PQItem& top, const vector<Label>& goals) -> bool {
-        if (goals.empty()) return false;
-        // If best OPEN f >= every goal's g (lexicographically), no unseen label can beat goal set.
-        for (const auto& gl : goals) {
-            if (top.f_time + 1e-12 < gl.time || (fabs(top.f_time - gl.time) <= 1e-12 && top.f_dark + 1e-12 < gl.dark)) {
-                // top.f strictly better than at least one goal.g lexicographically → cannot stop
-                return false;
+bool RoutingGraph::fastest_path(int s, int t, Path& out, SearchWorkspace& ws) const {
+    if (!has_hierarchy()) return false;
+    if (s < 0 || s >= N || t < 0 || t >= N) {
+        throw out_of_range("start or target node out of range");
+    }
+    vector<int> path;
+    if (s == t) {
+        path.push_back(s);
+    } else {
+        // Crime-flagged endpoints are not in the hierarchy; enter it through
+        // their safe neighbors instead.
+        auto entry_points = [&](int v) {
+            vector<pair<int, double>> seeds;
+            if (!crime[v]) {
+                seeds.push_back({v, 0.0});
+                return seeds;
+            }
+            for (int e = offsets[v]; e < offsets[v + 1]; ++e) {
+                if (!crime[targets[e]]) seeds.push_back({targets[e], edge_time[e]});
+            }
+            return seeds;
+        };
+        double cost = hierarchy_shortest_path(hierarchy, entry_points(s), entry_points(t), path, ws.hierarchy);
+        for (int e = offsets[s]; e < offsets[s + 1]; ++e) {
+            if (targets[e] == t && edge_time[e] <= cost) {
+                cost = edge_time[e];
+                path = {s, t};
             }
         }
-        return true;
+        if (!isfinite(cost)) return false;
+        if (path.front() != s) path.insert(path.begin(), s);
+        if (path.back() != t) path.push_back(t);
+    }
+    out.name = "fastest";
+    out.idx = 0;
+    out.path = path;
+    path_cost(out.path, out.time, out.dark);
+    return true;
+}
+
+// The hierarchy's route is the corridor's fastest too if it never leaves it.
+bool RoutingGraph::corridor_fastest(int s, int t, const uint8_t* corridor, Path& out, SolverStats& stats,
+                                    SearchWorkspace& ws) const {
+    if (!has_hierarchy()) return false;
+    auto start = chrono::steady_clock::now();
+    bool found = fastest_path(s, t, out, ws);
+    stats.hierarchy_ms = elapsed_ms(start);
+    if (!found) return false;
+    if (corridor == nullptr) return true;
+    for (int v : out.path) {
+        if (v != s && v != t && corridor[v] == 0) return false;
+    }
+    return true;
+}
+
+// A search cut short by its budget or the iteration limit only returns the
+// best found so far.
+static vector<Path> mark_approximate(vector<Path> picks, const SolverStats& stats) {
+    if (stats.deadline || stats.iteration_limit) {
+        for (Path& p : picks) p.approximate = true;
+    }
+    return picks;
+}
+
+RoutingGraph::Deadline RoutingGraph::deadline_after(double budget_ms) {
+    if (!(budget_ms > 0.0)) return Deadline::max();
+    return chrono::steady_clock::now() +
+           chrono::duration_cast<chrono::steady_clock::duration>(chrono::duration<double, milli>(budget_ms));
+}
+
+vector<Path> RoutingGraph::query(int s, int t, const uint8_t* corridor, SolverStats* stats,
+                                 double budget_ms) const {
+    if (s < 0 || s >= N || t < 0 || t >= N) {
+        throw out_of_range("start or target node out of range");
+    }
+    // The bounds below count against the budget too.
+    const Deadline deadline = deadline_after(budget_ms);
+    SolverStats local;
+    SolverStats& st = stats != nullptr ? *stats : local;
+    WorkspaceLease lease(*this);
+    SearchWorkspace& ws = *lease;
+    auto blocked = [&](int v) {
+        return v != s && v != t && (crime[v] != 0 || (corridor != nullptr && corridor[v] == 0));
     };
-    
-    */
-    vector<double> curr_fastest(N, 1e9);
-    vector<bool> closed(N, false);  // Track closed nodes for faster pruning
+    ws.reserve_bounds();
+    if (K > 0) {
+        // The same exact bounds as the reverse searches below, but each node's
+        // only computed once the label search asks for it; the landmarks just
+        // steer the reverse searches. Their time is part of search_ms.
+        LazyReverseSearch<decltype(blocked)> exact_time(offsets, targets, edge_time, landmark_time, K,
+                                                        s, t, 0, blocked, ws);
+        LazyReverseSearch<decltype(blocked)> exact_dark(offsets, targets, edge_dark, landmark_dark, K,
+                                                        s, t, 1, blocked, ws);
+        Path fastest;
+        bool have_fastest = corridor_fastest(s, t, corridor, fastest, st, ws);
+        // Memoized: the cardinality cap rescores front labels many times per expansion.
+        return mark_approximate(search(s, t, corridor, [&](int v) {
+            LowerBound& h = ws.node(v).bound;
+            if (h.time < 0.0) h = LowerBound{exact_time.distance(v), exact_dark.distance(v)};
+            return h;
+        }, have_fastest ? &fastest : nullptr, st, deadline, ws), st);
+    }
+    // Reverse searches over the corridor, as target_bounds() runs them for
+    // source s alone, but into the workspace: nodes they never reach read
+    // INF and get a zero bound.
+    const double* weights[2] = {edge_time, edge_dark};
+    double* bound_ms[2] = {&st.bound_time_ms, &st.bound_dark_ms};
+    for (int k = 0; k < 2; ++k) {
+        const auto start = chrono::steady_clock::now();
+        reverse_dijkstra(offsets, targets, weights[k], t, blocked,
+                         [&ws, k](int v) { return ws.bound(k, v); },
+                         [&ws, k](int v, double d) { ws.set_bound(k, v, d); }, ws.heap[0]);
+        *bound_ms[k] = elapsed_ms(start);
+    }
+    Path fastest;
+    bool have_fastest = corridor_fastest(s, t, corridor, fastest, st, ws);
+    return mark_approximate(search(s, t, corridor, [&ws](int v) {
+        const double time = ws.bound(0, v), dark = ws.bound(1, v);
+        return LowerBound{isfinite(time) ? time : 0.0, isfinite(dark) ? dark : 0.0};
+    }, have_fastest ? &fastest : nullptr, st, deadline, ws), st);
+}
+
+vector<Path> RoutingGraph::query(int s, int t, const uint8_t* corridor, const TargetBounds& bounds,
+                                 SolverStats* stats, double budget_ms) const {
+    if (s < 0 || s >= N || t < 0 || t >= N) {
+        throw out_of_range("start or target node out of range");
+    }
+    if (bounds.target != t || (int)bounds.time.size() != N || (int)bounds.dark.size() != N) {
+        throw invalid_argument("lower bounds were computed for a different target");
+    }
+    const Deadline deadline = deadline_after(budget_ms);
+    SolverStats local;
+    SolverStats& st = stats != nullptr ? *stats : local;
+    st.bound_time_ms = bounds.time_ms;
+    st.bound_dark_ms = bounds.dark_ms;
+    WorkspaceLease lease(*this);
+    Path fastest;
+    bool have_fastest = corridor_fastest(s, t, corridor, fastest, st, *lease);
+    return mark_approximate(search(s, t, corridor, [&bounds](int v) {
+        return LowerBound{bounds.time[v], bounds.dark[v]};
+    }, have_fastest ? &fastest : nullptr, st, deadline, *lease), st);
+}
+
+// known_fastest: the exact fastest route within the corridor, if already
+// known. It is returned as the fastest pick and bounds the search from the start.
+template <class BoundFn>
+vector<Path> RoutingGraph::search(int s, int t, const uint8_t* corridor, BoundFn lb, const Path* known_fastest,
+                                  SolverStats& stats, Deadline deadline, SearchWorkspace& ws) const {
+    const auto search_start = chrono::steady_clock::now();
+    auto is_forbidden = [&](int node) {
+        if (node == s || node == t) return false;
+        return crime[node] != 0 || (corridor != nullptr && corridor[node] == 0);
+    };
+    // Labels are appended to the workspace's arena and never move between
+    // indices. Capped fronts live in fixed SLOTS-sized slots of one flat
+    // array, valid up to the node's front_size; only the target's can grow.
+    vector<Label>& pool = ws.pool;
+    int* front_ids = ws.front_ids.data();
+    vector<int>& goals = ws.goals;
+    vector<PQItem>& open = ws.open;
+    pool.push_back(Label{0.0, max(0.0, Lmax - light[s]), s, -1, true});
+    if (s == t) {
+        goals.push_back(0);
+    } else {
+        front_ids[(size_t)s * SLOTS] = 0;
+        ws.node(s).front_size = 1;
+    }
+    const LowerBound lb_s = lb(s);
+    open.push_back(PQItem{
+        pool[0].time + lb_s.time,
+        pool[0].dark + lb_s.dark,
+        s, 0
+    });
+
+    // Reference scales for the balanced score, taken from this query's bounds.
+    const double T_ref = max(1e-9, lb_s.time);
+    const double D_ref = max(1e-9, lb_s.dark);
+    auto norm_score = [&](const Label& L){
+        const LowerBound h = lb(L.node);
+        double fT = L.time + h.time;
+        double fD = L.dark + h.dark;
+        double nT = fT / T_ref;
+        double nD = fD / D_ref;
+        return hypot(nT, nD); 
+    };
+
     int iterations = 0;
     const int MAX_ITERATIONS = 1000000;  // Safety limit
     
+    const bool has_deadline = deadline != Deadline::max();
+    
     // OPTIMIZED NAMOA*
     while (!open.empty() && iterations < MAX_ITERATIONS) {
+        // Reading the clock every iteration would cost more than the check saves.
+        if (has_deadline && (iterations & 255) == 0 && chrono::steady_clock::now() >= deadline) {
+            stats.deadline = true;
+            break;
+        }
         iterations++;
-        auto cur = open.top(); open.pop();
+        pop_heap(open.begin(), open.end());
+        auto cur = open.back(); open.pop_back();
 
         // Early termination checks
-        if (cur.label_idx >= (int)labels[cur.node].size()) continue;
+        if (!pool[cur.label_id].alive) continue;
         if (cur.node == t) {
             // Found target - check if we have enough solutions
-            if (labels[t].size() >= 3) break;  // Stop after finding 3 solutions
+            if (goals.size() >= 3) break;  // Stop after finding 3 solutions
             continue;
         }
         
-        const Label& Lcur = labels[cur.node][cur.label_idx];
+        // Copy: the pool may grow (and reallocate) while expanding this label.
+        const Label Lcur = pool[cur.label_id];
         int u = cur.node;
         
         // Skip if this node is closed and we have a better solution
-        if (closed[u] && Lcur.time > curr_fastest[u] * 1.2) continue;
+        NodeState& nu = ws.node(u);
+        if (nu.closed && Lcur.time > nu.fastest * 1.2) continue;
         
         // Aggressive early termination if solution is much worse than best
-        if (!labels[t].empty()) {
-            double best_target_time = 1e9;
-            for (const auto& tl : labels[t]) {
-                best_target_time = min(best_target_time, tl.time);
-            }
+        if (!goals.empty() || known_fastest != nullptr) {
+            double best_target_time = known_fastest != nullptr ? known_fastest->time : 1e9;
+            if (!goals.empty()) best_target_time = min(best_target_time, pool[goals.front()].time);
             if (cur.f_time > best_target_time * 1.5) continue;  // Skip if 50% worse
         }
         
-        for (const auto& e : g[u]) {
-            int v = e.to;
+        for (int e = offsets[u]; e < offsets[u + 1]; ++e) {
+            int v = targets[e];
             if (is_forbidden(v)) continue;
 
-            double avg_light = 0.5 * (light[u] + light[v]);
-            double edge_dark = max(0.0, Lmax - avg_light);
-
             Label cand;
-            cand.time = Lcur.time + e.time_cost;
-            cand.dark = Lcur.dark + edge_dark;
+            cand.time = Lcur.time + edge_time[e];
+            cand.dark = Lcur.dark + edge_dark[e];
             cand.node = v;
-            cand.prev_node = u;
-            cand.prev_label_idx = cur.label_idx;
-            if(cand.time > 200 + curr_fastest[v]) continue;
-            // Check if bad
-            bool dominated_by_existing = false;
-            for (const auto& ex : labels[v]) {
-                if (dominates(ex, cand)) { 
-                    dominated_by_existing = true; 
-                    break; 
-                }
+            cand.prev = cur.label_id;
+            NodeState& nv = ws.node(v);
+            if(cand.time > 200 + nv.fastest) continue;
+            int cand_id = (int)pool.size();
+            int* front;
+            int size;
+            if (v == t) {
+                goals.push_back(-1);
+                front = goals.data();
+                size = insert_into_front(pool, front, (int)goals.size() - 1, cand, cand_id, stats.labels_dominated);
+                goals.resize(size < 0 ? goals.size() - 1 : size);
+            } else {
+                front = &front_ids[(size_t)v * SLOTS];
+                size = insert_into_front(pool, front, nv.front_size, cand, cand_id, stats.labels_dominated);
             }
-            if (dominated_by_existing) continue;
-
-            labels[v].push_back(cand);
-            int new_idx = (int)labels[v].size() - 1;
-            int write_pos = 0;
-            for (int read_pos = 0; read_pos < (int)labels[v].size(); ++read_pos) {
-                if (read_pos == new_idx) {
-                    labels[v][write_pos++] = labels[v][read_pos];
-                    continue;
-                }
-                if (!dominates(cand, labels[v][read_pos])) {
-                    labels[v][write_pos++] = labels[v][read_pos];
-                }
+            if (size < 0) {
+                stats.labels_dominated++;
+                continue;
             }
-            labels[v].resize(write_pos);
-
-            // Cardinality Pruning (at most K)
-            auto norm_score = [&](const Label& L, int node){
-                static const double T_ref = max(1e-9, lb_time[s]);
-                static const double D_ref = max(1e-9, lb_dark[s]); 
-                double fT = L.time + lb_time[node];
-                double fD = L.dark + lb_dark[node];
-                double nT = fT / T_ref;
-                double nD = fD / D_ref;
-                return hypot(nT, nD); 
-            };
-            const int K = 3;
-            if (v != t && (int)labels[v].size() > K) {
-                int best_time = 0, best_dark = 0, best_bal = 0;
-                for (int i = 0; i < (int)labels[v].size(); ++i) {
-                    if (labels[v][i].time < labels[v][best_time].time) best_time = i;
-                    if (labels[v][i].dark < labels[v][best_dark].dark) best_dark = i;
-                    if (norm_score(labels[v][i], v) < norm_score(labels[v][best_bal], v)) best_bal = i;
+            pool.push_back(cand);
+
+            // Cardinality pruning: keep the fastest (first), the best lit (last)
+            // and the best balanced label.
+            if (v != t && size > FRONT_CAP) {
+                int best_bal = 0;
+                double best_score = norm_score(pool[front[0]]);
+                for (int i = 1; i < size; ++i) {
+                    double score = norm_score(pool[front[i]]);
+                    if (score < best_score) { best_score = score; best_bal = i; }
                 }
-                vector<Label> capped;
-                capped.push_back(labels[v][best_time]);
-                if (best_dark != best_time) capped.push_back(labels[v][best_dark]);
-                if (best_bal != best_time && best_bal != best_dark) capped.push_back(labels[v][best_bal]);
-                labels[v].swap(capped);
-            }
-            int cand_idx = -1;
-            for (int i = 0; i < (int)labels[v].size(); ++i) {
-                const Label& L = labels[v][i];
-                if (L.prev_node == u && L.prev_label_idx == cur.label_idx &&
-                    fabs(L.time - cand.time) <= 1e-12 && fabs(L.dark - cand.dark) <= 1e-12) {
-                    cand_idx = i; break;
+                int kept = 0;
+                for (int i = 0; i < size; ++i) {
+                    if (i == 0 || i == size - 1 || i == best_bal) {
+                        front[kept++] = front[i];
+                    } else {
+                        pool[front[i]].alive = false;
+                    }
                 }
+                stats.labels_capped += size - kept;
+                size = kept;
             }
-            if (cand_idx == -1) continue;
+            if (v != t) nv.front_size = (uint8_t)size;
+            if (!pool[cand_id].alive) continue;
             // f = g + h
-            double fT = labels[v][cand_idx].time + lb_time[v];
-            double fD = labels[v][cand_idx].dark + lb_dark[v];
+            const LowerBound h = lb(v);
+            double fT = cand.time + h.time;
+            double fD = cand.dark + h.dark;
             if(v != t) {
-                open.push(PQItem{fT, fD, v, cand_idx});
+                open.push_back(PQItem{fT, fD, v, cand_id});
+                push_heap(open.begin(), open.end());
+                stats.peak_open = max(stats.peak_open, (long long)open.size());
             }
             else {
                 break;
             }
-            curr_fastest[v] = min(curr_fastest[v], labels[v][cand_idx].time);
+            nv.fastest = min(nv.fastest, cand.time);
         }
-        closed[u] = true;
+        nu.closed = true;
     }
 
-    cout << "Algorithm completed after " << iterations << " iterations" << endl;
+    stats.iterations = iterations;
+    stats.iteration_limit = iterations >= MAX_ITERATIONS && !open.empty();
+    // Every pool entry but the start label was a candidate that got in.
+    stats.labels_created = (long long)pool.size() - 1;
+    stats.search_ms = elapsed_ms(search_start);
     vector<Path> picks;
-    if (labels[t].empty()) {
-        vector<int> check = dijkstra_check(g, s, t, N);
+    if (goals.empty()) {
+        stats.fallback = true;
+        const auto fallback_start = chrono::steady_clock::now();
+        vector<int> check = known_fastest != nullptr
+            ? known_fastest->path
+            : bidirectional_dijkstra(offsets, targets, edge_time, s, t, is_forbidden, ws);
+        stats.fallback_ms = elapsed_ms(fallback_start);
         if (!check.empty()) {
             double total_time = 0.0, total_dark = 0.0;
-            for (size_t i = 0; i < check.size() - 1; i++) {
-                int u = check[i], v = check[i + 1];
-                for (const auto& e : g[u]) {
-                    if (e.to == v) {
-                        total_time += e.time_cost;
-                        break;
-                    }
-                }
-                double avg_light = 0.5 * (light[u] + light[v]);
-                total_dark += max(0.0, Lmax - avg_light);
-            }
-            picks.push_back({"fastest", 0, check, total_time, total_dark});
-            picks.push_back({"best_lit", 0, check, total_time, total_dark});
-            picks.push_back({"balanced", 0, check, total_time, total_dark});
-        } 
-        else {
-            vector<int> t_path = {s, t};  
-            double t_time = 1000.0;  
-            double t_dark = 500.0; 
-            picks.push_back({"fastest", 0, t_path, t_time, t_dark});
-            picks.push_back({"best_lit", 0, t_path, t_time, t_dark});
-            picks.push_back({"balanced", 0, t_path, t_time, t_dark});
+            path_cost(check, total_time, total_dark);
+            picks.push_back({"fastest", 0, check, total_time, total_dark, true});
+            picks.push_back({"best_lit", 0, check, total_time, total_dark, true});
+            picks.push_back({"balanced", 0, check, total_time, total_dark, true});
         }
-        
+        // No picks: t cannot be reached from s without forbidden nodes.
         return picks;
     }
     int idx_fast = 0;
-    for (int i = 1; i < (int)labels[t].size(); ++i)
-        if (labels[t][i].time < labels[t][idx_fast].time) idx_fast = i;
-    picks.push_back({"fastest", idx_fast, reconstruct_path(t, idx_fast, labels),
-                     labels[t][idx_fast].time, labels[t][idx_fast].dark});
+    for (int i = 1; i < (int)goals.size(); ++i)
+        if (pool[goals[i]].time < pool[goals[idx_fast]].time) idx_fast = i;
+    if (known_fastest != nullptr && known_fastest->time <= pool[goals[idx_fast]].time) {
+        picks.push_back(*known_fastest);
+    } else {
+        picks.push_back({"fastest", idx_fast, reconstruct_path(goals[idx_fast], pool),
+                         pool[goals[idx_fast]].time, pool[goals[idx_fast]].dark});
+    }
 
     int idx_bright = 0;
-    for (int i = 1; i < (int)labels[t].size(); ++i)
-        if (labels[t][i].dark < labels[t][idx_bright].dark) idx_bright = i;
-    picks.push_back({"best_lit", idx_bright, reconstruct_path(t, idx_bright, labels),
-                     labels[t][idx_bright].time, labels[t][idx_bright].dark});
+    for (int i = 1; i < (int)goals.size(); ++i)
+        if (pool[goals[i]].dark < pool[goals[idx_bright]].dark) idx_bright = i;
+    picks.push_back({"best_lit", idx_bright, reconstruct_path(goals[idx_bright], pool),
+                     pool[goals[idx_bright]].time, pool[goals[idx_bright]].dark});
 
     double tmin = numeric_limits<double>::infinity(), tmax = -numeric_limits<double>::infinity();
     double dmin = numeric_limits<double>::infinity(), dmax = -numeric_limits<double>::infinity();
-    for (const auto& L : labels[t]) {
+    for (int id : goals) {
+        const Label& L = pool[id];
         tmin = min(tmin, L.time); tmax = max(tmax, L.time);
         dmin = min(dmin, L.dark); dmax = max(dmax, L.dark);
     }
@@ -366,65 +936,40 @@ vector<Path> solve(int N, int M, const vector<double>& light, const vector<int>&
         return (x - a) / (b - a);
     };
     int idx_bal = 0; double best_score = numeric_limits<double>::infinity();
-    for (int i = 0; i < (int)labels[t].size(); ++i) {
-        double nt = norm(labels[t][i].time, tmin, tmax);
-        double nd = norm(labels[t][i].dark, dmin, dmax);
+    for (int i = 0; i < (int)goals.size(); ++i) {
+        double nt = norm(pool[goals[i]].time, tmin, tmax);
+        double nd = norm(pool[goals[i]].dark, dmin, dmax);
         double score = hypot(nt, nd);
         if (score < best_score) { best_score = score; idx_bal = i; }
     }
-    picks.push_back({"balanced", idx_bal, reconstruct_path(t, idx_bal, labels),
-                     labels[t][idx_bal].time, labels[t][idx_bal].dark});
-    
-    /* Standard Output 
-
-    auto print_pick = [&](const Path& p) {
-        cout << "=== " << p.name << " ===\n";
-        cout << fixed << setprecision(3)
-             << "time=" << p.time << "  darkness=" << p.dark << "\n";
-        cout << "path_len=" << p.path.size() << "\n";
-        for (size_t i = 0; i < p.path.size(); ++i) {
-            if (i) cout << ' ';
-            cout << p.path[i];
-        }
-        cout << "\n";
-    };
-
-    for (string name : {"fastest", "best_lit", "balanced"}) {
-        for (const auto& p : picks) if (p.name == name) { print_pick(p); break; }
-    }
-    
-    */
+    picks.push_back({"balanced", idx_bal, reconstruct_path(goals[idx_bal], pool),
+                     pool[goals[idx_bal]].time, pool[goals[idx_bal]].dark});
 
     return picks;
- }
-
-/*
-
-int main() {
-    ios::sync_with_stdio(false);
-    cin.tie(nullptr);
-    
-    // Random Test Case
-
-    int N = 6, M = 6;
-
-    vector<double> light = {1, 1, 1, 0.5, 1, 0.2};
-    vector<int> crime = {0, 1, 0, 0, 0, 0};
-    
-    vector<vector<int>> input = {
-        {0, 3, 3},
-        {2, 3, 5},
-        {2, 5, 2},
-        {3, 5, 1},
-        {5, 4, 1},
-        {2, 4, 1}
-    };
-
-    // ! Source and Target -- change as needed
-    int s = 0, t = 4;
-
-    solve(N, M, light, crime, input, s, t);
-    return 0;
 }
 
-*/
\ No newline at end of file
+vector<Path> solve(int N, int M, const vector<double>& light, const vector<int>& crime,
+           const vector<vector<int>>& input, int s, int t, SolverStats* stats) {
+    const auto build_start = chrono::steady_clock::now();
+    if ((int)light.size() < N || (int)crime.size() < N) {
+        throw invalid_argument("light and crime must have N entries");
+    }
+    vector<uint8_t> crime_flags(N);
+    for (int i = 0; i < N; i++) crime_flags[i] = crime[i] == 1;
+    int edge_count = (int)input.size();
+    vector<int> edge_u(edge_count), edge_v(edge_count);
+    vector<double> edge_len(edge_count);
+    for (int i = 0; i < edge_count; i++) {
+        if (input[i].size() < 3) throw invalid_argument("edges must be [u, v, time_cost]");
+        edge_u[i] = input[i][0];
+        edge_v[i] = input[i][1];
+        edge_len[i] = input[i][2];
+    }
+    (void)M;
+    RoutingGraph graph(N, light.data(), crime_flags.data(), edge_count,
+                       edge_u.data(), edge_v.data(), edge_len.data());
+    double build_ms = elapsed_ms(build_start);
+    vector<Path> picks = graph.query(s, t, nullptr, stats);
+    if (stats != nullptr) stats->build_ms = build_ms;
+    return picks;
+}
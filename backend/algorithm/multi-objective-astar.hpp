@@ -1,8 +1,13 @@
 #ifndef MULTI_OBJECTIVE_ASTAR_HPP
 #define MULTI_OBJECTIVE_ASTAR_HPP
 
+#include <chrono>
+#include <cstdint>
+#include <memory>
+#include <mutex>
 #include <vector>
 #include <string>
+#include "contraction-hierarchy.hpp"
 
 struct Path {
     std::string name;
@@ -10,9 +15,191 @@ struct Path {
     std::vector<int> path;
     double time;
     double dark;
+    // True when the label search found nothing and the path came from the
+    // single-criterion fallback (the same path for all three picks).
+    bool fallback = false;
+    // True when a time budget or the iteration limit cut the search short,
+    // so this is the best found so far rather than the search's answer.
+    bool approximate = false;
+};
+
+// Per-node lower bounds on the remaining time and darkness to one target,
+// from reverse Dijkstra searches. Computed once and shared by every query
+// towards that target.
+struct TargetBounds {
+    int target = -1;
+    std::vector<double> time;
+    std::vector<double> dark;
+    double time_ms = 0.0;  // how long each of the two searches took
+    double dark_ms = 0.0;
+};
+
+// What one query did, filled in when the caller passes a SolverStats*.
+// Phase timings are wall-clock milliseconds; phases a query skips stay 0.
+struct SolverStats {
+    double build_ms = 0.0;        // graph construction (one-shot solve() only)
+    double bound_time_ms = 0.0;   // reverse Dijkstra lower bounds on time
+    double bound_dark_ms = 0.0;   // and on darkness (shared ones count fully)
+    double hierarchy_ms = 0.0;    // fastest route from the contraction hierarchy
+    double search_ms = 0.0;       // label-setting main loop
+    double fallback_ms = 0.0;     // single-criterion fallback search
+    long long iterations = 0;
+    long long labels_created = 0;
+    long long labels_dominated = 0;  // rejected on arrival or evicted by a newer label
+    long long labels_capped = 0;     // dropped by the per-node cardinality cap
+    long long peak_open = 0;         // largest open-list size
+    bool fallback = false;
+    bool iteration_limit = false;    // stopped by MAX_ITERATIONS with labels still open
+    bool deadline = false;           // stopped by the query's time budget
+};
+
+struct LowerBound {
+    double time;
+    double dark;
+};
+
+// Per-search scratch memory, reused between queries (defined in the .cpp).
+struct SearchWorkspace;
+
+// Occupancy of a graph's workspace pool. Idle workspaces are the memory the
+// pool retains between queries; ones in use belong to running searches.
+struct WorkspaceStats {
+    int max_idle = 0;
+    int idle = 0;
+    int in_use = 0;
+    int peak_in_use = 0;
+    long long acquired = 0;     // queries served from the pool
+    long long created = 0;      // workspaces allocated because none was idle
+    long long discarded = 0;    // returned while max_idle were already idle
+    long long idle_bytes = 0;
+};
+
+// Street graph held resident in memory between queries. Adjacency is stored as
+// CSR with both directions of every undirected edge, and per-edge time and
+// darkness are computed once at load time instead of on every relaxation.
+class RoutingGraph {
+public:
+    // Builds and owns the CSR arrays from an undirected edge list. Edge lengths
+    // may be float or double; both are instantiated in the .cpp.
+    template <class LengthT>
+    RoutingGraph(int N, const double* light, const uint8_t* crime,
+                 int M, const int* edge_u, const int* edge_v, const LengthT* edge_len);
+
+    // Borrows prebuilt CSR arrays (offsets has N + 1 entries, the edge arrays
+    // 2 * M) without copying them, e.g. from a memory-mapped graph artifact.
+    // The caller keeps the buffers alive for the lifetime of the graph.
+    // lmax is the light maximum edge_dark was computed against; a graph cut
+    // from a larger one must pass it, as its own nodes may not reach it.
+    // Non-positive values compute it from light.
+    RoutingGraph(int N, int M, const double* light, const uint8_t* crime,
+                 const int* offsets, const int* targets,
+                 const double* edge_time, const double* edge_dark, double lmax = 0.0);
+
+    ~RoutingGraph();
+    RoutingGraph(const RoutingGraph&) = delete;
+    RoutingGraph& operator=(const RoutingGraph&) = delete;
+
+    int num_nodes() const { return N; }
+    int num_edges() const { return M; }
+
+    // corridor: optional per-node mask (nullptr = whole graph); nodes outside it
+    // are skipped like crime-flagged nodes. s and t are never blocked.
+    // budget_ms > 0 bounds the query's wall-clock time: once it runs out, the
+    // best labels found so far (or the fallback route) are returned, marked
+    // approximate. Lower bounds are always completed first.
+    // Thread-safe: the graph is read-only after construction, and each query
+    // leases its own SearchWorkspace from the pool (under workspace_mutex) and
+    // returns it when done, so concurrent queries never share scratch state.
+    std::vector<Path> query(int s, int t, const uint8_t* corridor, SolverStats* stats = nullptr,
+                            double budget_ms = 0.0) const;
+
+    // Bounds towards t valid for queries from any of the given sources whose
+    // corridor is contained in this one (e.g. the union of their corridors).
+    TargetBounds target_bounds(int t, const uint8_t* corridor,
+                               const int* sources, int num_sources) const;
+
+    // query() with precomputed bounds, so many sources can share one target's.
+    std::vector<Path> query(int s, int t, const uint8_t* corridor, const TargetBounds& bounds,
+                            SolverStats* stats = nullptr, double budget_ms = 0.0) const;
+
+    // ALT distance tables, node-major (node v's K entries are contiguous), for
+    // time and darkness. Once set, query() computes its exact bounds on
+    // demand, with reverse searches the tables steer towards the source,
+    // instead of over the whole corridor up front. Borrowed like the CSR
+    // arrays; K = 0 switches back to the eager searches.
+    void set_landmarks(int K, const double* time_table, const double* dark_table);
+    int num_landmarks() const { return K; }
+
+    // Exact distances from source over the whole graph, ignoring crime flags.
+    std::vector<double> distances_from(int source, bool darkness) const;
+
+    // Contraction hierarchy over edge time with crime-flagged nodes excluded
+    // (see build_hierarchy), borrowed like the CSR arrays. Once set, query()
+    // takes its fastest route from the hierarchy whenever that route stays
+    // inside the corridor, and prunes the label search with its time.
+    ContractionHierarchy build_hierarchy() const;
+    void set_hierarchy(const int* rank, const int* ch_offsets, const int* ch_targets,
+                       const double* ch_weights, const int* ch_middle);
+    bool has_hierarchy() const { return hierarchy.offsets != nullptr; }
+
+    // Fastest route avoiding crime-flagged nodes (s and t exempt) over the
+    // whole graph. False if there is none or no hierarchy is set.
+    bool fastest_path(int s, int t, Path& out) const;
+
+    // Queries take their O(N) scratch arrays from a pool of workspaces
+    // instead of allocating and clearing them. Per-node entries carry a
+    // generation stamp, so handing a workspace to the next query is O(1).
+    // At most max_idle workspaces (about one per concurrent query) are kept
+    // between queries; default: the hardware thread count.
+    void set_max_workspaces(int max_idle);
+    WorkspaceStats workspace_stats() const;
+
+private:
+    friend class WorkspaceLease;
+    std::unique_ptr<SearchWorkspace> acquire_workspace() const;
+    void release_workspace(std::unique_ptr<SearchWorkspace> ws) const;
+
+    static double compute_lmax(const double* light, int N);
+
+    using Deadline = std::chrono::steady_clock::time_point;
+    static Deadline deadline_after(double budget_ms);
+
+    template <class BoundFn>
+    std::vector<Path> search(int s, int t, const uint8_t* corridor, BoundFn lb, const Path* known_fastest,
+                             SolverStats& stats, Deadline deadline, SearchWorkspace& ws) const;
+    bool fastest_path(int s, int t, Path& out, SearchWorkspace& ws) const;
+    bool corridor_fastest(int s, int t, const uint8_t* corridor, Path& out, SolverStats& stats,
+                          SearchWorkspace& ws) const;
+    void path_cost(const std::vector<int>& path, double& time, double& dark) const;
+
+    int N;
+    int M;
+    double Lmax;
+    const double* light;
+    const uint8_t* crime;
+    const int* offsets;
+    const int* targets;
+    const double* edge_time;
+    const double* edge_dark;
+    int K = 0;
+    const double* landmark_time = nullptr;
+    const double* landmark_dark = nullptr;
+    HierarchyView hierarchy;
+
+    std::vector<double> owned_light;
+    std::vector<uint8_t> owned_crime;
+    std::vector<int> owned_offsets;
+    std::vector<int> owned_targets;
+    std::vector<double> owned_edge_time;
+    std::vector<double> owned_edge_dark;
+
+    mutable std::mutex workspace_mutex;
+    mutable std::vector<std::unique_ptr<SearchWorkspace>> idle_workspaces;
+    mutable WorkspaceStats workspace_counts;
 };
 
 std::vector<Path> solve(int N, int M, const std::vector<double>& light, const std::vector<int>& crime,
-                      const std::vector<std::vector<int>>& input, int s, int t);
+                      const std::vector<std::vector<int>>& input, int s, int t,
+                      SolverStats* stats = nullptr);
 
 #endif
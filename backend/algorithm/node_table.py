@@ -0,0 +1,56 @@
+import numpy as np
+
+
+def _frozen(values, dtype):
+    """Read-only view of values as a contiguous dtype array, converting only if needed."""
+    view = np.ascontiguousarray(values, dtype=dtype).view()
+    view.flags.writeable = False
+    return view
+
+
+class NodeTable:
+    """
+    Read-only per-node attributes that route responses are built from: float32
+    lat/lon and NTL, the static crime flag and the node's global id. Row i is
+    node i of the graph it was built from.
+
+    Every array is frozen, so one table is shared by all request threads
+    without locking; anything per-request (corridors, masks) lives in its own
+    array and is never written back here.
+    """
+
+    def __init__(self, lat, lon, light, crime, ids):
+        columns = {'lat': (lat, np.float32), 'lon': (lon, np.float32), 'light': (light, np.float32),
+                   'crime': (crime, np.uint8), 'ids': (ids, np.int32)}
+        # Bytes the table allocated itself; columns that are views of the
+        # source arrays (a memory-mapped graph's lat/lon/crime) cost nothing.
+        self.nbytes = 0
+        for name, (values, dtype) in columns.items():
+            arr = _frozen(values, dtype)
+            if not np.may_share_memory(arr, values):
+                self.nbytes += arr.nbytes
+            setattr(self, name, arr)
+        n = len(self.lat)
+        if not all(len(arr) == n for arr in (self.lon, self.light, self.crime, self.ids)):
+            raise ValueError("node table columns must all have one entry per node")
+
+    @classmethod
+    def from_graph(cls, graph, ids=None):
+        """Table over a CompiledGraph's nodes; ids defaults to the row numbers."""
+        if ids is not None:
+            return cls(graph.lat, graph.lon, graph.light, graph.crime, ids)
+        table = cls(graph.lat, graph.lon, graph.light, graph.crime, np.arange(graph.num_nodes, dtype=np.int32))
+        table.nbytes += table.ids.nbytes
+        return table
+
+    def __len__(self):
+        return len(self.lat)
+
+    def node_ids(self, rows):
+        """Global ids of the given rows, as a list."""
+        return self.ids[np.asarray(rows, dtype=np.int64)].tolist()
+
+    def coordinates(self, rows):
+        """[[lat, lon], ...] of the given rows."""
+        rows = np.asarray(rows, dtype=np.int64)
+        return np.column_stack((self.lat[rows], self.lon[rows])).tolist()
@@ -0,0 +1,93 @@
+"""
+Compact route geometry: encoded polylines and Douglas-Peucker simplification.
+
+The encoding is Google's polyline format (precision 5 by default), which map
+SDKs decode natively: coordinates are scaled to integers, delta-encoded and
+written as 5-bit chunks of printable ASCII.
+"""
+import numpy as np
+
+from backend.algorithm.spatial_index import EARTH_RADIUS_M
+
+# A scaled delta fits in 32 bits, i.e. at most 7 five-bit chunks.
+_MAX_CHUNKS = 7
+_SHIFTS = np.arange(_MAX_CHUNKS, dtype=np.int64) * 5
+# Douglas-Peucker spans longer than this are scanned with numpy.
+_VECTORIZE_SPAN = 64
+
+
+def encode_polyline(coords, precision=5):
+    """Encode a sequence of (lat, lon) pairs as a polyline string."""
+    coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+    if len(coords) == 0:
+        return ''
+    scaled = np.round(coords * 10 ** precision).astype(np.int64)
+    deltas = np.diff(scaled, axis=0, prepend=np.zeros((1, 2), dtype=np.int64)).ravel()
+    values = np.where(deltas < 0, ~(deltas << 1), deltas << 1)
+
+    chunks = (values[:, None] >> _SHIFTS) & 0x1f
+    # Chunks needed per value: one, plus one per further nonzero 5-bit group.
+    count = 1 + ((values[:, None] >> _SHIFTS[1:]) > 0).sum(axis=1)
+    position = np.arange(_MAX_CHUNKS)
+    chunks |= np.where(position < count[:, None] - 1, 0x20, 0)
+    return (chunks[position < count[:, None]] + 63).astype(np.uint8).tobytes().decode('ascii')
+
+
+def decode_polyline(encoded, precision=5):
+    """Inverse of encode_polyline: a list of [lat, lon] pairs."""
+    values = []
+    value = shift = 0
+    for byte in encoded.encode('ascii'):
+        byte -= 63
+        value |= (byte & 0x1f) << shift
+        shift += 5
+        if byte < 0x20:
+            values.append(~(value >> 1) if value & 1 else value >> 1)
+            value = shift = 0
+    deltas = np.asarray(values, dtype=np.int64).reshape(-1, 2)
+    return (np.cumsum(deltas, axis=0) / 10 ** precision).tolist()
+
+
+def simplify(coords, tolerance_m):
+    """
+    Indices of the (lat, lon) points Douglas-Peucker keeps at tolerance_m
+    meters, in order. The first and last points are always kept.
+    """
+    coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+    n = len(coords)
+    if n <= 2 or tolerance_m <= 0:
+        return np.arange(n)
+    # Local equirectangular projection; routes are city-sized.
+    lat0 = np.radians(coords[:, 0].mean())
+    y = np.radians(coords[:, 0]) * EARTH_RADIUS_M
+    x = np.radians(coords[:, 1]) * EARTH_RADIUS_M * np.cos(lat0)
+
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    xs, ys = x.tolist(), y.tolist()
+    stack = [(0, n - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        x0, y0 = xs[first], ys[first]
+        dx, dy = xs[last] - x0, ys[last] - y0
+        length = (dx * dx + dy * dy) ** 0.5
+        if last - first > _VECTORIZE_SPAN:
+            px, py = x[first + 1:last] - x0, y[first + 1:last] - y0
+            dist = np.abs(dx * py - dy * px) / length if length > 0 else np.hypot(px, py)
+            i = int(np.argmax(dist))
+            mid, worst = first + 1 + i, float(dist[i])
+        else:
+            # numpy's per-call overhead dominates on short spans.
+            mid, worst = first, -1.0
+            for j in range(first + 1, last):
+                px, py = xs[j] - x0, ys[j] - y0
+                d = abs(dx * py - dy * px) / length if length > 0 else (px * px + py * py) ** 0.5
+                if d > worst:
+                    mid, worst = j, d
+        if worst > tolerance_m:
+            keep[mid] = True
+            stack.append((first, mid))
+            stack.append((mid, last))
+    return np.flatnonzero(keep)
@@ -0,0 +1,182 @@
+import numpy as np
+
+EARTH_RADIUS_M = 6371000
+
+
+def haversine_array(lat, lon, lats, lons):
+    """Vectorized haversine distance in meters (arguments broadcast like NumPy arrays)."""
+    lat1, lon1 = np.radians(lat), np.radians(lon)
+    lat2, lon2 = np.radians(lats), np.radians(lons)
+    dlat = lat2 - lat1
+    dlon = lon2 - lon1
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    return 2 * np.arcsin(np.sqrt(a)) * EARTH_RADIUS_M
+
+
+class NodeSpatialIndex:
+    """
+    Uniform grid over node coordinates, projected to local meters.
+
+    Nodes are bucketed by grid cell and stored sorted by cell id, so every row of
+    cells in a search window is one contiguous slice of the sorted order. Queries
+    grow a square window until the k-th best haversine distance is covered by the
+    window, which makes the answer exact (ties go to the lowest node index).
+    """
+
+    def __init__(self, lat, lon, cell_size_m=None):
+        # Coordinates are referenced, not copied (they may be float32 views of a
+        # memory-mapped graph); candidates are widened to float64 per query.
+        self.lat = np.asarray(lat)
+        self.lon = np.asarray(lon)
+        n = len(self.lat)
+        if n == 0:
+            raise ValueError("Cannot build a spatial index over zero nodes")
+
+        self.lat0 = float(np.mean(self.lat, dtype=np.float64))
+        self.lon0 = float(np.mean(self.lon, dtype=np.float64))
+        self._cos0 = np.cos(np.radians(self.lat0))
+        x, y = self._project(self.lat.astype(np.float64), self.lon.astype(np.float64))
+        self.x_min, self.y_min = float(x.min()), float(y.min())
+        width = float(x.max()) - self.x_min
+        height = float(y.max()) - self.y_min
+
+        if cell_size_m is None:
+            # Aim for a handful of nodes per cell on average.
+            cell_size_m = max(25.0, np.sqrt(max(width * height, 1.0) / n) * 2)
+        self.cell_size = float(cell_size_m)
+        self.nx = int(width // self.cell_size) + 1
+        self.ny = int(height // self.cell_size) + 1
+
+        # The equirectangular projection stretches east-west distances away
+        # from lat0; scale the covered radius down so the stop rule stays exact.
+        cos_lat = np.cos(np.radians([float(self.lat.min()), float(self.lat.max())]))
+        self._coverage_scale = 0.99 * min(1.0, float(cos_lat.min()) / self._cos0)
+
+        ix, iy = self._cells(x, y)
+        cell_ids = iy * self.nx + ix
+        self.order = np.argsort(cell_ids, kind='stable').astype(np.int64)
+        counts = np.bincount(cell_ids, minlength=self.nx * self.ny)
+        self.cell_start = np.zeros(self.nx * self.ny + 1, dtype=np.int64)
+        np.cumsum(counts, out=self.cell_start[1:])
+
+    def __len__(self):
+        return len(self.lat)
+
+    def _project(self, lat, lon):
+        x = np.radians(np.asarray(lon) - self.lon0) * self._cos0 * EARTH_RADIUS_M
+        y = np.radians(np.asarray(lat) - self.lat0) * EARTH_RADIUS_M
+        return x, y
+
+    def _cells(self, x, y):
+        ix = np.floor((x - self.x_min) / self.cell_size).astype(np.int64)
+        iy = np.floor((y - self.y_min) / self.cell_size).astype(np.int64)
+        return ix, iy
+
+    def _window(self, cx, cy, radius):
+        x0, x1 = max(cx - radius, 0), min(cx + radius, self.nx - 1)
+        y0, y1 = max(cy - radius, 0), min(cy + radius, self.ny - 1)
+        if x0 > x1 or y0 > y1:
+            return self.order[:0]
+        rows = np.arange(y0, y1 + 1) * self.nx
+        starts = self.cell_start[rows + x0]
+        ends = self.cell_start[rows + x1 + 1]
+        return np.concatenate([self.order[a:b] for a, b in zip(starts, ends)])
+
+    def k_nearest(self, lat, lon, k=1):
+        """Return (indices, distances_m) of the k closest nodes, nearest first."""
+        k = min(int(k), len(self))
+        if k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+        x, y = self._project(lat, lon)
+        cx, cy = (int(c) for c in self._cells(x, y))
+
+        # Start at the first ring that touches the grid at all.
+        gap = max(-cx, cx - (self.nx - 1), -cy, cy - (self.ny - 1), 0)
+        max_radius = gap + max(self.nx, self.ny)
+        radius = gap + 1
+        while True:
+            candidates = self._window(cx, cy, radius)
+            if len(candidates) >= k:
+                dist = haversine_array(lat, lon,
+                                       self.lat[candidates].astype(np.float64),
+                                       self.lon[candidates].astype(np.float64))
+                # Sort by distance, then node index, to match idxmin() tie-breaking.
+                ranked = np.lexsort((candidates, dist))[:k]
+                # Cells outside the grid hold no nodes, so the window covers
+                # every node within radius cells of the query either way.
+                covered = radius * self.cell_size * self._coverage_scale
+                if dist[ranked[-1]] <= covered or radius >= max_radius:
+                    return candidates[ranked], dist[ranked]
+            radius = min(radius * 2, max_radius)
+
+    def window(self, lat, lon, radius_m):
+        """
+        Indices of the nodes in the grid cells covering radius_m around a
+        point: a superset of the nodes within radius_m, unsorted and unfiltered.
+        """
+        x, y = self._project(lat, lon)
+        cx, cy = (int(c) for c in self._cells(x, y))
+        rings = int(np.ceil(radius_m / (self.cell_size * self._coverage_scale)))
+        return self._window(cx, cy, rings)
+
+    def within(self, lat, lon, radius_m):
+        """Return (indices, distances_m) of every node within radius_m, nearest first."""
+        candidates = self.window(lat, lon, radius_m)
+        dist = haversine_array(lat, lon,
+                               self.lat[candidates].astype(np.float64),
+                               self.lon[candidates].astype(np.float64))
+        inside = dist <= radius_m
+        candidates, dist = candidates[inside], dist[inside]
+        ranked = np.lexsort((candidates, dist))
+        return candidates[ranked], dist[ranked]
+
+    def nearest(self, lat, lon):
+        """Return (index, distance_m) of the closest node."""
+        idx, dist = self.k_nearest(lat, lon, 1)
+        return int(idx[0]), float(dist[0])
+
+    def nearest_many(self, lats, lons):
+        """
+        Return (indices, distances_m) of the closest node to each query point.
+
+        All queries are resolved at once against the 3x3 block of cells around
+        them, gathered into one padded candidate matrix. The few whose nearest
+        node is not provably inside that block fall back to nearest().
+        """
+        lats = np.asarray(lats, dtype=np.float64).ravel()
+        lons = np.asarray(lons, dtype=np.float64).ravel()
+        if lats.shape != lons.shape:
+            raise ValueError("lats and lons must have the same length")
+        indices = np.empty(len(lats), dtype=np.int64)
+        dists = np.full(len(lats), np.inf)
+        if len(lats) == 0:
+            return indices, dists
+
+        ix, iy = self._cells(*self._project(lats, lons))
+        step = np.arange(-1, 2)
+        cols = ix[:, None, None] + step[None, None, :]
+        rows = iy[:, None, None] + step[None, :, None]
+        valid_cell = (cols >= 0) & (cols < self.nx) & (rows >= 0) & (rows < self.ny)
+        cells = np.where(valid_cell, rows * self.nx + cols, 0).reshape(len(lats), 9)
+        starts = self.cell_start[cells]
+        counts = np.where(valid_cell.reshape(len(lats), 9), self.cell_start[cells + 1] - starts, 0)
+
+        width = int(counts.max())
+        if width > 0:
+            slot = np.arange(width)
+            valid = slot[None, None, :] < counts[:, :, None]
+            candidates = self.order[np.where(valid, starts[:, :, None] + slot, 0)].reshape(len(lats), -1)
+            valid = valid.reshape(len(lats), -1)
+            dist = haversine_array(lats[:, None], lons[:, None],
+                                   self.lat[candidates].astype(np.float64),
+                                   self.lon[candidates].astype(np.float64))
+            dist[~valid] = np.inf
+            dists = dist.min(axis=1)
+            # Lowest node index among the equally close, like nearest().
+            ties = valid & (dist == dists[:, None])
+            indices = np.where(ties, candidates, np.iinfo(np.int64).max).min(axis=1)
+
+        covered = self.cell_size * self._coverage_scale
+        for q in np.flatnonzero(~(dists <= covered)):
+            indices[q], dists[q] = self.nearest(lats[q], lons[q])
+        return indices, dists
@@ -0,0 +1 @@
+# Offline benchmarks for the routing pipeline (not imported by the app)
@@ -0,0 +1,133 @@
+"""
+Corridor extraction benchmark: row-wise pandas vs NumPy masks + CSR.
+
+    python -m backend.benchmarks.bench_corridor --nodes 250000 --radii 500,1000,2000,4000
+"""
+import argparse
+import time
+from math import asin, cos, radians, sin, sqrt
+
+import numpy as np
+
+from backend.algorithm.corridor import build_csr
+from backend.algorithm.spatial_index import EARTH_RADIUS_M, haversine_array
+from backend.benchmarks.synthetic import make_grid_city
+
+
+def haversine_distance(lat1, lon1, lat2, lon2):
+    """The scalar, per-row distance the legacy corridor cut called."""
+    lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
+    a = sin((lat2 - lat1) / 2) ** 2 + cos(lat1) * cos(lat2) * sin((lon2 - lon1) / 2) ** 2
+    return 2 * asin(sqrt(a)) * EARTH_RADIUS_M
+
+
+def circle_mask(lat, lon, center_lat, center_lon, radius):
+    """Boolean mask of nodes within `radius` meters of the circle center."""
+    return haversine_array(center_lat, center_lon, lat, lon) <= radius
+
+
+def extract_subgraph(node_mask, edge_u, edge_v, edge_w):
+    """
+    Cut the nodes selected by `node_mask` and the edges between them out of the
+    full graph, renumbering nodes compactly in original-index order.
+
+    Returns a dict with the compact edge list (`u`, `v`, `w`), the undirected CSR
+    adjacency (`offsets`, `targets`, `weights`), and the node mapping arrays
+    (`new_to_old`, and `old_to_new` holding -1 for nodes outside the mask).
+    """
+    new_to_old = np.flatnonzero(node_mask)
+    old_to_new = np.full(len(node_mask), -1, dtype=np.int64)
+    old_to_new[new_to_old] = np.arange(len(new_to_old))
+
+    keep = node_mask[edge_u] & node_mask[edge_v]
+    u = old_to_new[edge_u[keep]]
+    v = old_to_new[edge_v[keep]]
+    w = np.asarray(edge_w)[keep]
+
+    offsets, targets, weights = build_csr(len(new_to_old), u, v, w)
+    return {
+        'N': len(new_to_old),
+        'M': len(u),
+        'u': u,
+        'v': v,
+        'w': w,
+        'offsets': offsets,
+        'targets': targets,
+        'weights': weights,
+        'new_to_old': new_to_old,
+        'old_to_new': old_to_new,
+    }
+
+
+def legacy_corridor(df, edges_df, center_lat, center_lon, radius, start_idx, end_idx):
+    """The pre-vectorization prepare_algorithm_data corridor cut and remap."""
+    in_bounds = df.apply(
+        lambda row: haversine_distance(row['lat'], row['lon'], center_lat, center_lon) <= radius,
+        axis=1
+    )
+    nodes_in_bounds = set(df[in_bounds].index)
+    nodes_in_bounds.add(start_idx)
+    nodes_in_bounds.add(end_idx)
+    nodes_list = sorted(nodes_in_bounds)
+    old_to_new = {old_idx: new_idx for new_idx, old_idx in enumerate(nodes_list)}
+    valid_edges = edges_df[
+        (edges_df['u_idx'].isin(nodes_in_bounds)) &
+        (edges_df['v_idx'].isin(nodes_in_bounds))
+    ]
+    compact_edges = []
+    for _, edge in valid_edges.iterrows():
+        compact_edges.append([old_to_new[edge['u_idx']], old_to_new[edge['v_idx']], edge['length_m']])
+    return compact_edges
+
+
+def vectorized_corridor(lat, lon, edge_u, edge_v, edge_w, center_lat, center_lon, radius, start_idx, end_idx):
+    mask = circle_mask(lat, lon, center_lat, center_lon, radius)
+    mask[start_idx] = True
+    mask[end_idx] = True
+    return extract_subgraph(mask, edge_u, edge_v, edge_w)
+
+
+def best_of(fn, repeats):
+    best = float('inf')
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--nodes', type=int, default=100000)
+    parser.add_argument('--radii', default='250,500,1000,2000,4000')
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    df, edges_df = make_grid_city(args.nodes, seed=args.seed)
+    lat, lon = df['lat'].to_numpy(), df['lon'].to_numpy()
+    edge_u, edge_v = edges_df['u_idx'].to_numpy(), edges_df['v_idx'].to_numpy()
+    edge_w = edges_df['length_m'].to_numpy()
+    center = len(df) // 2 + int(np.sqrt(len(df))) // 2
+    center_lat, center_lon = lat[center], lon[center]
+
+    print(f"Graph: {len(df)} nodes, {len(edges_df)} edges")
+    print(f"{'radius_m':>9} {'nodes':>8} {'edges':>8} {'legacy_ms':>10} {'numpy_ms':>9} {'speedup':>8}")
+    for radius in (float(r) for r in args.radii.split(',')):
+        legacy_s, legacy_edges = best_of(
+            lambda: legacy_corridor(df, edges_df, center_lat, center_lon, radius, center, center),
+            args.repeats
+        )
+        numpy_s, subgraph = best_of(
+            lambda: vectorized_corridor(lat, lon, edge_u, edge_v, edge_w,
+                                        center_lat, center_lon, radius, center, center),
+            args.repeats
+        )
+        assert len(legacy_edges) == subgraph['M']
+        print(f"{radius:>9.0f} {subgraph['N']:>8} {subgraph['M']:>8} "
+              f"{legacy_s * 1000:>10.1f} {numpy_s * 1000:>9.2f} {legacy_s / numpy_s:>7.0f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""
+find-path response payload benchmark: full vs compact geometry.
+
+    python -m backend.benchmarks.bench_payload --nodes 100000 --pairs 100 --tolerances 2,5,10
+
+Routes are solved once through the app's routing module; every response mode
+then serializes the same processed paths. For each mode the report gives the
+JSON size of the paths payload, its gzipped size (what a client downloads
+with compression on) and the time to build and serialize it. 'full' is the
+default path_nodes + path_coordinates form; 'compact' is compact_paths
+without node lists, at each simplification tolerance (0 keeps every point).
+"""
+import argparse
+import gzip
+import json
+import logging
+import time
+
+import backend.routes.algorithm as routing
+from backend.algorithm.graph_artifact import load_graph
+from backend.algorithm.landmarks import DEFAULT_NUM_LANDMARKS
+from backend.benchmarks.bench_routing import environment, install_graph, random_workload, summarize, synthetic_graph
+
+logger = logging.getLogger(__name__)
+
+
+def solved_paths(graph, pairs):
+    solver = install_graph(graph)
+    solved = []
+    for start_lat, start_lon, end_lat, end_lon in pairs:
+        s, _ = routing.find_closest_node(start_lat, start_lon)
+        t, _ = routing.find_closest_node(end_lat, end_lon)
+        results, _, _ = routing.solve_in_corridor(solver, graph, s, t)
+        solved.append(routing.process_algorithm_results(results, routing.node_table))
+    return solved
+
+
+def measure(solved, build, repeats):
+    sizes, gzipped, serialize_ms = [], [], []
+    for paths in solved:
+        best = float('inf')
+        for _ in range(repeats):
+            start = time.perf_counter()
+            body = json.dumps(build(paths)).encode('utf-8')
+            best = min(best, time.perf_counter() - start)
+        sizes.append(len(body))
+        gzipped.append(len(gzip.compress(body)))
+        serialize_ms.append(best * 1000)
+    return {
+        'bytes': summarize(sizes),
+        'gzip_bytes': summarize(gzipped),
+        'serialize_ms': summarize(serialize_ms),
+        'total_bytes': sum(sizes),
+    }
+
+
+def run_payloads(graph, pairs, tolerances, repeats=3):
+    solved = solved_paths(graph, pairs)
+    modes = {'full': measure(solved, lambda paths: {'paths': paths}, repeats)}
+    for tolerance in tolerances:
+        modes[f'compact-{tolerance:g}m'] = measure(
+            solved, lambda paths, tolerance=tolerance: routing.compact_paths(paths, tolerance), repeats)
+    full_bytes = modes['full']['total_bytes']
+    for mode in modes.values():
+        mode['size_ratio'] = round(mode['total_bytes'] / full_bytes, 4) if full_bytes else None
+    return {
+        'pairs': len(pairs),
+        'points': summarize([len(path['path_coordinates']) for paths in solved for path in paths]),
+        'distinct_paths': summarize([len({tuple(path['path_nodes']) for path in paths}) for paths in solved]),
+        'modes': modes,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--nodes', type=int, default=100000, help='synthetic graph size (ignored with --graph)')
+    parser.add_argument('--graph', help='compiled graph artifact to benchmark instead')
+    parser.add_argument('--pairs', type=int, default=100)
+    parser.add_argument('--min-trip-m', type=float, default=1000)
+    parser.add_argument('--max-trip-m', type=float, default=8000)
+    parser.add_argument('--tolerances', default='0,2,5,10', help='comma-separated simplify_m values for compact mode')
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--landmarks', type=int, default=DEFAULT_NUM_LANDMARKS)
+    parser.add_argument('--cache-dir', help='directory to keep compiled synthetic graphs in')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='write the JSON here instead of stdout')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+    if args.graph:
+        name, graph = args.graph, load_graph(args.graph)
+    else:
+        name = f'synthetic-{args.nodes}'
+        graph = synthetic_graph(args.nodes, args.seed, args.landmarks, True, args.cache_dir)
+    pairs = random_workload(graph, args.pairs, args.seed, args.min_trip_m, args.max_trip_m)
+    tolerances = [float(t) for t in args.tolerances.split(',')]
+    run = {'graph': name, 'num_nodes': graph.num_nodes, **run_payloads(graph, pairs, tolerances, args.repeats)}
+
+    report = json.dumps({'environment': environment(), 'runs': [run]}, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(report + '\n')
+    else:
+        print(report)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""
+Navigation reroute benchmark: session reroutes vs fresh searches.
+
+    python -m backend.benchmarks.bench_reroute --nodes 100000 --pairs 50 --deviation-m 150
+
+Each trip opens a navigation session the way the reroute endpoint does. The
+user then leaves the fastest route at a few points along it, ending up
+--deviation-m off it, and each position is answered twice: by the session,
+reusing its corridor and lower bounds, and by a fresh solve_route() as
+find-path would, without the route cache. The report gives both latency
+distributions, how many reroutes the session could reuse, and whether the
+two agree on the fastest route's time.
+"""
+import argparse
+import json
+import logging
+import time
+
+import numpy as np
+
+import backend.routes.algorithm as routing
+from backend.algorithm.graph_artifact import load_graph
+from backend.algorithm.landmarks import DEFAULT_NUM_LANDMARKS
+from backend.algorithm.spatial_index import EARTH_RADIUS_M
+from backend.benchmarks.bench_routing import environment, install_graph, random_workload, summarize, synthetic_graph
+
+logger = logging.getLogger(__name__)
+
+
+def deviations(graph, path_nodes, count, deviation_m, rng):
+    """Nodes about deviation_m to the side of points spread along path_nodes."""
+    picked = []
+    for fraction in np.linspace(0.2, 0.8, count):
+        v = path_nodes[int(fraction * (len(path_nodes) - 1))]
+        heading = rng.uniform(0, 2 * np.pi)
+        lat = float(graph.lat[v]) + np.degrees(deviation_m * np.cos(heading) / EARTH_RADIUS_M)
+        lon = float(graph.lon[v]) + np.degrees(
+            deviation_m * np.sin(heading) / (EARTH_RADIUS_M * np.cos(np.radians(float(graph.lat[v])))))
+        picked.append(routing.find_closest_node(lat, lon)[0])
+    return picked
+
+
+def run_reroutes(graph, pairs, per_trip, deviation_m, seed, budget_ms=0):
+    install_graph(graph)
+    rng = np.random.default_rng(seed)
+    version = routing.current_crime_version()
+    open_ms, session_ms, fresh_ms = [], [], []
+    reused = agreed = compared = 0
+    for start_lat, start_lon, end_lat, end_lon in pairs:
+        s, _ = routing.find_closest_node(start_lat, start_lon)
+        t, _ = routing.find_closest_node(end_lat, end_lon)
+        if s == t:
+            continue
+        start = time.perf_counter()
+        token, paths, _, _, _ = routing.reroute(None, None, s, t, budget_ms, version)
+        open_ms.append((time.perf_counter() - start) * 1000)
+        if token is None or not paths:
+            continue
+        for v in deviations(graph, paths[0]['path_nodes'], per_trip, deviation_m, rng):
+            start = time.perf_counter()
+            session = routing.route_sessions.get(token)
+            token, session_paths, _, _, was_reused = routing.reroute(token, session, v, t, budget_ms, version)
+            session_ms.append((time.perf_counter() - start) * 1000)
+            start = time.perf_counter()
+            fresh_paths, _, _ = routing.solve_route(v, t, budget_ms)
+            fresh_ms.append((time.perf_counter() - start) * 1000)
+            reused += was_reused
+            if session_paths and fresh_paths:
+                compared += 1
+                agreed += abs(session_paths[0]['time'] - fresh_paths[0]['time']) < 1e-6
+    return {
+        'trips': len(open_ms),
+        'reroutes': len(session_ms),
+        'open_ms': summarize(open_ms),
+        'reroute_ms': summarize(session_ms),
+        'fresh_ms': summarize(fresh_ms),
+        'speedup_p50': round(float(np.median(fresh_ms) / np.median(session_ms)), 2) if session_ms else None,
+        'reused': reused,
+        'fastest_agrees': agreed,
+        'fastest_compared': compared,
+        'sessions': routing.route_sessions.get_stats(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--nodes', type=int, default=100000, help='synthetic graph size (ignored with --graph)')
+    parser.add_argument('--graph', help='compiled graph artifact to benchmark instead')
+    parser.add_argument('--pairs', type=int, default=50)
+    parser.add_argument('--reroutes', type=int, default=3, help='deviations per trip')
+    parser.add_argument('--deviation-m', type=float, default=150)
+    parser.add_argument('--min-trip-m', type=float, default=1000)
+    parser.add_argument('--max-trip-m', type=float, default=6000)
+    parser.add_argument('--budget-ms', type=float, default=0)
+    parser.add_argument('--landmarks', type=int, default=DEFAULT_NUM_LANDMARKS)
+    parser.add_argument('--cache-dir', help='directory to keep compiled synthetic graphs in')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='write the JSON here instead of stdout')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+    if args.graph:
+        name, graph = args.graph, load_graph(args.graph)
+    else:
+        name = f'synthetic-{args.nodes}'
+        graph = synthetic_graph(args.nodes, args.seed, args.landmarks, True, args.cache_dir)
+    pairs = random_workload(graph, args.pairs, args.seed, args.min_trip_m, args.max_trip_m)
+    run = {
+        'graph': name,
+        'num_nodes': graph.num_nodes,
+        'deviation_m': args.deviation_m,
+        **run_reroutes(graph, pairs, args.reroutes, args.deviation_m, args.seed, args.budget_ms),
+    }
+
+    report = json.dumps({'environment': environment(), 'runs': [run]}, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(report + '\n')
+    else:
+        print(report)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,265 @@
+"""
+End-to-end routing benchmark: snap -> corridor -> solve -> post-process.
+
+    python -m backend.benchmarks.bench_routing --nodes 10000,100000 --pairs 200 --output run.json
+    python -m backend.benchmarks.bench_routing --graph data/graph.aegis --workload od_pairs.csv
+
+Synthetic graphs come from make_grid_city and are compiled like the real one
+(landmarks and, unless --skip-hierarchy, the contraction hierarchy); pass
+--cache-dir to reuse them between runs. A recorded workload is a CSV with
+start_lat, start_lon, end_lat, end_lon columns or a JSON list of such objects
+(the find-paths-batch payload); otherwise trips are drawn at random.
+
+Every stage runs through the app's own routing module, without the route
+cache. On graphs up to --reference-max-nodes the first --reference-pairs
+answers are scored against an exact, unpruned Pareto front. Results are one
+JSON document, so runs can be diffed. Peak RSS is the process high-water
+mark: benchmark one size per process when comparing memory.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import resource
+import subprocess
+import time
+
+import numpy as np
+import pandas as pd
+
+import backend.routes.algorithm as routing
+from backend.algorithm.crime_overlay import CrimeOverlay
+from backend.algorithm.graph_artifact import load_graph, save_graph
+from backend.algorithm.graph_compiler import compile_graph
+from backend.algorithm.landmarks import DEFAULT_NUM_LANDMARKS
+from backend.algorithm.spatial_index import EARTH_RADIUS_M, NodeSpatialIndex
+from backend.benchmarks.pareto import LabelBudgetExceeded, exact_pareto_front, front_quality
+from backend.benchmarks.synthetic import make_grid_city
+
+logger = logging.getLogger(__name__)
+
+STAGES = ('snap', 'corridor', 'solve', 'postprocess', 'total')
+SOLVER_COUNTS = ('iterations', 'labels_created', 'labels_dominated', 'labels_capped', 'peak_open')
+
+
+def synthetic_graph(num_nodes, seed, num_landmarks, hierarchy, cache_dir=None):
+    path = None
+    if cache_dir:
+        name = f"grid-{num_nodes}-s{seed}-l{num_landmarks}{'-ch' if hierarchy else ''}.aegis"
+        path = os.path.join(cache_dir, name)
+        if os.path.exists(path):
+            return load_graph(path)
+    nodes, edges = make_grid_city(num_nodes, seed=seed)
+    graph = compile_graph(nodes, edges, num_landmarks, hierarchy=hierarchy)
+    if path:
+        os.makedirs(cache_dir, exist_ok=True)
+        save_graph(graph, path)
+        return load_graph(path)
+    return graph
+
+
+def load_workload(path):
+    """(P, 4) array of start_lat, start_lon, end_lat, end_lon."""
+    columns = ['start_lat', 'start_lon', 'end_lat', 'end_lon']
+    if path.endswith('.json'):
+        with open(path) as f:
+            data = json.load(f)
+        pairs = data['pairs'] if isinstance(data, dict) else data
+        return np.array([[float(pair[c]) for c in columns] for pair in pairs], dtype=np.float64).reshape(-1, 4)
+    return pd.read_csv(path)[columns].to_numpy(dtype=np.float64)
+
+
+def random_workload(graph, count, seed, min_trip_m, max_trip_m):
+    """Trips from random nodes, with uniform length and heading."""
+    rng = np.random.default_rng(seed)
+    start = rng.integers(graph.num_nodes, size=count)
+    lat = graph.lat[start].astype(np.float64)
+    lon = graph.lon[start].astype(np.float64)
+    length = rng.uniform(min_trip_m, max_trip_m, count)
+    heading = rng.uniform(0, 2 * np.pi, count)
+    dlat = np.degrees(length * np.cos(heading) / EARTH_RADIUS_M)
+    dlon = np.degrees(length * np.sin(heading) / (EARTH_RADIUS_M * np.cos(np.radians(lat))))
+    return np.column_stack([lat, lon, lat + dlat, lon + dlon])
+
+
+def install_graph(graph):
+    """
+    Point the app's routing module at graph, as if it had loaded it itself.
+    Returns what its searches run on (see routing.load_search_graph()).
+    """
+    if routing.solver_processes is not None:
+        routing.solver_processes.close()
+        routing.solver_processes = None
+    routing.graph_data = graph
+    routing.node_index = NodeSpatialIndex(graph.lat, graph.lon)
+    routing.node_table = None
+    routing.routing_graph = None
+    routing.crime_overlay = CrimeOverlay(routing.node_index)
+    routing.connectivity = None
+    routing.route_cache.clear()
+    routing.route_sessions.clear()
+    routing.load_node_table()
+    return routing.load_search_graph()
+
+
+def summarize(values):
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) == 0:
+        return None
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {
+        'mean': round(float(values.mean()), 3),
+        'p50': round(float(p50), 3),
+        'p95': round(float(p95), 3),
+        'p99': round(float(p99), 3),
+        'max': round(float(values.max()), 3),
+    }
+
+
+def run_workload(graph, pairs, reference_pairs=0, max_labels=2000000, budget_ms=0):
+    solver = install_graph(graph)
+    timings = {stage: [] for stage in STAGES}
+    solver_stats = []
+    corridors = []
+    quality = []
+    skipped_references = 0
+    for i, (start_lat, start_lon, end_lat, end_lon) in enumerate(pairs):
+        t0 = time.perf_counter()
+        s, _ = routing.find_closest_node(start_lat, start_lon)
+        t, _ = routing.find_closest_node(end_lat, end_lon)
+        t1 = time.perf_counter()
+        corridor = routing.corridor_mask(graph, s, t)
+        t2 = time.perf_counter()
+        # Includes any corridor expansions the tight corridor needed.
+        paths, stats, corridor_info = routing.solve_in_corridor(solver, graph, s, t, budget_ms, corridor)
+        t3 = time.perf_counter()
+        routing.process_algorithm_results(paths, routing.node_table)
+        t4 = time.perf_counter()
+        for stage, elapsed in zip(STAGES, (t1 - t0, t2 - t1, t3 - t2, t4 - t3, t4 - t0)):
+            timings[stage].append(elapsed * 1000)
+        solver_stats.append(stats)
+        corridors.append(corridor_info)
+
+        if i < reference_pairs:
+            try:
+                front = exact_pareto_front(graph, s, t, corridor, max_labels)
+            except LabelBudgetExceeded as e:
+                logger.warning(f"Skipping reference for pair {i}: {e}")
+                skipped_references += 1
+                continue
+            scored = front_quality([(p['time'], p['dark']) for p in paths], front)
+            if scored is not None:
+                quality.append(scored)
+
+    result = {
+        'pairs': len(pairs),
+        'latency_ms': {stage: summarize(values) for stage, values in timings.items()},
+        'solver': {
+            **{name: summarize([s[name] for s in solver_stats]) for name in SOLVER_COUNTS},
+            'search_ms': summarize([s['search_ms'] for s in solver_stats]),
+            'fallbacks': sum(s['fallback'] for s in solver_stats),
+            'iteration_limits': sum(s['iteration_limit'] for s in solver_stats),
+            'deadlines': sum(s['deadline'] for s in solver_stats),
+        },
+        'corridor': {
+            'nodes': summarize([c['nodes'] for c in corridors]),
+            'expanded': sum(c['expansions'] > 0 for c in corridors),
+            'expansions': summarize([c['expansions'] for c in corridors]),
+        },
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+    if reference_pairs:
+        result['quality'] = {
+            'pairs_scored': len(quality),
+            'pairs_skipped': skipped_references,
+            **{name: summarize([q[name] for q in quality])
+               for name in ('front_size', 'fastest_gap', 'best_lit_gap', 'pareto_optimal', 'hypervolume_ratio')},
+        }
+    return result
+
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(__file__)).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--nodes', default='10000,100000',
+                        help='comma-separated synthetic graph sizes (ignored with --graph)')
+    parser.add_argument('--graph', help='compiled graph artifact to benchmark instead')
+    parser.add_argument('--workload', help='recorded OD pairs (.csv or .json)')
+    parser.add_argument('--pairs', type=int, default=200, help='random trips per graph without --workload')
+    parser.add_argument('--min-trip-m', type=float, default=500)
+    parser.add_argument('--max-trip-m', type=float, default=4000)
+    parser.add_argument('--landmarks', type=int, default=DEFAULT_NUM_LANDMARKS)
+    parser.add_argument('--skip-hierarchy', action='store_true')
+    parser.add_argument('--cache-dir', help='directory to keep compiled synthetic graphs in')
+    parser.add_argument('--reference-pairs', type=int, default=20,
+                        help='pairs to score against the exact Pareto front')
+    parser.add_argument('--reference-max-nodes', type=int, default=20000,
+                        help='only score graphs up to this many nodes')
+    parser.add_argument('--budget-ms', type=float, default=0,
+                        help='per-search time budget, as the API would apply it (0 for none)')
+    parser.add_argument('--processes', type=int, default=0,
+                        help='run searches in this many solver processes (needs --cache-dir or --graph)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='write the JSON here instead of stdout')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    routing.ROUTING_PROCESSES = args.processes
+
+    if args.graph:
+        sources = [(args.graph, lambda: load_graph(args.graph))]
+    else:
+        sources = [
+            (f'synthetic-{n}', lambda n=n: synthetic_graph(n, args.seed, args.landmarks,
+                                                            not args.skip_hierarchy, args.cache_dir))
+            for n in (int(size) for size in args.nodes.split(','))
+        ]
+
+    runs = []
+    for name, load in sources:
+        start = time.perf_counter()
+        graph = load()
+        load_s = time.perf_counter() - start
+        pairs = (load_workload(args.workload) if args.workload else
+                 random_workload(graph, args.pairs, args.seed, args.min_trip_m, args.max_trip_m))
+        reference_pairs = args.reference_pairs if graph.num_nodes <= args.reference_max_nodes else 0
+        run = {
+            'graph': name,
+            'num_nodes': graph.num_nodes,
+            'num_edges': graph.num_edges,
+            'num_landmarks': graph.num_landmarks,
+            'hierarchy': graph.has_hierarchy,
+            'load_s': round(load_s, 2),
+            'budget_ms': args.budget_ms,
+            'processes': args.processes,
+            **run_workload(graph, pairs, reference_pairs, budget_ms=args.budget_ms),
+        }
+        runs.append(run)
+        total = run['latency_ms']['total']
+        logger.info(f"{name}: {len(pairs)} pairs, p50 {total['p50']}ms p95 {total['p95']}ms "
+                       f"p99 {total['p99']}ms, peak RSS {run['peak_rss_mb']}MB")
+
+    report = json.dumps({'environment': environment(), 'runs': runs}, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(report + '\n')
+    else:
+        print(report)
+
+
+if __name__ == '__main__':
+    main()
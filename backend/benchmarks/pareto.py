@@ -0,0 +1,113 @@
+"""
+Exact bi-objective reference for judging the solver's (time, darkness) picks.
+
+The reference is an unpruned label-setting search (Martins' algorithm with a
+lexicographic queue): no cardinality cap, no iteration limit, no 1.5x cut.
+It is pure Python, so it is only meant for small instances.
+"""
+import heapq
+
+import numpy as np
+
+EPS = 1e-9
+
+
+class LabelBudgetExceeded(RuntimeError):
+    pass
+
+
+def exact_pareto_front(graph, s, t, corridor=None, max_labels=2000000):
+    """
+    Every Pareto-optimal (time, dark) cost from s to t in a CompiledGraph,
+    under the solver's rules: crime-flagged nodes and nodes outside the
+    corridor are skipped, s and t never are, and darkness starts at the
+    start node's own. Returned sorted by time (darkness strictly falling).
+    """
+    allowed = graph.crime == 0
+    if corridor is not None:
+        allowed &= np.asarray(corridor, dtype=bool)
+    allowed[s] = allowed[t] = True
+    offsets = graph.offsets.tolist()
+    targets = graph.targets.tolist()
+    edge_time = graph.edge_time.tolist()
+    edge_dark = graph.edge_dark.tolist()
+    allowed = allowed.tolist()
+
+    inf = float('inf')
+    # Labels leave the queue in (time, dark) order, so one is dominated at
+    # its node exactly when an earlier one there was at least as dark. The
+    # same test against t prunes labels no target label can be beaten by.
+    min_dark = {}
+    heap = [(0.0, max(0.0, graph.lmax - float(graph.light[s])), s)]
+    front = []
+    pushed = 1
+    while heap:
+        time, dark, u = heapq.heappop(heap)
+        if dark >= min_dark.get(u, inf) - EPS or dark >= min_dark.get(t, inf) - EPS:
+            continue
+        min_dark[u] = dark
+        if u == t:
+            front.append((time, dark))
+            continue
+        for e in range(offsets[u], offsets[u + 1]):
+            v = targets[e]
+            if not allowed[v]:
+                continue
+            next_dark = dark + edge_dark[e]
+            if next_dark >= min_dark.get(v, inf) - EPS or next_dark >= min_dark.get(t, inf) - EPS:
+                continue
+            heapq.heappush(heap, (time + edge_time[e], next_dark, v))
+            pushed += 1
+            if pushed > max_labels:
+                raise LabelBudgetExceeded(f"more than {max_labels} labels from {s} to {t}")
+    return front
+
+
+def _nondominated(points):
+    kept = []
+    for time, dark in sorted(points):
+        if not kept or dark < kept[-1][1] - EPS:
+            kept.append((time, dark))
+    return kept
+
+
+def hypervolume(points, ref):
+    """Area dominated by points (minimizing both) and bounded by ref."""
+    area = 0.0
+    prev_dark = ref[1]
+    for time, dark in _nondominated(points):
+        if time >= ref[0] or dark >= prev_dark:
+            continue
+        area += (ref[0] - time) * (prev_dark - dark)
+        prev_dark = dark
+    return area
+
+
+def front_quality(found, front):
+    """
+    Compare the solver's picks, as (time, dark) pairs, against the exact front.
+
+    fastest_gap and best_lit_gap are relative excesses over the front's best
+    time and darkness, pareto_optimal is the share of picks no front point
+    strictly dominates, and hypervolume_ratio compares the area dominated by
+    the picks to the front's, with a reference point 10% past both.
+    """
+    if not front or not found:
+        return None
+    best_time = min(time for time, _ in front)
+    best_dark = min(dark for _, dark in front)
+
+    def dominated(point):
+        return any(time <= point[0] + EPS and dark <= point[1] + EPS and
+                   (time < point[0] - EPS or dark < point[1] - EPS) for time, dark in front)
+
+    distinct = sorted(set(found))
+    ref = (1.1 * max(time for time, _ in front + distinct), 1.1 * max(dark for _, dark in front + distinct))
+    exact_volume = hypervolume(front, ref)
+    return {
+        'front_size': len(front),
+        'fastest_gap': min(time for time, _ in found) / best_time - 1 if best_time > 0 else 0.0,
+        'best_lit_gap': min(dark for _, dark in found) / best_dark - 1 if best_dark > 0 else 0.0,
+        'pareto_optimal': sum(not dominated(point) for point in distinct) / len(distinct),
+        'hypervolume_ratio': hypervolume(distinct, ref) / exact_volume if exact_volume > 0 else 1.0,
+    }
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+
+from backend.algorithm.spatial_index import haversine_array
+
+# Center City Philadelphia, matching the real dataset's coordinates.
+ORIGIN_LAT = 39.95
+ORIGIN_LON = -75.16
+BLOCK_DEG = 0.0009
+
+
+def make_grid_city(num_nodes, seed=0, crime_rate=0.05):
+    """
+    Build a reproducible street grid shaped like the OSM-NTL-CRIME dataset.
+
+    Returns (nodes_df, edges_df) with the same columns as
+    OSM-NTL-CRIME_combined.csv and edges.csv. Nodes are jittered grid
+    intersections; light is brighter along a few arterial streets and decays
+    away from downtown, and crime flags are clustered in a few hotspots.
+    """
+    rng = np.random.default_rng(seed)
+    side = max(2, int(np.ceil(np.sqrt(num_nodes))))
+    rows, cols = np.divmod(np.arange(side * side), side)
+
+    lat = ORIGIN_LAT + rows * BLOCK_DEG + rng.normal(0, BLOCK_DEG * 0.1, side * side)
+    lon = ORIGIN_LON + cols * BLOCK_DEG * 1.3 + rng.normal(0, BLOCK_DEG * 0.1, side * side)
+
+    center = side / 2
+    downtown = np.exp(-np.hypot(rows - center, cols - center) / (side / 3))
+    arterial = ((rows % 8 == 0) | (cols % 8 == 0)).astype(float)
+    ntl = 20 * downtown + 15 * arterial + rng.gamma(2.0, 3.0, side * side)
+
+    hotspots = rng.integers(0, side, size=(max(1, side // 10), 2))
+    crime_p = np.zeros(side * side)
+    for hr, hc in hotspots:
+        crime_p += np.exp(-np.hypot(rows - hr, cols - hc) / 3)
+    crime = rng.random(side * side) < np.clip(crime_p * crime_rate, 0, 0.5)
+
+    nodes = pd.DataFrame({
+        'osmid': np.arange(side * side, dtype=np.int64) + 100000,
+        'lat': lat,
+        'lon': lon,
+        'NTL': ntl,
+        'near_crime_100m': crime,
+    })
+
+    grid = np.arange(side * side).reshape(side, side)
+    u = np.concatenate([grid[:, :-1].ravel(), grid[:-1, :].ravel()])
+    v = np.concatenate([grid[:, 1:].ravel(), grid[1:, :].ravel()])
+    # Drop a few streets so the grid is not perfectly regular.
+    keep = rng.random(len(u)) > 0.05
+    u, v = u[keep], v[keep]
+    length = haversine_array(lat[u], lon[u], lat[v], lon[v])
+    edges = pd.DataFrame({'u_idx': u, 'v_idx': v, 'length_m': length})
+    return nodes, edges
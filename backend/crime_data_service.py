@@ -10,6 +10,14 @@ import pytz
 
 logger = logging.getLogger(__name__)
 
+def _sql_timestamp(value: datetime) -> str:
+    """A datetime as a UTC 'YYYY-MM-DD HH:MM:SS' literal for Carto SQL; anything else is rejected."""
+    if not isinstance(value, datetime):
+        raise TypeError(f"expected a datetime, got {type(value).__name__}")
+    if value.tzinfo is not None:
+        value = value.astimezone(pytz.utc)
+    return value.strftime('%Y-%m-%d %H:%M:%S')
+
 class CrimeDataService:
     def __init__(self):
         self.local_crime_file = os.path.join(os.path.dirname(__file__), 'data', 'local_crimes.csv')
@@ -73,6 +81,65 @@ class CrimeDataService:
                 'timestamp': datetime.utcnow().isoformat()
             }
 
+    def get_recent_incidents(self, start_time: datetime, end_time: Optional[datetime] = None,
+                             limit: int = 5000) -> List[Dict]:
+        """Citywide Philadelphia incidents dispatched in [start_time, end_time], oldest first."""
+        # Every value formatted into the SQL below is a checked timestamp or int.
+        start = _sql_timestamp(start_time)
+        end = _sql_timestamp(end_time or datetime.now(pytz.utc))
+        limit = int(limit)
+        if limit < 1:
+            raise ValueError(f"limit must be positive, got {limit}")
+        try:
+            query = f"""
+            SELECT
+                objectid,
+                dispatch_date_time,
+                location_block,
+                text_general_code,
+                lat,
+                lng
+            FROM incidents_part1_part2
+            WHERE
+                dispatch_date_time >= '{start}'
+                AND dispatch_date_time <= '{end}'
+                AND lat IS NOT NULL
+                AND lng IS NOT NULL
+            ORDER BY dispatch_date_time ASC
+            LIMIT {limit}
+            """
+            response = requests.get(
+                self.philadelphia_api_base,
+                params={'q': query, 'format': 'json'},
+                timeout=10
+            )
+            if response.status_code != 200:
+                logger.warning(f"Philadelphia API returned status {response.status_code}")
+                return []
+            incidents = []
+            for row in response.json().get('rows', []):
+                try:
+                    crime_type = row.get('text_general_code') or 'Unknown'
+                    incidents.append({
+                        'id': row['objectid'],
+                        'type': crime_type,
+                        'severity': self.severity_mapping.get(crime_type.upper(), 'medium'),
+                        'location': {
+                            'lat': float(row['lat']),
+                            'lng': float(row['lng']),
+                            'address': row.get('location_block', 'Unknown')
+                        },
+                        'datetime': row['dispatch_date_time'],
+                        'source': 'Philadelphia PD'
+                    })
+                except (KeyError, ValueError, TypeError) as e:
+                    logger.warning(f"Error processing Philadelphia crime record: {e}")
+            logger.info(f"Fetched {len(incidents)} recent incidents from Philadelphia PD")
+            return incidents
+        except Exception as e:
+            logger.error(f"Error fetching recent Philadelphia incidents: {str(e)}")
+            return []
+
     def _get_philadelphia_crimes(self, lat: float, lng: float, radius: int,
                                start_time: datetime, end_time: datetime) -> List[Dict]:
         try:
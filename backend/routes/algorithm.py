@@ -1,80 +1,307 @@
 import logging
 import pandas as pd
 import numpy as np
-from flask import Blueprint, jsonify, request
-from backend.algorithm.astar_solver import run_astar_solver
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+from backend.algorithm.astar_solver import run_astar_solver_arrays
+from backend.algorithm.spatial_index import NodeSpatialIndex, haversine_array
+from backend.algorithm.corridor import ellipse_mask, ellipse_reach
+from backend.algorithm.graph_artifact import build_routing_graph, load_graph
+from backend.algorithm.graph_tiles import TileStore
+from backend.algorithm.graph_compiler import compile_graph
+from backend.algorithm.node_table import NodeTable
+from backend.algorithm.connectivity import Connectivity
+from backend.algorithm.crime_overlay import CrimeOverlay
+from backend.algorithm.polyline import encode_polyline, simplify
+from backend.crime_data_service import CrimeDataService
+from backend.utils.solver_pool import SolverPool, SolverPoolBusy
+from backend.utils.solver_processes import SolverProcessError, SolverProcessPool
+from backend.utils.route_cache import RouteCache
+from backend.utils.route_sessions import RouteSessions
+from backend.utils.solver_metrics import SolverMetrics
+from datetime import datetime, timedelta
+import json
 import os
+import threading
+import time
+import pytz
 
 algorithm_bp = Blueprint('algorithm_bp', __name__)
 logger = logging.getLogger(__name__)
 DATA_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'data', 'OSM-NTL-CRIME_combined.csv')
 EDGES_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'data', 'edges.csv')
-osm_data = None
-edges_data = None
+GRAPH_PATH = os.getenv('GRAPH_ARTIFACT_PATH', os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'data', 'graph.aegis'))
+# With a tiled graph (python -m backend.algorithm.graph_tiles) only the tiles
+# around each request are loaded, and the single-artifact globals stay unset.
+TILES_PATH = os.getenv('GRAPH_TILES_PATH')
+# Tiled regions cover the corridor up to this detour factor; expansions past it
+# are clipped to the region.
+TILE_REGION_DETOUR_FACTOR = float(os.getenv('TILE_REGION_DETOUR_FACTOR', 1.6))
+graph_data = None
+# Read-only per-node attributes shared by every request thread.
+node_table = None
+node_index = None
+routing_graph = None
+tile_store = None
+solver_pool = SolverPool()
+# With ROUTING_PROCESSES > 0, searches on a graph artifact run in that many
+# solver processes mapping the same file; solver_pool threads only wait on them.
+ROUTING_PROCESSES = int(os.getenv('ROUTING_PROCESSES', 0))
+solver_processes = None
+route_cache = RouteCache()
+solver_metrics = SolverMetrics()
+crime_service = CrimeDataService()
+# Live incidents layered over the static crime flags; its version moving
+# forward invalidates cached routes.
+crime_overlay = None
+# Components of the crime-filtered graph, following the overlay.
+connectivity = None
+# How often to poll the live incident feed; 0 (the default) never polls, so
+# tests, benchmarks and offline runs make no network calls.
+CRIME_OVERLAY_REFRESH_SECONDS = int(os.getenv('CRIME_OVERLAY_REFRESH_SECONDS', 0))
+# Search corridor: an ellipse with foci at the endpoints that starts tight and
+# widens only when it holds no path, its detour allowance (factor - 1)
+# multiplied by CORRIDOR_GROWTH each time.
+CORRIDOR_DETOUR_FACTOR = float(os.getenv('CORRIDOR_DETOUR_FACTOR', 1.3))
+CORRIDOR_GROWTH = float(os.getenv('CORRIDOR_GROWTH', 2))
+CORRIDOR_MAX_EXPANSIONS = int(os.getenv('CORRIDOR_MAX_EXPANSIONS', 3))
+CORRIDOR_MIN_SLACK_M = float(os.getenv('CORRIDOR_MIN_SLACK_M', 300))
+# Navigation sessions keep exact lower bounds towards their destination over
+# a corridor this wide, so a reroute from anywhere inside it skips them.
+ROUTE_SESSION_DETOUR_FACTOR = float(os.getenv('ROUTE_SESSION_DETOUR_FACTOR', 1.6))
+route_sessions = RouteSessions()
+# How often the label search comes back empty and the fallback has to answer.
+search_counts = {'searches': 0, 'fallback_searches': 0}
+_search_counts_lock = threading.Lock()
+# Why a pair got no paths: the connectivity check rules out any safe route,
+# or the search of a connected pair ran out of budget or corridor first.
+NO_ROUTE_MESSAGES = {
+    'no_safe_route': 'Every route between these points passes through a crime-flagged area',
+    'budget_exhausted': 'The search budget ran out before a route was found; retry with a larger budget_ms',
+    'no_route_in_corridor': 'No route avoiding crime-flagged areas was found within the widest search corridor'
+}
+BATCH_MAX_PAIRS = int(os.getenv('ROUTING_BATCH_MAX_PAIRS', 1000))
+# Default per-search time budget; 0 lets searches run to completion.
+ROUTING_BUDGET_MS = float(os.getenv('ROUTING_BUDGET_MS', 0))
+# Request threads run concurrently, so lazy loading must happen exactly once.
+_load_lock = threading.RLock()
 
-def load_osm_data():
-    global osm_data
-    if osm_data is None:
+def load_graph_data():
+    global graph_data, node_index
+    if graph_data is not None:
+        return graph_data
+    with _load_lock:
+        if graph_data is not None:
+            return graph_data
         try:
-            osm_data = pd.read_csv(DATA_PATH)
-            logger.info(f"Loaded OSM data with {len(osm_data)} nodes")
+            if os.path.exists(GRAPH_PATH):
+                graph = load_graph(GRAPH_PATH)
+            else:
+                logger.warning(f"No compiled graph at {GRAPH_PATH}, compiling from CSV in memory "
+                               f"(build it once with: python -m backend.algorithm.graph_compiler)")
+                # The contraction hierarchy takes too long to build per process.
+                graph = compile_graph(pd.read_csv(DATA_PATH), pd.read_csv(EDGES_PATH), hierarchy=False)
+            node_index = NodeSpatialIndex(graph.lat, graph.lon)
+            graph_data = graph
+            logger.info(f"Loaded graph with {graph.num_nodes} nodes and {graph.num_edges} edges "
+                        f"({node_index.nx}x{node_index.ny} grid, {node_index.cell_size:.0f}m cells)")
         except Exception as e:
-            logger.error(f"Failed to load OSM data: {e}")
+            logger.error(f"Failed to load graph data: {e}")
             raise
-    return osm_data
+    return graph_data
+
+def load_node_table():
+    global node_table
+    if node_table is None:
+        graph = load_graph_data()
+        with _load_lock:
+            if node_table is None:
+                node_table = NodeTable.from_graph(graph)
+    return node_table
+
+def load_node_index():
+    load_graph_data()
+    return node_index
 
-def load_edges_data():
-    global edges_data
-    if edges_data is None:
+def load_routing_graph():
+    global routing_graph
+    if routing_graph is not None:
+        return routing_graph
+    graph = load_graph_data()
+    with _load_lock:
+        if routing_graph is not None:
+            return routing_graph
         try:
-            edges_data = pd.read_csv(EDGES_PATH)
-            logger.info(f"Loaded edges data with {len(edges_data)} edges")
+            resident = build_routing_graph(graph)
+            # One search workspace per solver thread stays allocated between queries.
+            resident.set_max_workspaces(solver_pool.max_workers)
+            routing_graph = resident
+            if ROUTING_PROCESSES > 0 and graph.source is None:
+                logger.warning("Graph was compiled in memory, so route searches stay in this process "
+                               "despite ROUTING_PROCESSES")
+            logger.info(f"Loaded routing graph with {routing_graph.num_nodes} nodes, {routing_graph.num_edges} edges "
+                        f"and {routing_graph.num_landmarks} landmarks")
         except Exception as e:
-            logger.error(f"Failed to load edges data: {e}")
+            logger.error(f"Failed to build routing graph: {e}")
             raise
-    return edges_data
+    return routing_graph
 
-def create_circular_bounds(start_lat, start_lon, end_lat, end_lon, buffer_factor=1.6):
-    mid_lat = (start_lat + end_lat) / 2
-    mid_lon = (start_lon + end_lon) / 2
-    direct_distance = haversine_distance(start_lat, start_lon, end_lat, end_lon)
-    radius = (direct_distance / 2) * buffer_factor
-    
-    return {
-        'center_lat': mid_lat,
-        'center_lon': mid_lon,
-        'radius': radius,
-        'direct_distance': direct_distance
-    }
+def load_solver_processes():
+    """The solver process pool, started on first use; None unless ROUTING_PROCESSES and a graph artifact are set."""
+    global solver_processes
+    if solver_processes is not None or ROUTING_PROCESSES <= 0:
+        return solver_processes
+    graph = load_graph_data()
+    if graph.source is None:
+        return None
+    with _load_lock:
+        if solver_processes is None:
+            solver_processes = SolverProcessPool(graph.source, graph.checksum, ROUTING_PROCESSES)
+            logger.info(f"Started {ROUTING_PROCESSES} solver processes over {graph.source}")
+    return solver_processes
+
+def load_search_graph():
+    """What route searches run on: the solver processes when enabled, else the resident graph."""
+    processes = load_solver_processes()
+    return processes.graph if processes is not None else load_routing_graph()
+
+def tiles_enabled():
+    return bool(TILES_PATH)
+
+def load_tile_store():
+    global tile_store
+    if tile_store is not None:
+        return tile_store
+    with _load_lock:
+        if tile_store is None:
+            store = TileStore(TILES_PATH)
+            tile_store = store
+            logger.info(f"Opened {len(store.tiles)} graph tiles of {store.tile_m:.0f}m covering "
+                        f"{store.num_nodes} nodes, caching up to {store.max_bytes // (1024 * 1024)}MB")
+    return tile_store
+
+def graph_size():
+    """(nodes, edges) of the whole graph, without loading it when tiled."""
+    if tiles_enabled():
+        store = load_tile_store()
+        return store.num_nodes, store.num_edges
+    graph = load_graph_data()
+    return graph.num_nodes, graph.num_edges
 
-def point_in_circle(lat, lon, bounds):
-    distance = haversine_distance(lat, lon, bounds['center_lat'], bounds['center_lon'])
-    return distance <= bounds['radius']
+def node_coordinates(node):
+    if tiles_enabled():
+        return load_tile_store().coordinates(node)
+    graph = load_graph_data()
+    return float(graph.lat[node]), float(graph.lon[node])
+
+def routing_target(pairs, in_process=False):
+    """
+    (routing graph, node graph, region) to search the (s, t) pairs on. On a
+    single artifact that is load_search_graph() (the resident graph with
+    in_process) and region is None; when tiled
+    it is the TileRegion stitched from the tiles around every pair's corridor,
+    whose node ids are local (region.local() maps them).
+    """
+    if not tiles_enabled():
+        return load_routing_graph() if in_process else load_search_graph(), load_graph_data(), None
+    store = load_tile_store()
+    keys = set()
+    for s, t in pairs:
+        start, end = store.coordinates(s), store.coordinates(t)
+        reach = ellipse_reach(start, end, TILE_REGION_DETOUR_FACTOR, CORRIDOR_MIN_SLACK_M)
+        keys.update(store.keys_within((start[0] + end[0]) / 2, (start[1] + end[1]) / 2, reach / 2))
+        keys.update((store.tile_key(*start), store.tile_key(*end)))
+    region = store.region(keys)
+    return region.routing_graph, region.graph, region
+
+def load_crime_overlay():
+    global crime_overlay
+    if crime_overlay is not None:
+        return crime_overlay
+    # The tile store answers the overlay's node lookups in global ids.
+    index = load_tile_store() if tiles_enabled() else load_node_index()
+    with _load_lock:
+        if crime_overlay is None:
+            overlay = CrimeOverlay(index)
+            if CRIME_OVERLAY_REFRESH_SECONDS > 0:
+                threading.Thread(target=_refresh_crime_overlay, args=(overlay,),
+                                 name='crime-overlay-refresh', daemon=True).start()
+            crime_overlay = overlay
+            logger.info(f"Crime overlay covering {overlay.radius_m:.0f}m around incidents "
+                        f"from the last {overlay.window_seconds / 3600:g}h")
+    return crime_overlay
+
+def load_connectivity():
+    global connectivity
+    if connectivity is not None:
+        return connectivity
+    graph = load_graph_data()
+    with _load_lock:
+        if connectivity is None:
+            connectivity = Connectivity(graph)
+    return connectivity
+
+def is_reachable(s, t):
+    """O(1) check that some route from s to t avoids the crime-flagged nodes."""
+    if tiles_enabled():
+        # Components span tiles; labelling them would load the whole graph.
+        return True
+    components = load_connectivity()
+    components.sync(load_crime_overlay())
+    return components.reachable(s, t)
+
+def current_crime_version():
+    """Overlay version after dropping expired incidents, which is cheap when none are due."""
+    overlay = load_crime_overlay()
+    overlay.expire()
+    return overlay.version
+
+def ingest_incidents(overlay, incidents):
+    """Add incidents in the CrimeDataService format to the overlay, returning how many were new."""
+    added = 0
+    for incident in incidents:
+        try:
+            timestamp = pd.to_datetime(incident['datetime'], utc=True).timestamp()
+            location = incident['location']
+            added += overlay.add(incident['id'], float(location['lat']), float(location['lng']), timestamp)
+        except (KeyError, TypeError, ValueError) as e:
+            logger.warning(f"Skipping malformed incident {incident!r}: {e}")
+    return added
+
+def _refresh_crime_overlay(overlay):
+    since = datetime.now(pytz.utc) - timedelta(seconds=overlay.window_seconds)
+    while True:
+        try:
+            incidents = crime_service.get_recent_incidents(since)
+            added = ingest_incidents(overlay, incidents)
+            expired = overlay.expire()
+            if incidents:
+                # Re-fetch from the newest incident seen; ids dedupe the overlap.
+                since = max(pd.to_datetime(i['datetime'], utc=True) for i in incidents).to_pydatetime()
+            if added or expired:
+                logger.info(f"Crime overlay refreshed: {added} new, {expired} expired incidents "
+                            f"(version {overlay.version})")
+                if not tiles_enabled():
+                    load_connectivity().rebuild(overlay)
+        except Exception as e:
+            logger.error(f"Crime overlay refresh failed: {e}")
+        time.sleep(CRIME_OVERLAY_REFRESH_SECONDS)
 
-def extract_path_coordinates(path_nodes, node_df):
+def extract_path_coordinates(path_nodes, nodes):
     try:
-        coords = node_df.loc[path_nodes, ["lat", "lon"]]
-        coordinates = coords.values.tolist()
-        return coordinates
+        return nodes.coordinates(path_nodes)
     except Exception as e:
         logger.error(f"Error extracting coordinates for path: {e}")
         return []
 
-def process_algorithm_results(results, node_df, node_mapping=None):
+def process_algorithm_results(results, nodes):
+    """Attach global node ids and coordinates to solver paths, whose node ids are rows of the NodeTable nodes."""
     processed_results = []
     
     for path_result in results:
         try:
-            compact_path = path_result.get('path', [])
-            
-            if node_mapping and 'new_to_old' in node_mapping:
-                new_to_old = node_mapping['new_to_old']
-                original_path = [new_to_old[compact_idx] for compact_idx in compact_path]
-                logger.info(f"Remapped path: {compact_path[:3]}...{compact_path[-3:]} -> {original_path[:3]}...{original_path[-3:]}")
-            else:
-                original_path = compact_path
-            
-            path_coordinates = extract_path_coordinates(original_path, node_df)
+            compact_path = np.asarray(path_result.get('path', []), dtype=np.int64)
+            original_path = nodes.node_ids(compact_path)
+            path_coordinates = extract_path_coordinates(compact_path, nodes)
             
             enhanced_result = {
                 'name': path_result.get('name', ''),
@@ -82,7 +309,9 @@ def process_algorithm_results(results, node_df, node_mapping=None):
                 'path_coordinates': path_coordinates,
                 'time': path_result.get('time', 0),
                 'dark': path_result.get('dark', 0),
-                'path_length': len(original_path)
+                'path_length': len(original_path),
+                'fallback': path_result.get('fallback', False),
+                'approximate': path_result.get('approximate', False)
             }
             
             processed_results.append(enhanced_result)
@@ -93,117 +322,446 @@ def process_algorithm_results(results, node_df, node_mapping=None):
     
     return processed_results
 
-def haversine_distance(lat1, lon1, lat2, lon2):
-    from math import radians, cos, sin, asin, sqrt
-    
-    lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
-
-    dlat = lat2 - lat1
-    dlon = lon2 - lon1
-    a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
-    c = 2 * asin(sqrt(a))
-    r = 6371000 
-    return c * r
-
-def find_closest_node(target_lat, target_lon, df):
-    distances = df.apply(
-        lambda row: haversine_distance(target_lat, target_lon, row['lat'], row['lon']), 
-        axis=1
-    )
-    closest_idx = distances.idxmin()
-    closest_distance = distances.iloc[closest_idx]
-    return closest_idx, closest_distance
+def record_search(results, s, t, stats=None):
+    if stats is not None:
+        solver_metrics.record(stats)
+    fallback = not results or any(path.get('fallback', False) for path in results)
+    with _search_counts_lock:
+        search_counts['searches'] += 1
+        search_counts['fallback_searches'] += fallback
+    if not results:
+        logger.info(f"No route found from {s} to {t}, neither search reached it")
+    elif fallback:
+        logger.warning(f"Label search found no route from {s} to {t}, answered by the fallback search")
+    return results
+
+def no_route(stats=None):
+    """
+    Status, message and empty paths for a pair without a route: no_safe_route
+    if the connectivity check ruled one out (stats None), else the reason the
+    search, with these stats, came back empty.
+    """
+    if stats is None:
+        status = 'no_safe_route'
+    elif stats['deadline']:
+        status = 'budget_exhausted'
+    else:
+        status = 'no_route_in_corridor'
+    return {'status': status, 'message': NO_ROUTE_MESSAGES[status], 'paths': []}
+
+def request_budget(data):
+    """The request's budget_ms, or the configured default. Raises ValueError if invalid."""
+    budget_ms = data.get('budget_ms', ROUTING_BUDGET_MS)
+    if isinstance(budget_ms, bool) or not isinstance(budget_ms, (int, float)) or budget_ms < 0:
+        raise ValueError('budget_ms must be a non-negative number of milliseconds')
+    return float(budget_ms)
+
+def request_format(data):
+    """
+    The request's (compact, simplify_m): compact responses encode geometry as
+    polylines shared between identical paths. Raises ValueError if invalid.
+    """
+    response_format = data.get('format', 'full')
+    if response_format not in ('full', 'compact'):
+        raise ValueError("format must be 'full' or 'compact'")
+    simplify_m = data.get('simplify_m', 0)
+    if isinstance(simplify_m, bool) or not isinstance(simplify_m, (int, float)) or simplify_m < 0:
+        raise ValueError('simplify_m must be a non-negative number of meters')
+    if simplify_m and response_format != 'compact':
+        raise ValueError("simplify_m requires format 'compact'")
+    return response_format == 'compact', float(simplify_m)
+
+def compact_paths(paths, simplify_m=0, include_nodes=False):
+    """
+    Compact form of processed paths: each distinct route's geometry appears
+    once in 'geometries', as an encoded polyline optionally simplified to
+    simplify_m meters, and every path refers to it by index. Node lists are
+    dropped unless include_nodes.
+    """
+    geometries = []
+    index = {}
+    compact = []
+    for path in paths:
+        key = tuple(path.get('path_nodes', ()))
+        if key not in index:
+            coords = np.asarray(path.get('path_coordinates', []), dtype=np.float64).reshape(-1, 2)
+            kept = simplify(coords, simplify_m)
+            geometry = {'polyline': encode_polyline(coords[kept]), 'points': len(kept)}
+            if include_nodes:
+                geometry['path_nodes'] = list(key)
+            index[key] = len(geometries)
+            geometries.append(geometry)
+        compact.append({
+            **{k: v for k, v in path.items() if k not in ('path_nodes', 'path_coordinates')},
+            'geometry': index[key]
+        })
+    return {'paths': compact, 'geometries': geometries}
+
+def route_exposure(path, overlay):
+    """
+    Crime exposure of a processed path from the overlay's per-node scores.
+    Each segment (consecutive pair of path_nodes) scores the mean of its two
+    nodes; 'score' is their length-weighted sum in kilometers, 'per_km' the
+    length-weighted mean and 'peak' the highest node.
+    """
+    scores = overlay.exposure_at(path.get('path_nodes', []))
+    coords = np.asarray(path.get('path_coordinates', []), dtype=np.float64).reshape(-1, 2)
+    if len(scores) < 2 or len(coords) != len(scores):
+        return {'score': 0.0, 'per_km': 0.0, 'peak': round(float(scores.max(initial=0.0)), 4), 'segments': []}
+    lengths = haversine_array(coords[:-1, 0], coords[:-1, 1], coords[1:, 0], coords[1:, 1])
+    segments = (scores[:-1] + scores[1:]) / 2
+    length_m = float(lengths.sum())
+    score_m = float(segments @ lengths)
+    return {
+        'score': round(score_m / 1000, 4),
+        'per_km': round(score_m / length_m, 4) if length_m > 0 else 0.0,
+        'peak': round(float(scores.max()), 4),
+        'segments': np.round(segments, 4).tolist()
+    }
+
+def is_approximate(paths):
+    return any(path.get('approximate', False) for path in paths)
+
+def find_closest_node(target_lat, target_lon):
+    if tiles_enabled():
+        return load_tile_store().nearest(target_lat, target_lon)
+    return load_node_index().nearest(target_lat, target_lon)
+
+def snap_points(lats, lons):
+    """(indices, distances_m) of the closest node to each point."""
+    if not tiles_enabled():
+        return load_node_index().nearest_many(lats, lons)
+    lats, lons = np.asarray(lats, dtype=np.float64).ravel(), np.asarray(lons, dtype=np.float64).ravel()
+    snapped = [find_closest_node(lat, lon) for lat, lon in zip(lats.tolist(), lons.tolist())]
+    return (np.array([idx for idx, _ in snapped], dtype=np.int64).reshape(-1),
+            np.array([dist for _, dist in snapped], dtype=np.float64).reshape(-1))
+
+def route_cache_key(s, t):
+    return (s, t, 'ellipse', CORRIDOR_DETOUR_FACTOR, CORRIDOR_GROWTH, CORRIDOR_MAX_EXPANSIONS)
+
+def corridor_mask(graph, s, t, detour_factor=CORRIDOR_DETOUR_FACTOR, mask=None, region=None):
+    """
+    Elliptical corridor with foci at the snapped endpoints, so it depends only
+    on (s, t) and the crime overlay, whose flagged nodes are left out of it.
+
+    Only nodes in the grid cells around the ellipse are tested. Passing the
+    corridor of a smaller detour_factor as mask widens it in place, testing
+    just the nodes it does not hold yet. On a tile region, graph is the
+    region's graph and s and t are local ids.
+    """
+    start = (float(graph.lat[s]), float(graph.lon[s]))
+    end = (float(graph.lat[t]), float(graph.lon[t]))
+    if mask is None:
+        mask = np.zeros(graph.num_nodes, dtype=bool)
+    # Every point of the ellipse lies within half its major axis of the center.
+    reach = ellipse_reach(start, end, detour_factor, CORRIDOR_MIN_SLACK_M)
+    index = load_node_index() if region is None else region.node_index
+    candidates = index.window((start[0] + end[0]) / 2, (start[1] + end[1]) / 2, reach / 2)
+    candidates = candidates[~mask[candidates]]
+    inside = ellipse_mask(graph.lat[candidates].astype(np.float64), graph.lon[candidates].astype(np.float64),
+                          start, end, detour_factor, CORRIDOR_MIN_SLACK_M)
+    mask[candidates[inside]] = True
+    load_crime_overlay().apply(mask, None if region is None else region.node_ids)
+    mask[s] = True
+    mask[t] = True
+    return mask
+
+def needs_wider_corridor(stats):
+    # The search ran to completion without reaching t inside the corridor.
+    return stats['fallback'] and not stats['deadline'] and not stats['iteration_limit']
+
+def solve_in_corridor(graph, node_graph, s, t, budget_ms=0, corridor=None, first=None, spent_ms=0.0, region=None):
+    """
+    Search s -> t in the tight corridor and widen it, reusing the nodes
+    already selected, while the search finds no path, up to
+    CORRIDOR_MAX_EXPANSIONS times. budget_ms covers all attempts.
+    first is an already computed (results, stats) for corridor, which took
+    spent_ms of the budget.
+
+    Returns (results, stats, corridor_info) for the last attempt.
+    """
+    started = time.perf_counter() - spent_ms / 1000
+    detour_factor = CORRIDOR_DETOUR_FACTOR
+    if corridor is None:
+        corridor = corridor_mask(node_graph, s, t, detour_factor, region=region)
+    if first is None:
+        first = graph.query(s, t, corridor, return_stats=True, budget_ms=budget_ms)
+    results, stats = first
+    expansions = 0
+    while needs_wider_corridor(stats) and expansions < CORRIDOR_MAX_EXPANSIONS:
+        remaining = budget_ms - (time.perf_counter() - started) * 1000 if budget_ms > 0 else 0
+        if budget_ms > 0 and remaining <= 0:
+            break
+        detour_factor = 1 + (detour_factor - 1) * CORRIDOR_GROWTH
+        corridor_mask(node_graph, s, t, detour_factor, corridor, region)
+        expansions += 1
+        results, stats = graph.query(s, t, corridor, return_stats=True, budget_ms=remaining)
+    if expansions:
+        logger.info(f"Widened corridor {s}->{t} {expansions}x to detour factor {detour_factor:.2f}")
+    return results, stats, {
+        'shape': 'ellipse',
+        'detour_factor': round(detour_factor, 4),
+        'expansions': expansions,
+        'nodes': int(np.count_nonzero(corridor))
+    }
 
 def prepare_algorithm_data(start_lat, start_lon, end_lat, end_lon):
-    df = load_osm_data()
-    
-    bounds = create_circular_bounds(start_lat, start_lon, end_lat, end_lon)
-    logger.info(f"Created circular bounds: center=({bounds['center_lat']:.4f}, {bounds['center_lon']:.4f}), radius={bounds['radius']:.0f}m")
-    
-    start_idx, start_dist = find_closest_node(start_lat, start_lon, df)
-    end_idx, end_dist = find_closest_node(end_lat, end_lon, df)
+    start_idx, start_dist = find_closest_node(start_lat, start_lon)
+    end_idx, end_dist = find_closest_node(end_lat, end_lon)
     
     logger.info(f"Start point ({start_lat}, {start_lon}) -> node {start_idx} (distance: {start_dist:.2f}m)")
     logger.info(f"End point ({end_lat}, {end_lon}) -> node {end_idx} (distance: {end_dist:.2f}m)")
     
-    N = len(df)
-    
-    light = df['NTL'].tolist()
-    
-    crime = df['near_crime_100m'].fillna(False).astype(int).tolist()
-    
-    df['in_bounds'] = df.apply(
-        lambda row: point_in_circle(row['lat'], row['lon'], bounds), 
-        axis=1
-    )
-    nodes_in_bounds = set(df[df['in_bounds']].index)
-    
-    nodes_in_bounds.add(start_idx)
-    nodes_in_bounds.add(end_idx)
-    
-    logger.info(f"Nodes in bounds: {len(nodes_in_bounds)} out of {len(df)} ({len(nodes_in_bounds)/len(df)*100:.1f}%)")
-    
-    nodes_list = sorted(list(nodes_in_bounds))  
-    old_to_new = {old_idx: new_idx for new_idx, old_idx in enumerate(nodes_list)}
-    new_to_old = {new_idx: old_idx for old_idx, new_idx in old_to_new.items()}
-    
-    compact_N = len(nodes_list)
-    compact_light = [light[old_idx] for old_idx in nodes_list]
-    compact_crime = [crime[old_idx] for old_idx in nodes_list]
-    
-    logger.info(f"Remapped {N} nodes -> {compact_N} compact nodes ({compact_N/N*100:.2f}%)")
-    
-    edges_df = load_edges_data()
-    
-    valid_edges = edges_df[
-        (edges_df['u_idx'].isin(nodes_in_bounds)) & 
-        (edges_df['v_idx'].isin(nodes_in_bounds))
-    ]
-    
-    # Remap
-    compact_edges = []
-    for _, edge in valid_edges.iterrows():
-        u_old, v_old, weight = edge['u_idx'], edge['v_idx'], edge['length_m']
-        if u_old in old_to_new and v_old in old_to_new:
-            u_new = old_to_new[u_old]
-            v_new = old_to_new[v_old]
-            compact_edges.append([u_new, v_new, weight])
-    
-    M = len(compact_edges)
-    logger.info(f"Remapped edges: {len(edges_df)} -> {len(valid_edges)} -> {M} compact edges")
-    
-    compact_start = old_to_new[start_idx]
-    compact_end = old_to_new[end_idx]
-    
-    logger.info(f"Remapped indices: start {start_idx}->{compact_start}, end {end_idx}->{compact_end}")
-    
     return {
-        'N': compact_N,  
-        'M': M,
-        'light': compact_light,  
-        'crime': compact_crime,  
-        'input': compact_edges,  
-        's': compact_start,      
-        't': compact_end,        
-        'start_coords': (df.iloc[start_idx]['lat'], df.iloc[start_idx]['lon']),
-        'end_coords': (df.iloc[end_idx]['lat'], df.iloc[end_idx]['lon']),
+        'N': graph_size()[0],
+        's': start_idx,
+        't': end_idx,
+        'start_coords': node_coordinates(start_idx),
+        'end_coords': node_coordinates(end_idx),
         'start_distance': start_dist,
-        'end_distance': end_dist,
-        'node_mapping': {
-            'old_to_new': old_to_new,
-            'new_to_old': new_to_old,
-            'nodes_list': nodes_list,
-            'original_N': N,
-            'compact_N': compact_N
-        },
-        'bounds_info': {
-            'center': (bounds['center_lat'], bounds['center_lon']),
-            'radius': bounds['radius'],
-            'nodes_in_bounds': len(nodes_in_bounds),
-            'edges_filtered': M
-        }
+        'end_distance': end_dist
+    }
+
+def result_nodes(region):
+    """The NodeTable that process_algorithm_results needs for paths found on region."""
+    if region is None:
+        return load_node_table()
+    return region.node_table
+
+def solve_route(s, t, budget_ms=0):
+    """Solve s -> t on the graph routing_target() picks. Returns (processed paths, stats, corridor_info)."""
+    graph, node_graph, region = routing_target([(s, t)])
+    ls, lt = (s, t) if region is None else (region.local(s), region.local(t))
+    results, stats, corridor = solve_in_corridor(graph, node_graph, ls, lt, budget_ms, region=region)
+    return process_algorithm_results(results, result_nodes(region)), stats, corridor
+
+def open_session(s, t, version):
+    """
+    Search state for navigating s -> t: the corridor at
+    ROUTE_SESSION_DETOUR_FACTOR and exact lower bounds to t over it, built
+    against crime overlay version. Returns (state, nbytes); nbytes includes
+    the tile region the state pins, which may outlive its place in the
+    tile cache. The bounds live in this process, so its searches do too.
+    """
+    graph, node_graph, region = routing_target([(s, t)], in_process=True)
+    ls, lt = (s, t) if region is None else (region.local(s), region.local(t))
+    corridor = corridor_mask(node_graph, ls, lt, ROUTE_SESSION_DETOUR_FACTOR, region=region)
+    bounds = graph.target_bounds(lt, corridor, [ls])
+    logger.info(f"Opened route session towards {t}: {np.count_nonzero(corridor)} corridor nodes, "
+                f"bounds in {bounds.compute_ms:.1f}ms")
+    state = {
+        't': t,
+        'version': version,
+        'graph': graph,
+        'node_graph': node_graph,
+        'region': region,
+        'corridor': corridor,
+        'bounds': bounds
+    }
+    nbytes = corridor.nbytes + bounds.nbytes
+    if region is not None:
+        nbytes += region.nbytes
+    return state, nbytes
+
+def solve_in_session(session, s, budget_ms=0):
+    """
+    Solve s -> the session's destination with its bounds, in the tight
+    corridor clipped to the session's and, if that holds no path, in the
+    whole session corridor. Clipping keeps the bounds admissible.
+
+    Returns (processed paths, stats, corridor_info), or None if s is outside
+    the session corridor or neither corridor holds a path.
+    """
+    graph, node_graph, region = session['graph'], session['node_graph'], session['region']
+    try:
+        ls, lt = (s, session['t']) if region is None else (region.local(s), region.local(session['t']))
+    except KeyError:
+        return None
+    if not session['corridor'][ls]:
+        return None
+    started = time.perf_counter()
+    corridor = corridor_mask(node_graph, ls, lt, region=region) & session['corridor']
+    results, stats = graph.query(ls, lt, corridor, return_stats=True, budget_ms=budget_ms, bounds=session['bounds'])
+    detour_factor, expansions = CORRIDOR_DETOUR_FACTOR, 0
+    remaining = budget_ms - (time.perf_counter() - started) * 1000 if budget_ms > 0 else 0
+    if needs_wider_corridor(stats) and (budget_ms <= 0 or remaining > 0):
+        corridor = session['corridor']
+        detour_factor, expansions = ROUTE_SESSION_DETOUR_FACTOR, 1
+        results, stats = graph.query(ls, lt, corridor, return_stats=True, budget_ms=remaining,
+                                     bounds=session['bounds'])
+        if needs_wider_corridor(stats):
+            return None
+    return process_algorithm_results(results, result_nodes(region)), stats, {
+        'shape': 'ellipse',
+        'detour_factor': round(detour_factor, 4),
+        'expansions': expansions,
+        'nodes': int(np.count_nonzero(corridor))
     }
 
+def reroute(token, session, s, t, budget_ms, version):
+    """
+    Solve s -> t for a navigation session. session is the token's state, if
+    any; it is reused while it heads to t, was built against the current
+    overlay version and covers s, and rebuilt under the same token otherwise.
+
+    Returns (token, processed paths, stats, corridor_info, reused). token is
+    None if the session state does not fit in the session budget.
+    """
+    if session is not None and session['t'] == t and session['version'] == version:
+        solved = solve_in_session(session, s, budget_ms)
+        if solved is not None:
+            route_sessions.record_reroute(True)
+            return (token, *solved, True)
+    state, nbytes = open_session(s, t, version)
+    if session is not None:
+        route_sessions.record_reroute(False)
+        if not route_sessions.replace(token, state, nbytes):
+            route_sessions.discard(token)
+            token = None
+    else:
+        token = route_sessions.create(state, nbytes)
+    solved = solve_in_session(state, s, budget_ms)
+    if solved is None:
+        solved = solve_route(s, t, budget_ms)
+    return (token, *solved, False)
+
+def _solve_destination_group(t, sources, budget_ms=0):
+    """
+    Solve every source to t in one shared-bounds pass over the tight
+    corridors, then widen the corridors of just the sources it found no
+    path for. Returns {s: (processed paths, stats, corridor_info)}.
+    """
+    graph, node_graph, region = routing_target([(s, t) for s in sources])
+    local = (lambda node: node) if region is None else region.local
+    lt = local(t)
+    local_sources = [local(s) for s in sources]
+    corridors = [corridor_mask(node_graph, s, lt, region=region) for s in local_sources]
+    results, stats = graph.query_many(local_sources, lt, corridors, return_stats=True, budget_ms=budget_ms)
+    nodes = result_nodes(region)
+    solved = {}
+    for s, ls, corridor, first in zip(sources, local_sources, corridors, zip(results, stats)):
+        # Each search had its own budget; the shared bounds are not charged to it.
+        paths, path_stats, corridor_info = solve_in_corridor(
+            graph, node_graph, ls, lt, budget_ms, corridor, first,
+            spent_ms=first[1]['hierarchy_ms'] + first[1]['search_ms'] + first[1]['fallback_ms'], region=region)
+        solved[s] = (process_algorithm_results(paths, nodes), path_stats, corridor_info)
+    return solved
+
+def find_paths_batch(pairs, include_stats=False, budget_ms=0, compact=False, simplify_m=0, include_nodes=False):
+    """
+    Route many (start_lat, start_lon, end_lat, end_lon) pairs, yielding one
+    result per pair in input order.
+
+    All endpoints are snapped in one vectorized pass and answered from the
+    route cache where possible; pairs with no safe route at all get status
+    'no_safe_route' without a search, and pairs whose search finds none the
+    status no_route() gives. The remaining pairs that snap to the same
+    destination form a group that shares that destination's lower bounds,
+    and groups are solved in parallel on the solver pool. With include_stats,
+    freshly solved pairs carry the solver's stats (None when cached).
+    budget_ms bounds each search; answers cut short by it are not cached.
+    compact, simplify_m and include_nodes select the compact_paths form.
+    """
+    # Read before any corridor is built, so a result is never cached under a
+    # newer version than the overlay it was computed with.
+    version = current_crime_version()
+    coords = np.asarray(pairs, dtype=np.float64).reshape(-1, 4)
+    snapped, snap_dist = snap_points(coords[:, [0, 2]], coords[:, [1, 3]])
+    snapped, snap_dist = snapped.reshape(-1, 2), snap_dist.reshape(-1, 2)
+    endpoints = [(int(s), int(t)) for s, t in snapped]
+
+    cached = {}
+    solver_stats = {}
+    groups = {}
+    # (s, t) -> no_route() answer, never cached.
+    no_routes = {}
+    for i, (s, t) in enumerate(endpoints):
+        if (s, t) in cached or (s, t) in no_routes:
+            continue
+        if not is_reachable(s, t):
+            no_routes[(s, t)] = no_route()
+            continue
+        entry = route_cache.get(route_cache_key(s, t), version)
+        if entry is not None:
+            cached[(s, t)] = entry
+        else:
+            groups.setdefault(t, {})[s] = i
+    first_use = {t: min(members.values()) for t, members in groups.items()}
+    logger.info(f"Batch of {len(coords)} pairs -> {len(cached)} cached, {len(no_routes)} unreachable, "
+                f"{len(groups)} destination groups")
+
+    # Groups are submitted in order of first use, a few ahead of the consumer,
+    # so results stream out while later groups are still being solved.
+    unsubmitted = iter(sorted(groups, key=first_use.get))
+    futures = {}
+    def submit_next():
+        t = next(unsubmitted, None)
+        if t is None:
+            return
+        try:
+            futures[t] = solver_pool.submit(_solve_destination_group, t, list(groups[t]), budget_ms)
+        except SolverPoolBusy as e:
+            futures[t] = e
+
+    for _ in range(solver_pool.max_workers):
+        submit_next()
+    try:
+        for i, (s, t) in enumerate(endpoints):
+            if (s, t) not in cached and (s, t) not in no_routes:
+                while t not in futures:
+                    submit_next()
+                if i == first_use[t]:
+                    submit_next()
+                try:
+                    if isinstance(futures[t], Exception):
+                        raise futures[t]
+                    paths, solver_stats[(s, t)], corridor = futures[t].result()[s]
+                    record_search(paths, s, t, solver_stats[(s, t)])
+                except Exception as e:
+                    logger.error(f"Batch pair {i} failed: {e}")
+                    yield {'index': i, 'status': 'error', 'error': str(e)}
+                    continue
+                if not paths:
+                    no_routes[(s, t)] = no_route(solver_stats[(s, t)])
+                else:
+                    cached[(s, t)] = {'paths': paths, 'corridor': corridor}
+                    if not is_approximate(paths):
+                        route_cache.set(route_cache_key(s, t), version, cached[(s, t)])
+            result = {
+                'index': i,
+                'status': 'success',
+                'start_node': {
+                    'index': s,
+                    'coordinates': node_coordinates(s),
+                    'distance_from_input': float(snap_dist[i, 0])
+                },
+                'end_node': {
+                    'index': t,
+                    'coordinates': node_coordinates(t),
+                    'distance_from_input': float(snap_dist[i, 1])
+                }
+            }
+            if (s, t) in no_routes:
+                result.update(no_routes[(s, t)])
+                if include_stats:
+                    result['solver_stats'] = solver_stats.get((s, t))
+                yield result
+                continue
+            result.update({
+                'approximate': is_approximate(cached[(s, t)]['paths']),
+                'corridor': cached[(s, t)]['corridor'],
+                'paths': cached[(s, t)]['paths']
+            })
+            if compact:
+                result.update(compact_paths(result['paths'], simplify_m, include_nodes))
+            if include_stats:
+                result['solver_stats'] = solver_stats.get((s, t))
+            yield result
+    finally:
+        for future in futures.values():
+            if not isinstance(future, Exception):
+                future.cancel()
+
 @algorithm_bp.route('/api/algorithm/find-path', methods=['POST'])
 def find_path_from_coordinates():
     """Find optimal path between two lat/lng coordinates"""
@@ -217,58 +775,241 @@ def find_path_from_coordinates():
         return jsonify({'error': f'Missing required parameters: {", ".join(missing_params)}'}), 400
     
     try:
+        budget_ms = request_budget(data)
+        compact, simplify_m = request_format(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        num_nodes, num_edges = graph_size()
+        version = current_crime_version()
         algo_data = prepare_algorithm_data(
             data['start_lat'], data['start_lon'],
             data['end_lat'], data['end_lon']
         )
-        logger.info(f"Prepared algorithm data: N={algo_data['N']}, M={algo_data['M']}, start_node={algo_data['s']}, end_node={algo_data['t']}")
-        # A*
-        results = run_astar_solver(
-            algo_data['N'],
-            algo_data['M'], 
-            algo_data['light'],
-            algo_data['crime'],
-            algo_data['input'],
-            algo_data['s'],
-            algo_data['t']
-        )
-        
-        node_df = load_osm_data()
-        
-        processed_paths = process_algorithm_results(results, node_df, algo_data.get('node_mapping'))
+        logger.info(f"Prepared algorithm data: start_node={algo_data['s']}, end_node={algo_data['t']}")
+        endpoints = {
+            'start_node': {
+                'index': algo_data['s'],
+                'coordinates': algo_data['start_coords'],
+                'distance_from_input': algo_data['start_distance']
+            },
+            'end_node': {
+                'index': algo_data['t'],
+                'coordinates': algo_data['end_coords'],
+                'distance_from_input': algo_data['end_distance']
+            }
+        }
+        if not is_reachable(algo_data['s'], algo_data['t']):
+            logger.info(f"No safe route from {algo_data['s']} to {algo_data['t']}, skipping the search")
+            return jsonify({**no_route(), **endpoints})
+        cache_key = route_cache_key(algo_data['s'], algo_data['t'])
+        entry = route_cache.get(cache_key, version)
+        cached = entry is not None
+        solver_stats = None
+        if not cached:
+            # A*
+            paths, solver_stats, corridor = solver_pool.run(solve_route, algo_data['s'], algo_data['t'], budget_ms)
+            record_search(paths, algo_data['s'], algo_data['t'], solver_stats)
+            logger.info(f"Corridor: {corridor['nodes']} nodes after {corridor['expansions']} expansions")
+            if not paths:
+                response = {**no_route(solver_stats), **endpoints}
+                if data.get('include_stats'):
+                    response['solver_stats'] = solver_stats
+                return jsonify(response)
+            
+            entry = {'paths': paths, 'corridor': corridor}
+            # A best-so-far answer would otherwise stand in for the full one.
+            if not is_approximate(paths):
+                route_cache.set(cache_key, version, entry)
+        processed_paths = entry['paths']
+        corridor = entry['corridor']
+        if data.get('include_exposure'):
+            # Scored per response against the live overlay, leaving the cached paths untouched.
+            overlay = load_crime_overlay()
+            processed_paths = [{**path, 'exposure': route_exposure(path, overlay)} for path in processed_paths]
         
-        return jsonify({
+        response = {
             'status': 'success',
+            'cached': cached,
+            'approximate': is_approximate(processed_paths),
             'start_node': {
                 'index': algo_data['s'],  
-                'original_index': algo_data['node_mapping']['new_to_old'][algo_data['s']],
+                'original_index': algo_data['s'],
                 'coordinates': algo_data['start_coords'],
                 'distance_from_input': algo_data['start_distance']
             },
             'end_node': {
                 'index': algo_data['t'],  
-                'original_index': algo_data['node_mapping']['new_to_old'][algo_data['t']],
+                'original_index': algo_data['t'],
                 'coordinates': algo_data['end_coords'],
                 'distance_from_input': algo_data['end_distance']
             },
             'algorithm_input': {
-                'N': algo_data['N'], 
-                'M': algo_data['M']
+                'N': num_nodes, 
+                'M': num_edges
             },
             'optimization': {
-                'original_nodes': algo_data['node_mapping']['original_N'],
-                'compact_nodes': algo_data['node_mapping']['compact_N'],
-                'compression_ratio': round(algo_data['node_mapping']['compact_N'] / algo_data['node_mapping']['original_N'], 4),
-                'bounds_center': algo_data['bounds_info']['center'],
-                'bounds_radius': algo_data['bounds_info']['radius']
+                'original_nodes': algo_data['N'],
+                'compact_nodes': corridor['nodes'],
+                'compression_ratio': round(corridor['nodes'] / algo_data['N'], 4),
+                'corridor_shape': corridor['shape'],
+                'detour_factor': corridor['detour_factor'],
+                'expansions': corridor['expansions']
             },
             'paths': processed_paths
-        })
+        }
+        if compact:
+            response.update(compact_paths(processed_paths, simplify_m, bool(data.get('include_nodes'))))
+        if data.get('include_stats'):
+            response['solver_stats'] = solver_stats
+        if data.get('include_exposure'):
+            response['exposure_radius_m'] = load_crime_overlay().exposure_radius_m
+        return jsonify(response)
         
+    except (SolverPoolBusy, SolverProcessError) as e:
+        return jsonify({'error': str(e)}), 503
+    except LookupError as e:
+        return jsonify({'error': str(e)}), 404
     except Exception as e:
         logger.error(f"Error in find_path_from_coordinates: {e}")
         return jsonify({'error': 'Internal server error', 'details': str(e)}), 500
 
+@algorithm_bp.route('/api/algorithm/find-paths-batch', methods=['POST'])
+def find_paths_batch_endpoint():
+    """Route many coordinate pairs, streamed back as one JSON object per line in request order"""
+    data = request.get_json()
+    if not data or not isinstance(data.get('pairs'), list):
+        return jsonify({'error': 'Invalid JSON payload, expected a list of pairs'}), 400
+    if len(data['pairs']) > BATCH_MAX_PAIRS:
+        return jsonify({'error': f'At most {BATCH_MAX_PAIRS} pairs per batch'}), 400
+
+    required_params = ['start_lat', 'start_lon', 'end_lat', 'end_lon']
+    try:
+        pairs = [[float(pair[p]) for p in required_params] for pair in data['pairs']]
+    except (KeyError, TypeError, ValueError):
+        return jsonify({'error': f'Each pair needs numeric {", ".join(required_params)}'}), 400
+    try:
+        budget_ms = request_budget(data)
+        compact, simplify_m = request_format(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if not pairs:
+        return Response('', mimetype='application/x-ndjson')
+
+    try:
+        load_tile_store() if tiles_enabled() else load_search_graph()
+    except Exception as e:
+        logger.error(f"Error in find_paths_batch: {e}")
+        return jsonify({'error': 'Internal server error', 'details': str(e)}), 500
+
+    def generate():
+        for result in find_paths_batch(pairs, include_stats=bool(data.get('include_stats')), budget_ms=budget_ms,
+                                       compact=compact, simplify_m=simplify_m,
+                                       include_nodes=bool(data.get('include_nodes'))):
+            yield json.dumps(result) + '\n'
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@algorithm_bp.route('/api/algorithm/reroute', methods=['POST'])
+def reroute_endpoint():
+    """
+    Directions for a navigation session. Without route_token this opens a
+    session towards end_lat/end_lon and returns its token; with it only the
+    new start position is needed, and the session's search state is reused
+    while the user stays inside its corridor.
+    """
+    data = request.get_json()
+    if not data:
+        return jsonify({'error': 'Invalid JSON payload'}), 400
+    token = data.get('route_token')
+    session = route_sessions.get(token) if token else None
+    has_end = 'end_lat' in data and 'end_lon' in data
+    if token and session is None and not has_end:
+        return jsonify({'error': 'Unknown or expired route_token, send end_lat and end_lon to open a new session'}), 404
+
+    required_params = ['start_lat', 'start_lon'] + ([] if session is not None else ['end_lat', 'end_lon'])
+    missing_params = [p for p in required_params if p not in data]
+    if missing_params:
+        return jsonify({'error': f'Missing required parameters: {", ".join(missing_params)}'}), 400
+
+    try:
+        budget_ms = request_budget(data)
+        compact, simplify_m = request_format(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        version = current_crime_version()
+        s, start_dist = find_closest_node(data['start_lat'], data['start_lon'])
+        if has_end:
+            t, end_dist = find_closest_node(data['end_lat'], data['end_lon'])
+        else:
+            t, end_dist = session['t'], None
+        response = {
+            'status': 'success',
+            'route_token': token if session is not None else None,
+            'start_node': {
+                'index': s,
+                'coordinates': node_coordinates(s),
+                'distance_from_input': start_dist
+            },
+            'end_node': {
+                'index': t,
+                'coordinates': node_coordinates(t),
+                'distance_from_input': end_dist
+            }
+        }
+        if not is_reachable(s, t):
+            logger.info(f"No safe route from {s} to {t}, skipping the search")
+            response.update(no_route())
+            return jsonify(response)
+
+        # Positions along a trip rarely repeat, so reroutes skip the route cache.
+        token, paths, solver_stats, corridor, reused = solver_pool.run(
+            reroute, response['route_token'], session, s, t, budget_ms, version)
+        record_search(paths, s, t, solver_stats)
+        if not paths:
+            response.update({**no_route(solver_stats), 'route_token': token})
+            if data.get('include_stats'):
+                response['solver_stats'] = solver_stats
+            return jsonify(response)
+        response.update({
+            'route_token': token,
+            'session': {
+                'reused': reused,
+                'expires_in_s': route_sessions.ttl_seconds if token is not None else None
+            },
+            'approximate': is_approximate(paths),
+            'optimization': {
+                'compact_nodes': corridor['nodes'],
+                'corridor_shape': corridor['shape'],
+                'detour_factor': corridor['detour_factor'],
+                'expansions': corridor['expansions']
+            },
+            'paths': paths
+        })
+        if compact:
+            response.update(compact_paths(paths, simplify_m, bool(data.get('include_nodes'))))
+        if data.get('include_stats'):
+            response['solver_stats'] = solver_stats
+        return jsonify(response)
+
+    except (SolverPoolBusy, SolverProcessError) as e:
+        return jsonify({'error': str(e)}), 503
+    except LookupError as e:
+        return jsonify({'error': str(e)}), 404
+    except Exception as e:
+        logger.error(f"Error in reroute_endpoint: {e}")
+        return jsonify({'error': 'Internal server error', 'details': str(e)}), 500
+
+@algorithm_bp.route('/api/algorithm/reroute/<token>', methods=['DELETE'])
+def end_route_session(token):
+    """End a navigation session, releasing its search state"""
+    if not route_sessions.discard(token):
+        return jsonify({'error': 'Unknown or expired route_token'}), 404
+    return jsonify({'status': 'success'})
+
 @algorithm_bp.route('/api/algorithm/run-astar', methods=['POST'])
 def run_astar_endpoint():
     """Original endpoint for direct algorithm input"""
@@ -281,28 +1022,74 @@ def run_astar_endpoint():
         return jsonify({'error': f'Missing required parameters: {", ".join(missing_params)}'}), 400
 
     try:
-        results = run_astar_solver(
-            data['N'],
-            data['M'],
-            data['light'],
-            data['crime'],
-            data['input'],
+        edges = np.asarray(data['input'], dtype=np.float64).reshape(-1, 3)
+        results, solver_stats = solver_pool.run(
+            run_astar_solver_arrays,
+            np.asarray(data['light'], dtype=np.float64),
+            np.asarray(data['crime'], dtype=np.uint8),
+            edges[:, 0].astype(np.int32),
+            edges[:, 1].astype(np.int32),
+            np.ascontiguousarray(edges[:, 2]),
             data['s'],
-            data['t']
+            data['t'],
+            True
         )
+        record_search(results, data['s'], data['t'], solver_stats)
 
-        node_df = load_osm_data()
-        
-        processed_paths = process_algorithm_results(results, node_df, None)
+        processed_paths = process_algorithm_results(results, load_node_table())
 
-        return jsonify({
+        response = {
             'status': 'success',
             'results': processed_paths
-        })
+        }
+        if data.get('include_stats'):
+            response['solver_stats'] = solver_stats
+        return jsonify(response)
 
+    except (SolverPoolBusy, SolverProcessError) as e:
+        return jsonify({'error': str(e)}), 503
     except (TypeError, ValueError) as e:
         logger.error(f"Data type error calling Cython module: {e}")
         return jsonify({'error': 'Invalid data types in request payload', 'details': str(e)}), 400
     except Exception as e:
         logger.error(f"An unexpected error occurred in the A* solver: {e}")
-        return jsonify({'error': 'An internal error occurred in the solver', 'details': str(e)}), 500
\ No newline at end of file
+        return jsonify({'error': 'An internal error occurred in the solver', 'details': str(e)}), 500
+
+@algorithm_bp.route('/api/algorithm/stats', methods=['GET'])
+def algorithm_stats():
+    with _search_counts_lock:
+        searches = dict(search_counts)
+    return jsonify({
+        'solver_pool': solver_pool.get_stats(),
+        'solver_processes': solver_processes.get_stats() if solver_processes is not None else None,
+        'route_cache': route_cache.get_stats(),
+        'crime_overlay': crime_overlay.get_stats() if crime_overlay is not None else None,
+        'connectivity': connectivity.get_stats() if connectivity is not None else None,
+        'tiles': tile_store.get_stats() if tile_store is not None else None,
+        'route_sessions': route_sessions.get_stats(),
+        'workspaces': routing_graph.workspace_stats() if routing_graph is not None else None,
+        'solver': solver_metrics.get_stats(),
+        'searches': searches
+    })
+
+@algorithm_bp.route('/api/algorithm/crime-overlay', methods=['POST'])
+def crime_overlay_ingest():
+    """Push incidents (CrimeDataService format) into the live crime overlay"""
+    data = request.get_json()
+    if not data or not isinstance(data.get('incidents'), list):
+        return jsonify({'error': 'Invalid JSON payload, expected a list of incidents'}), 400
+    try:
+        overlay = load_crime_overlay()
+        added = ingest_incidents(overlay, data['incidents'])
+        expired = overlay.expire()
+        if not tiles_enabled():
+            load_connectivity().rebuild(overlay)
+        return jsonify({
+            'status': 'success',
+            'added': added,
+            'expired': expired,
+            'overlay': overlay.get_stats()
+        })
+    except Exception as e:
+        logger.error(f"Error in crime_overlay_ingest: {e}")
+        return jsonify({'error': 'Internal server error', 'details': str(e)}), 500
@@ -0,0 +1 @@
+# Checks of the routing core against brute-force references (run with pytest)
@@ -0,0 +1,117 @@
+"""
+CrimeOverlay's incremental flags and exposure against a replay that recomputes
+them from scratch, by haversine over every node, after each step.
+"""
+import numpy as np
+import pytest
+
+from backend.algorithm.crime_overlay import CrimeOverlay
+from backend.algorithm.spatial_index import NodeSpatialIndex, haversine_array
+
+RADIUS_M = 150.0
+EXPOSURE_RADIUS_M = 400.0
+WINDOW_HOURS = 1.0
+WINDOW_S = WINDOW_HOURS * 3600
+
+
+def random_points(rng, count):
+    # About 2 km square, so incidents overlap and some cover no node at all.
+    return 39.95 + rng.uniform(0.0, 0.018, count), -75.17 + rng.uniform(0.0, 0.024, count)
+
+
+def make_overlay(lat, lon):
+    return CrimeOverlay(NodeSpatialIndex(lat, lon), radius_m=RADIUS_M, window_hours=WINDOW_HOURS,
+                        exposure_radius_m=EXPOSURE_RADIUS_M)
+
+
+class Replay:
+    """The overlay's state recomputed from the live incidents alone."""
+
+    def __init__(self, lat, lon):
+        self.lat, self.lon = lat, lon
+        self.live = {}  # incident id -> (timestamp, lat, lon)
+
+    def flagged(self):
+        flagged = np.zeros(len(self.lat), dtype=bool)
+        for _, lat, lon in self.live.values():
+            flagged |= haversine_array(lat, lon, self.lat, self.lon) <= RADIUS_M
+        return np.flatnonzero(flagged)
+
+    def exposure(self):
+        total = np.zeros(len(self.lat))
+        for _, lat, lon in self.live.values():
+            dist = haversine_array(lat, lon, self.lat, self.lon)
+            total += np.where(dist < EXPOSURE_RADIUS_M, 1 - dist / EXPOSURE_RADIUS_M, 0.0)
+        return total
+
+    def expire(self, now):
+        """Ids of the incidents older than the window, oldest first, dropped from live."""
+        cutoff = now - WINDOW_S
+        expired = sorted((ts, i) for i, (ts, _, _) in self.live.items() if ts < cutoff)
+        for _, incident_id in expired:
+            del self.live[incident_id]
+        return [incident_id for _, incident_id in expired]
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_overlay_matches_replay(seed):
+    rng = np.random.default_rng(seed)
+    lat, lon = random_points(rng, 300)
+    overlay = make_overlay(lat, lon)
+    replay = Replay(lat, lon)
+    now = 1_000_000.0
+    next_id = 0
+    for _ in range(150):
+        flags_before, version_before = overlay.flagged_nodes(), overlay.version
+        if rng.uniform() < 0.7:
+            # Mostly recent incidents, some already stale, some repeated ids.
+            incident_id = int(rng.integers(next_id)) if next_id and rng.uniform() < 0.1 else next_id
+            next_id = max(next_id, incident_id + 1)
+            timestamp = now - rng.uniform(-0.1, 1.2) * WINDOW_S
+            (inc_lat,), (inc_lon,) = random_points(rng, 1)
+            fresh = incident_id not in replay.live and timestamp >= now - WINDOW_S
+            assert overlay.add(incident_id, inc_lat, inc_lon, timestamp, now=now) == fresh
+            if fresh:
+                replay.live[incident_id] = (timestamp, inc_lat, inc_lon)
+            max_bumps = 1
+        else:
+            now += rng.uniform(0.0, 0.5) * WINDOW_S
+            expired = replay.expire(now)
+            assert overlay.expire(now=now) == len(expired)
+            max_bumps = len(expired)
+
+        flags = overlay.flagged_nodes()
+        np.testing.assert_array_equal(flags, replay.flagged())
+        np.testing.assert_allclose(overlay.exposure_at(np.arange(len(lat))), replay.exposure(), atol=1e-9)
+        # The version moves exactly when the flagged set does: at most once
+        # per incident added or expired.
+        bumps = overlay.version - version_before
+        if np.array_equal(flags, flags_before):
+            assert bumps == 0
+        else:
+            assert 1 <= bumps <= max_bumps
+
+    stats = overlay.get_stats()
+    assert stats['live_incidents'] == len(replay.live)
+    assert stats['added'] - stats['expired'] == len(replay.live)
+
+
+def test_expire_goes_by_timestamp_not_arrival():
+    rng = np.random.default_rng(0)
+    lat, lon = random_points(rng, 200)
+    overlay = make_overlay(lat, lon)
+    replay = Replay(lat, lon)
+    # Added newest first, so arrival order is the reverse of expiry order.
+    stamps = [400.0, 300.0, 200.0, 100.0]
+    for incident_id, timestamp in enumerate(stamps):
+        (inc_lat,), (inc_lon,) = random_points(rng, 1)
+        assert overlay.add(incident_id, inc_lat, inc_lon, timestamp, now=500.0)
+        replay.live[incident_id] = (timestamp, inc_lat, inc_lon)
+    for timestamp in sorted(stamps):
+        now = timestamp + WINDOW_S + 1.0
+        # Exactly the oldest live incident goes at each step.
+        assert replay.expire(now) == [stamps.index(timestamp)]
+        assert overlay.expire(now=now) == 1
+        assert overlay.get_stats()['live_incidents'] == len(replay.live)
+        np.testing.assert_array_equal(overlay.flagged_nodes(), replay.flagged())
+    assert overlay.version > 0 and len(overlay.flagged_nodes()) == 0
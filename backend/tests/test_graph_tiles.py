@@ -0,0 +1,59 @@
+"""
+TileStore's byte cap under a random mix of tile, region and lookup calls,
+with the cached bytes recounted from the resident tiles and regions.
+"""
+import numpy as np
+import pytest
+
+from backend.algorithm.graph_compiler import compile_graph
+from backend.algorithm.graph_tiles import TileStore, write_tiles
+from backend.benchmarks.synthetic import make_grid_city
+
+
+
+@pytest.fixture(scope='module')
+def tile_dir(tmp_path_factory):
+    nodes, edges = make_grid_city(4000, seed=0)
+    graph = compile_graph(nodes, edges, num_landmarks=0, hierarchy=False)
+    directory = tmp_path_factory.mktemp('tiles')
+    write_tiles(graph, str(directory), tile_m=500)
+    return str(directory)
+
+
+def resident_bytes(store):
+    return (sum(tile.nbytes for tile in store._loaded.values()) +
+            sum(region.nbytes for region in store._regions.values()))
+
+
+# 0.015 MB holds about six tiles of this graph, so the byte cap does the
+# evicting; 1 MB holds all of them, so only the region count limit does.
+@pytest.mark.parametrize('max_mb, max_regions', [(0.015, 4), (1, 2)])
+@pytest.mark.parametrize('seed', range(3))
+def test_loaded_bytes_stay_under_cap(tile_dir, seed, max_mb, max_regions):
+    rng = np.random.default_rng(seed)
+    store = TileStore(tile_dir, max_mb=max_mb, max_regions=max_regions)
+    keys = sorted(store.tiles)
+    for _ in range(300):
+        row, col = keys[rng.integers(len(keys))]
+        op = rng.uniform()
+        if op < 0.4:
+            store.tile((row, col))
+        elif op < 0.8:
+            # A corridor's worth of neighboring tiles, some of them repeats.
+            height, width = rng.integers(1, 3, size=2)
+            region = store.region([(r, c) for r in range(row, row + height) for c in range(col, col + width)
+                                   if (r, c) in store.tiles])
+            assert region.routing_graph.num_nodes == len(region.node_ids)
+        else:
+            lat, lon = store.coordinates(store.tiles[(row, col)]['first_id'])
+            store.within(lat, lon, 300.0)
+        stats = store.get_stats()
+        assert stats['loaded_bytes'] == resident_bytes(store)
+        assert stats['loaded_bytes'] <= stats['max_bytes']
+        assert stats['regions'] <= store.max_regions
+    stats = store.get_stats()
+    if max_mb < 1:
+        assert stats['evictions'] > 0
+    else:
+        assert stats['evictions'] == 0
+        assert stats['region_misses'] > max_regions
@@ -0,0 +1,147 @@
+"""
+The solver's (time, darkness) picks against every simple path of a tiny graph.
+
+The graphs are ladders: s and t at the two ends of row 0, with cheap rungs
+to row 1. Faster rails are darker, so fronts hold real tradeoffs, and labels
+reach a node both along its rail and across its rung, out of time order,
+which exercises inserting into the middle of a sorted front. Rail times vary
+by at most 15%, so none of the solver's time-ratio cuts can fire; the only
+approximation left is the cardinality cap on intermediate fronts.
+"""
+import numpy as np
+import pytest
+
+from backend.algorithm.astar_solver import RoutingGraph
+from backend.algorithm.graph_artifact import CompiledGraph
+from backend.benchmarks.pareto import exact_pareto_front
+
+EPS = 1e-9
+
+
+def ladder_graph(length, seed):
+    """Returns the graph (light at lmax, so darkness starts at 0) and the s and t ids."""
+    rng = np.random.default_rng(seed)
+
+    def node(row, col):
+        return 2 * col + row
+
+    edges = []
+    for col in range(length):
+        edges.append((node(0, col), node(1, col), rng.uniform(0.01, 0.05), rng.uniform(0.0, 1.0)))
+        if col + 1 == length:
+            continue
+        for row in (0, 1):
+            x = rng.uniform()
+            edges.append((node(row, col), node(row, col + 1),
+                          1.0 + 0.15 * x, 5.0 + 5.0 * (1 - x) + rng.uniform(0.0, 0.5)))
+    n = 2 * length
+    rows = [[] for _ in range(n)]
+    for u, v, time, dark in edges:
+        rows[u].append((v, time, dark))
+        rows[v].append((u, time, dark))
+    offsets = np.zeros(n + 1, dtype=np.int32)
+    offsets[1:] = np.cumsum([len(row) for row in rows])
+    arcs = [arc for row in rows for arc in row]
+    arrays = {
+        'lat': np.zeros(n, dtype=np.float32),
+        'lon': np.arange(n, dtype=np.float32) * 1e-3,
+        'light': np.ones(n, dtype=np.float64),
+        'crime': np.zeros(n, dtype=np.uint8),
+        'offsets': offsets,
+        'targets': np.array([v for v, _, _ in arcs], dtype=np.int32),
+        'edge_time': np.array([time for _, time, _ in arcs], dtype=np.float64),
+        'edge_dark': np.array([dark for _, _, dark in arcs], dtype=np.float64),
+    }
+    return CompiledGraph(arrays, 1.0), node(0, 0), node(0, length - 1)
+
+
+def brute_force_front(graph, s, t):
+    """Pareto front over every simple s-t path, sorted by time."""
+    costs = []
+
+    def walk(u, seen, time, dark):
+        if u == t:
+            costs.append((time, dark))
+            return
+        for e in range(graph.offsets[u], graph.offsets[u + 1]):
+            v = int(graph.targets[e])
+            if v not in seen:
+                walk(v, seen | {v}, time + graph.edge_time[e], dark + graph.edge_dark[e])
+
+    walk(s, {s}, 0.0, 0.0)
+    front = []
+    for time, dark in sorted(costs):
+        if not front or dark < front[-1][1] - EPS:
+            front.append((time, dark))
+    return front
+
+
+def expected_picks(front):
+    """fastest, best_lit and balanced as the solver picks them from an uncapped front."""
+    times = [time for time, _ in front]
+    darks = [dark for _, dark in front]
+
+    def norm(x, lo, hi):
+        return 0.0 if hi - lo < 1e-12 else (x - lo) / (hi - lo)
+
+    scores = [np.hypot(norm(time, min(times), max(times)), norm(dark, min(darks), max(darks)))
+              for time, dark in front]
+    return {
+        'fastest': front[int(np.argmin(times))],
+        'best_lit': front[int(np.argmin(darks))],
+        'balanced': front[int(np.argmin(scores))],
+    }
+
+
+def routing_graph(graph):
+    return RoutingGraph.from_csr(graph.light, graph.crime, graph.offsets, graph.targets,
+                                 graph.edge_time, graph.edge_dark, graph.lmax)
+
+
+def path_cost(graph, path):
+    time = dark = 0.0
+    for u, v in zip(path, path[1:]):
+        e = next(e for e in range(graph.offsets[u], graph.offsets[u + 1]) if graph.targets[e] == v)
+        time += graph.edge_time[e]
+        dark += graph.edge_dark[e]
+    return time, dark
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_reference_front_matches_brute_force(seed):
+    graph, s, t = ladder_graph(length=7, seed=seed)
+    assert exact_pareto_front(graph, s, t) == pytest.approx(brute_force_front(graph, s, t))
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_uncapped_front_gives_exact_picks(seed):
+    graph, s, t = ladder_graph(length=3, seed=seed)
+    expected = expected_picks(brute_force_front(graph, s, t))
+    paths, stats = routing_graph(graph).query(s, t, return_stats=True)
+    # No intermediate front outgrew the cap, so the target's front is exact.
+    assert stats['labels_capped'] == 0
+    assert [path['name'] for path in paths] == ['fastest', 'best_lit', 'balanced']
+    for path in paths:
+        assert not path['fallback'] and not path['approximate']
+        assert path['path'][0] == s and path['path'][-1] == t
+        assert path_cost(graph, path['path']) == pytest.approx((path['time'], path['dark']))
+        assert (path['time'], path['dark']) == pytest.approx(expected[path['name']])
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_capped_fronts_keep_the_extremes(seed):
+    # The cap always keeps a node's fastest and best lit labels, and those
+    # are prefixes of the fastest and best lit routes, so both picks stay exact.
+    graph, s, t = ladder_graph(length=7, seed=seed)
+    front = brute_force_front(graph, s, t)
+    paths = {path['name']: path for path in routing_graph(graph).query(s, t)}
+    assert paths['fastest']['time'] == pytest.approx(front[0][0])
+    assert paths['best_lit']['dark'] == pytest.approx(front[-1][1])
+    for path in paths.values():
+        assert path_cost(graph, path['path']) == pytest.approx((path['time'], path['dark']))
+
+
+def test_ladders_exercise_the_cap():
+    capped = [routing_graph(graph).query(s, t, return_stats=True)[1]['labels_capped']
+              for graph, s, t in (ladder_graph(length=7, seed=seed) for seed in range(20))]
+    assert sum(count > 0 for count in capped) >= 15
@@ -0,0 +1,86 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+import logging
+logger = logging.getLogger(__name__)
+
+class RouteCache:
+    """
+    LRU cache of processed route payloads under a byte budget.
+
+    Entries are tagged with the crime-overlay version they were computed
+    against. Versions only move forward: the first lookup or store with a
+    newer version drops every older entry, and results computed against an
+    older version are not stored.
+    """
+
+    def __init__(self):
+        self.max_bytes = int(os.getenv('ROUTE_CACHE_MAX_MB', 64)) * 1024 * 1024
+        self._entries = OrderedDict()
+        self._current_size = 0
+        self._version = None
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    def _check_version(self, version: int) -> bool:
+        if self._version is None or version > self._version:
+            if self._entries:
+                logger.info(f"Crime overlay moved to version {version}, dropping {len(self._entries)} cached routes")
+                self._invalidations += 1
+            self._entries.clear()
+            self._current_size = 0
+            self._version = version
+        return version == self._version
+
+    def get(self, key: Hashable, version: int) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key) if self._check_version(version) else None
+            if entry is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[0]
+
+    def set(self, key: Hashable, version: int, value: Any) -> bool:
+        value_size = len(json.dumps(value).encode('utf-8'))
+        if value_size > self.max_bytes:
+            return False
+        with self._lock:
+            if not self._check_version(version):
+                return False
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._current_size -= old[1]
+            while self._entries and self._current_size + value_size > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._current_size -= evicted_size
+                self._evictions += 1
+            self._entries[key] = (value, value_size)
+            self._current_size += value_size
+            return True
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._current_size = 0
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'entries': len(self._entries),
+                'size_bytes': self._current_size,
+                'max_bytes': self.max_bytes,
+                'version': self._version,
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_rate': round(self._hits / lookups, 4) if lookups else 0.0,
+                'evictions': self._evictions,
+                'invalidations': self._invalidations
+            }
@@ -0,0 +1,112 @@
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+import logging
+logger = logging.getLogger(__name__)
+
+class RouteSessions:
+    """
+    Per-navigation search state, keyed by an opaque route token.
+
+    Entries are LRU-evicted under a byte budget and expire once idle for
+    longer than the TTL. The stored state is replaced, never mutated, so a
+    reader holding an old state keeps a consistent view of it.
+    """
+
+    def __init__(self):
+        self.max_bytes = int(os.getenv('ROUTE_SESSION_MAX_MB', 256)) * 1024 * 1024
+        self.ttl_seconds = float(os.getenv('ROUTE_SESSION_TTL_SECONDS', 1800))
+        self._entries = OrderedDict()
+        self._current_size = 0
+        self._lock = threading.Lock()
+        self._created = 0
+        self._expired = 0
+        self._evictions = 0
+        self._reroutes = 0
+        self._reused = 0
+
+    def _expire(self, now: float):
+        while self._entries:
+            token, (_, size, touched) = next(iter(self._entries.items()))
+            if now - touched <= self.ttl_seconds:
+                break
+            del self._entries[token]
+            self._current_size -= size
+            self._expired += 1
+
+    def _store(self, token: str, state: Any, nbytes: int) -> bool:
+        if nbytes > self.max_bytes:
+            return False
+        now = time.monotonic()
+        old = self._entries.pop(token, None)
+        if old is not None:
+            self._current_size -= old[1]
+        self._expire(now)
+        while self._entries and self._current_size + nbytes > self.max_bytes:
+            _, (_, evicted_size, _) = self._entries.popitem(last=False)
+            self._current_size -= evicted_size
+            self._evictions += 1
+        self._entries[token] = (state, nbytes, now)
+        self._current_size += nbytes
+        return True
+
+    def create(self, state: Any, nbytes: int) -> Optional[str]:
+        """Store state under a new token. None if it alone exceeds the budget."""
+        token = secrets.token_urlsafe(16)
+        with self._lock:
+            if not self._store(token, state, nbytes):
+                logger.warning(f"Route session of {nbytes} bytes exceeds the {self.max_bytes} byte budget")
+                return None
+            self._created += 1
+        return token
+
+    def get(self, token: str) -> Optional[Any]:
+        with self._lock:
+            self._expire(time.monotonic())
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            state, size, _ = entry
+            self._entries[token] = (state, size, time.monotonic())
+            self._entries.move_to_end(token)
+            return state
+
+    def replace(self, token: str, state: Any, nbytes: int) -> bool:
+        """Swap in new state for a token, which keeps working; False if it no longer fits."""
+        with self._lock:
+            return self._store(token, state, nbytes)
+
+    def discard(self, token: str) -> bool:
+        with self._lock:
+            entry = self._entries.pop(token, None)
+            if entry is not None:
+                self._current_size -= entry[1]
+            return entry is not None
+
+    def record_reroute(self, reused: bool):
+        with self._lock:
+            self._reroutes += 1
+            self._reused += reused
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._current_size = 0
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                'sessions': len(self._entries),
+                'size_bytes': self._current_size,
+                'max_bytes': self.max_bytes,
+                'ttl_seconds': self.ttl_seconds,
+                'created': self._created,
+                'expired': self._expired,
+                'evictions': self._evictions,
+                'reroutes': self._reroutes,
+                'reused': self._reused,
+                'reuse_rate': round(self._reused / self._reroutes, 4) if self._reroutes else 0.0
+            }
@@ -0,0 +1,92 @@
+import bisect
+import threading
+from typing import Optional
+import logging
+logger = logging.getLogger(__name__)
+
+# Upper bucket bounds; each histogram also has an overflow bucket.
+MS_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+COUNT_BUCKETS = (10, 100, 1000, 10000, 100000, 1000000)
+
+class Histogram:
+    """Fixed-bucket histogram; percentiles resolve to a bucket's upper bound."""
+
+    def __init__(self, bounds):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def percentile(self, q: float) -> Optional[float]:
+        if self.count == 0:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return self.bounds[i] if i < len(self.bounds) else self.max
+        return self.max
+
+    def snapshot(self) -> dict:
+        return {
+            'count': self.count,
+            'mean': round(self.total / self.count, 3) if self.count else None,
+            'max': self.max,
+            'p50': self.percentile(0.5),
+            'p95': self.percentile(0.95),
+            'p99': self.percentile(0.99),
+            'buckets': {
+                **{f'le_{b}': n for b, n in zip(self.bounds, self.counts)},
+                'overflow': self.counts[-1]
+            }
+        }
+
+class SolverMetrics:
+    """
+    Process-wide histograms over the per-query stats the solver returns, so
+    phase timings and search effort can be watched without per-request logs.
+    """
+
+    TIMINGS = ('build_ms', 'bound_time_ms', 'bound_dark_ms', 'hierarchy_ms', 'search_ms', 'fallback_ms')
+    COUNTS = ('iterations', 'labels_created', 'labels_dominated', 'labels_capped', 'peak_open')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {name: Histogram(MS_BUCKETS) for name in self.TIMINGS}
+        self._histograms.update({name: Histogram(COUNT_BUCKETS) for name in self.COUNTS})
+        self._queries = 0
+        self._fallbacks = 0
+        self._iteration_limits = 0
+        self._deadlines = 0
+
+    def record(self, stats: dict):
+        with self._lock:
+            self._queries += 1
+            self._fallbacks += bool(stats.get('fallback'))
+            self._iteration_limits += bool(stats.get('iteration_limit'))
+            self._deadlines += bool(stats.get('deadline'))
+            for name, histogram in self._histograms.items():
+                # Phases a query skipped (no graph build, landmark bounds, ...) are not observed.
+                value = stats.get(name, 0)
+                if value or name in self.COUNTS:
+                    histogram.observe(value)
+        if stats.get('iteration_limit'):
+            logger.warning(f"Solver hit its iteration limit after {stats.get('iterations')} iterations")
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                'queries': self._queries,
+                'fallbacks': self._fallbacks,
+                'iteration_limits': self._iteration_limits,
+                'deadlines': self._deadlines,
+                'histograms': {name: h.snapshot() for name, h in self._histograms.items()}
+            }
@@ -0,0 +1,64 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import logging
+logger = logging.getLogger(__name__)
+
+class SolverPoolBusy(Exception):
+    pass
+
+class SolverPool:
+    """Bounded thread pool for route searches, which release the GIL while in C++."""
+
+    def __init__(self):
+        self.max_workers = int(os.getenv('ROUTING_THREADS', os.cpu_count() or 1))
+        self.max_pending = int(os.getenv('ROUTING_MAX_PENDING', self.max_workers * 4))
+        self.queue_timeout = float(os.getenv('ROUTING_QUEUE_TIMEOUT_SECONDS', 5))
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='route-solver')
+        self._slots = threading.BoundedSemaphore(self.max_workers + self.max_pending)
+        self._lock = threading.Lock()
+        self._active = 0
+        self._completed = 0
+        self._rejected = 0
+        self._busy_seconds = 0.0
+
+    def submit(self, fn, *args, **kwargs):
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            with self._lock:
+                self._rejected += 1
+            logger.warning(f"Solver pool saturated ({self.max_workers} running, {self.max_pending} queued)")
+            raise SolverPoolBusy('Routing capacity exhausted, try again shortly')
+        try:
+            return self._executor.submit(self._run, fn, *args, **kwargs)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def run(self, fn, *args, **kwargs):
+        return self.submit(fn, *args, **kwargs).result()
+
+    def _run(self, fn, *args, **kwargs):
+        with self._lock:
+            self._active += 1
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self._active -= 1
+                self._completed += 1
+                self._busy_seconds += elapsed
+            self._slots.release()
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                'max_workers': self.max_workers,
+                'max_pending': self.max_pending,
+                'active': self._active,
+                'completed': self._completed,
+                'rejected': self._rejected,
+                'busy_seconds': round(self._busy_seconds, 3)
+            }
@@ -0,0 +1,224 @@
+import multiprocessing
+import os
+import queue
+import threading
+import numpy as np
+from backend.algorithm.graph_artifact import build_routing_graph, load_graph
+from backend.utils.solver_pool import SolverPoolBusy
+import logging
+logger = logging.getLogger(__name__)
+
+class SolverProcessError(Exception):
+    pass
+
+def _mask(num_nodes, node_ids):
+    if node_ids is None:
+        return None
+    mask = np.zeros(num_nodes, dtype=np.uint8)
+    mask[node_ids] = 1
+    return mask
+
+def _query(solver, s, t, corridor, budget_ms):
+    return solver.query(s, t, _mask(solver.num_nodes, corridor), return_stats=True, budget_ms=budget_ms)
+
+def _query_many(solver, sources, t, corridors, budget_ms):
+    masks = None if corridors is None else [_mask(solver.num_nodes, ids) for ids in corridors]
+    return solver.query_many(sources, t, masks, return_stats=True, budget_ms=budget_ms)
+
+_HANDLERS = {'query': _query, 'query_many': _query_many}
+
+def _serve(conn, graph_path, checksum):
+    """Solver process main loop: answer one (method, args) request at a time until the pipe closes."""
+    try:
+        graph = load_graph(graph_path)
+        if checksum is not None and graph.checksum != checksum:
+            raise ValueError(f"{graph_path} changed on disk since the server mapped it")
+        solver = build_routing_graph(graph)
+        solver.set_max_workspaces(1)
+    except Exception as e:
+        conn.send(('error', SolverProcessError(f"Solver process could not load {graph_path}: {e}")))
+        return
+    conn.send(('ready', os.getpid()))
+    while True:
+        try:
+            method, args = conn.recv()
+        except (EOFError, OSError):
+            return
+        try:
+            reply = ('ok', _HANDLERS[method](solver, *args))
+        except Exception as e:
+            reply = ('error', e)
+        try:
+            conn.send(reply)
+        except Exception:
+            # The exception itself does not pickle; send its message.
+            conn.send(('error', SolverProcessError(f"{type(reply[1]).__name__}: {reply[1]}")))
+
+class _Worker:
+    def __init__(self, context, graph_path, checksum):
+        self.conn, child = context.Pipe()
+        self.process = context.Process(target=_serve, args=(child, graph_path, checksum),
+                                       name='route-solver-process', daemon=True)
+        self.process.start()
+        child.close()
+        self.ready = False
+
+    def kill(self):
+        self.process.kill()
+        self.process.join(timeout=5)
+        self.conn.close()
+
+class SolverProcessPool:
+    """
+    Route searches in dedicated solver processes, so a CPU-heavy search never
+    competes with request handling for the interpreter, and a crash in the
+    extension takes down one solver rather than the worker.
+
+    Each process memory-maps the same graph artifact, so the graph is shared
+    through the OS page cache instead of copied. Requests carry the
+    endpoints, the budget and each corridor as node ids. A process that has
+    not answered once the search's budget plus a grace period has passed,
+    or that dies, is killed and replaced, and the search raises
+    SolverProcessError.
+    """
+
+    def __init__(self, graph_path, checksum=None, processes=1):
+        self.graph_path = graph_path
+        self.checksum = checksum
+        self.processes = max(1, int(processes))
+        self.grace_seconds = float(os.getenv('ROUTING_PROCESS_GRACE_MS', 1000)) / 1000
+        # Limit for searches without a budget.
+        self.max_search_seconds = float(os.getenv('ROUTING_PROCESS_MAX_SECONDS', 60))
+        self.start_timeout = float(os.getenv('ROUTING_PROCESS_START_SECONDS', 60))
+        self.queue_timeout = float(os.getenv('ROUTING_QUEUE_TIMEOUT_SECONDS', 5))
+        # Request threads must never be forked mid-flight.
+        self._context = multiprocessing.get_context('spawn')
+        self._lock = threading.Lock()
+        self._idle = queue.LifoQueue()
+        self._workers = set()
+        self._busy = 0
+        self._completed = 0
+        self._timeouts = 0
+        self._crashes = 0
+        self._closed = False
+        for _ in range(self.processes):
+            self._spawn()
+        self.graph = RemoteRoutingGraph(self)
+
+    def _spawn(self):
+        worker = _Worker(self._context, self.graph_path, self.checksum)
+        with self._lock:
+            self._workers.add(worker)
+        self._idle.put(worker)
+
+    def _replace(self, worker, reason):
+        with self._lock:
+            if worker not in self._workers:
+                # Already replaced, or the pool was closed.
+                return
+            self._workers.discard(worker)
+            if reason == 'timeout':
+                self._timeouts += 1
+            else:
+                self._crashes += 1
+            closed = self._closed
+        worker.kill()
+        logger.warning(f"Restarting solver process {worker.process.pid} after a {reason} "
+                       f"(exit code {worker.process.exitcode})")
+        if not closed:
+            self._spawn()
+
+    def _receive(self, worker, timeout, reason):
+        if not worker.conn.poll(timeout):
+            self._replace(worker, reason)
+            raise SolverProcessError(f"Solver process gave no answer within {timeout:.1f}s and was restarted")
+        return worker.conn.recv()
+
+    def call(self, method, args, limit_ms=0):
+        """
+        Run a solver method in a free process and return its result. limit_ms
+        is the budget the search was given (0 for none); the process gets
+        that plus ROUTING_PROCESS_GRACE_MS before it is presumed runaway.
+        """
+        while True:
+            try:
+                worker = self._idle.get(timeout=self.queue_timeout)
+            except queue.Empty:
+                raise SolverPoolBusy('All solver processes are busy, try again shortly')
+            if worker.process.is_alive():
+                break
+            # Died while idle; its replacement joins the idle queue.
+            self._replace(worker, 'crash')
+        with self._lock:
+            self._busy += 1
+        try:
+            if not worker.ready:
+                status, payload = self._receive(worker, self.start_timeout, 'startup timeout')
+                if status != 'ready':
+                    self._replace(worker, 'startup failure')
+                    raise payload
+                worker.ready = True
+            worker.conn.send((method, args))
+            timeout = limit_ms / 1000 + self.grace_seconds if limit_ms > 0 else self.max_search_seconds
+            status, payload = self._receive(worker, timeout, 'timeout')
+        except (EOFError, OSError) as e:
+            self._replace(worker, 'crash')
+            raise SolverProcessError("Solver process exited during a search and was restarted") from e
+        except BaseException:
+            # Its pipe may be mid-message; a worker is never reused after a failed exchange.
+            self._replace(worker, 'crash')
+            raise
+        finally:
+            with self._lock:
+                self._busy -= 1
+        self._idle.put(worker)
+        with self._lock:
+            self._completed += 1
+        if status == 'error':
+            raise payload
+        return payload
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            workers = list(self._workers)
+            self._workers.clear()
+        for worker in workers:
+            worker.kill()
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                'processes': self.processes,
+                'busy': self._busy,
+                'completed': self._completed,
+                'timeouts': self._timeouts,
+                'crashes': self._crashes,
+                'pids': sorted(worker.process.pid for worker in self._workers)
+            }
+
+class RemoteRoutingGraph:
+    """
+    Stand-in for the resident RoutingGraph whose query() and query_many()
+    run in a SolverProcessPool. Bounds objects stay process-local, so
+    searches that reuse them (navigation sessions) keep the resident graph.
+    """
+
+    def __init__(self, pool):
+        self.pool = pool
+
+    @staticmethod
+    def _node_ids(corridor):
+        return None if corridor is None else np.flatnonzero(corridor).astype(np.int32)
+
+    def query(self, s, t, corridor=None, return_stats=False, budget_ms=0):
+        paths, stats = self.pool.call('query', (int(s), int(t), self._node_ids(corridor), float(budget_ms)),
+                                      budget_ms)
+        return (paths, stats) if return_stats else paths
+
+    def query_many(self, sources, t, corridors=None, return_stats=False, budget_ms=0):
+        sources = [int(s) for s in sources]
+        corridors = None if corridors is None else [self._node_ids(mask) for mask in corridors]
+        results, stats = self.pool.call('query_many', (sources, int(t), corridors, float(budget_ms)),
+                                        budget_ms * len(sources))
+        return (results, stats) if return_stats else results
@@ -27,6 +27,8 @@ export const useNavigationState = ({ map, currentLocation, directionsResponse, s
   const [alternateRoute, setAlternateRoute] = useState<{ path: google.maps.LatLngLiteral[], time: number, addedTime: number } | null>(null);
   const [showAlternateRoute, setShowAlternateRoute] = useState(false);
   const dismissedCrimeIds = useRef(new Set<string | number>());
+  // Reroute session for the current destination; the backend reuses its search state.
+  const routeSessionRef = useRef<{ token: string; destination: string } | null>(null);
 
   useEffect(() => {
     if (simulatedLocation) {
@@ -187,18 +189,26 @@ export const useNavigationState = ({ map, currentLocation, directionsResponse, s
     try {
       console.log("Coords: ", locationForCrimeQuery.lat, locationForCrimeQuery.lng, destination.lat(), destination.lng());
 
-      const endpoint = '/api/algorithm/find-path';
-      const params = {
+      const endpoint = '/api/algorithm/reroute';
+      const destinationKey = `${destination.lat()},${destination.lng()}`;
+      const session = routeSessionRef.current?.destination === destinationKey ? routeSessionRef.current : null;
+      const params: Record<string, string | number> = {
         start_lat: locationForCrimeQuery.lat,
         start_lon: locationForCrimeQuery.lng,
         end_lat: destination.lat(),
         end_lon: destination.lng(),
       };
+      if (session) {
+        params.route_token = session.token;
+      }
 
       const queryString = new URLSearchParams(params as any).toString();
       console.log(`POST ${apiClient.defaults.baseURL}${endpoint}?${queryString}`);
 
       const response = await apiClient.post(endpoint, params);
+      routeSessionRef.current = response.data?.route_token
+        ? { token: response.data.route_token, destination: destinationKey }
+        : null;
 
       if (response.data && response.data.paths && response.data.paths.length > 0) {
         const safestPath = response.data.paths[0];
@@ -359,6 +369,11 @@ export const useNavigationState = ({ map, currentLocation, directionsResponse, s
       clearInterval(crimeCheckIntervalRef.current);
       crimeCheckIntervalRef.current = null;
     }
+
+    if (routeSessionRef.current) {
+      apiClient.delete(`/api/algorithm/reroute/${routeSessionRef.current.token}`).catch(() => {});
+      routeSessionRef.current = null;
+    }
   }, [map, stopLocationTracking, stopHeadingTracking]);
 
   const handleNextStep = () => {
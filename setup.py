@@ -12,7 +12,8 @@ extension = Extension(
     # This includes the Cython wrapper and the C++ implementation file.
     sources=[
         "backend/algorithm/astar_wrapper.pyx",
-        "backend/algorithm/multi-objective-astar.cpp"
+        "backend/algorithm/multi-objective-astar.cpp",
+        "backend/algorithm/contraction-hierarchy.cpp"
     ],
     
     # Specify that this is a C++ extension